@@ -6,11 +6,16 @@ from app.models.canvas_edge import CanvasEdge
 from app.models.card_library import LibraryCard
 from app.models.whiteboard import Whiteboard
 from app.models.folder import Folder
+from app.models.stored_file import StoredFile
 
 async def init_db():
     client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    # Beanie creates the indexes declared in each model's Settings on startup
+    # (idempotent). Existing indexes that are no longer declared are left alone.
     await init_beanie(
         database=client.nomad_telescope, 
-        document_models=[CanvasNode, CanvasEdge, LibraryCard, Whiteboard, Folder]
+        document_models=[CanvasNode, CanvasEdge, LibraryCard, Whiteboard, Folder, StoredFile],
+        skip_indexes=False,
+        allow_index_dropping=False
     )
 
@@ -1,10 +1,22 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from nicegui import ui, app as nicegui_app
 from app.database import init_db
+from app.services.board_service import BoardService
+from app.services.cascade_service import CascadeService
+from app.services.data_service import DataService
+from app.services.search_service import SearchService
+from app.services.thumbnail_service import ThumbnailService
+from app.services.write_behind import WriteBehindBuffer
 from app.ui.layout import create_layout
+from app.utils import image_cache, markdown_render
+from app.utils.linear_export import NarrativeExporter
 from dotenv import load_dotenv
+from typing import Optional
+from urllib.parse import quote
+import asyncio
 import os
 
 load_dotenv()
@@ -12,7 +24,13 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    # Built in the background; searches wait for it, everything else starts right away
+    search_build = asyncio.create_task(SearchService.rebuild())
     yield
+    search_build.cancel()
+    await WriteBehindBuffer.flush_all()
+    markdown_render.shutdown()
+    image_cache.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -21,9 +39,84 @@ app = FastAPI(lifespan=lifespan)
 static_dir = os.path.join(os.path.dirname(__file__), 'static')
 app.mount('/static', StaticFiles(directory=static_dir), name='static')
 
+@app.get('/api/stats/write-behind')
+async def write_behind_stats():
+    """Canvas events received vs. documents written / round trips issued"""
+    return WriteBehindBuffer.totals()
+
+@app.get('/api/backup/export')
+async def export_backup(incremental: bool = False):
+    """
+    Backup archive, streamed to the client while it is being written.
+    incremental=true only contains what changed since the previous backup.
+    """
+    filename = DataService.backup_filename(incremental)
+    return StreamingResponse(
+        DataService.stream_backup(incremental),
+        media_type='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.get('/api/whiteboards/{whiteboard_id}/export/linear')
+async def export_linear_doc(whiteboard_id: str, order: str = NarrativeExporter.ORDER_NARRATIVE, format: str = 'html'):
+    """
+    Linear HTML document of a whiteboard, rendered card by card while it is sent.
+    format=zip puts the images next to the HTML as separate files instead of inlining them.
+    """
+    if format not in ('html', 'zip'):
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    whiteboard = await BoardService.get_whiteboard_by_id(whiteboard_id)
+    if not whiteboard:
+        raise HTTPException(status_code=404, detail="Whiteboard not found")
+    images = NarrativeExporter.IMAGES_FILES if format == 'zip' else NarrativeExporter.IMAGES_INLINE
+    try:
+        exporter = NarrativeExporter(*await BoardService.get_linear_export_data(whiteboard), order=order, images=images)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    name = whiteboard.name or "Whiteboard Export"
+    # Sync generators: Starlette iterates them in a worker thread (markdown, image reads)
+    if format == 'zip':
+        content, media_type = exporter.iter_zip(name), 'application/zip'
+    else:
+        content, media_type = exporter.iter_html(name), 'text/html; charset=utf-8'
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(f'{name}.{format}')}"}
+    )
+
+@app.get('/api/images/{file_name}')
+async def serve_image(file_name: str, w: Optional[int] = None):
+    """
+    Uploaded image at the resolution needed for `w` pixels on its longest edge:
+    the smallest thumbnail that covers it, else the original.
+    """
+    path = await ThumbnailService.resolve(file_name, w)
+    if not path:
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Uploads are content-addressed (a name never changes content), so caches may keep them forever
+    return FileResponse(path, headers={'Cache-Control': 'public, max-age=31536000, immutable'})
+
+@app.get('/api/cascade/jobs/{job_id}')
+async def cascade_job(job_id: str):
+    """Status of a background board delete (state: running | done | failed, counts removed)"""
+    status = CascadeService.job(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@app.get('/api/search')
+async def search(q: str, page: int = 1, page_size: int = 20, whiteboard_id: Optional[str] = None):
+    """
+    Ranked full-text search over the cards of all boards and the card library
+    (prefix matching on the last word, one typo tolerated per word)
+    """
+    return await SearchService.search(q, page=page, page_size=page_size, whiteboard_id=whiteboard_id)
+
 # Define the UI layout and pages
 @ui.page('/')
-async def main_page(id: str = None):
+async def main_page(id: str = None, focus: str = None):
     ui.add_head_html('''
         <style>
             html, body { 
@@ -37,7 +130,7 @@ async def main_page(id: str = None):
             .nicegui-content { padding: 0 !important; height: 100vh; overflow: hidden; display: flex; flex-direction: column; }
         </style>
     ''')
-    await create_layout(whiteboard_id=id)
+    await create_layout(whiteboard_id=id, focus_node_id=focus)
 
 ui.run_with(
     app,
@@ -1,5 +1,6 @@
 from typing import Optional, Literal
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field
 from datetime import datetime
 import uuid
@@ -34,6 +35,12 @@ class CanvasEdge(Document):
     
     class Settings:
         name = "canvas_edges"
+        indexes = [
+            IndexModel([("whiteboard_id", ASCENDING)], name="whiteboard"),
+            # Cascade cleanup by endpoint, with or without a whiteboard filter
+            IndexModel([("fromNode", ASCENDING), ("whiteboard_id", ASCENDING)], name="from_node"),
+            IndexModel([("toNode", ASCENDING), ("whiteboard_id", ASCENDING)], name="to_node"),
+        ]
     
     async def save(self, *args, **kwargs):
         """Override save to update the updated_at timestamp"""
@@ -1,10 +1,71 @@
-from typing import Optional, Literal, List
+from typing import Optional, Literal, List, Dict, Any
 from beanie import Document
-from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from pydantic import BaseModel, Field
 from datetime import datetime
+import re
 import uuid
 
-class CanvasNode(Document):
+# Compiled once; title/preview derivation runs for every card on save
+_HEADER_PREFIX = re.compile(r'^#+\s*')
+_HEADER_PREFIX_LINES = re.compile(r'^#+\s*', flags=re.MULTILINE)
+_EMPHASIS_MARKS = re.compile(r'[*`]')
+
+class CardContentMixin:
+    """
+    Title/preview derivation shared by full documents and lean views.
+    The derived values are stored in the `title`/`preview` fields (refreshed on save)
+    so rendering and export read them instead of re-parsing markdown.
+    """
+    TITLE_DISPLAY_LENGTH = 50
+
+    def compute_title(self) -> Optional[str]:
+        """Full heading of a text card (first line, markdown header stripped)"""
+        if self.type == "text" and self.text:
+            lines = self.text.strip().split('\n')
+            return _HEADER_PREFIX.sub('', lines[0]).strip()
+        if self.type == "file":
+            # Original upload name, set on upload (stored files are named by content hash)
+            return self.title
+        return None
+
+    def compute_preview(self) -> str:
+        """Everything after the first line, with common markdown cleaned up"""
+        if self.type == "text" and self.text:
+            lines = self.text.strip().split('\n')
+            if len(lines) <= 1:
+                return ""
+            content = "\n".join(lines[1:]).strip()
+            content = _HEADER_PREFIX_LINES.sub('', content)
+            return _EMPHASIS_MARKS.sub('', content)
+        return ""
+
+    def refresh_derived(self) -> None:
+        """Recompute stored title/preview after the text changed"""
+        self.title = self.compute_title()
+        self.preview = self.compute_preview()
+
+    def get_title(self) -> str:
+        """Display title (stored value when available)"""
+        if self.type == "text" and self.text:
+            title = self.title if self.title is not None else self.compute_title()
+            return title[:self.TITLE_DISPLAY_LENGTH]
+        elif self.type == "group":
+            return self.text or "Untitled Group"
+        elif self.type == "link":
+            return self.url or "Link"
+        elif self.type == "file":
+            return self.title or self.file or "File"
+        return "Untitled"
+
+    def get_preview(self) -> str:
+        """Preview content (stored value when available)"""
+        if self.preview is not None:
+            return self.preview
+        return self.compute_preview()
+
+
+class CanvasNode(CardContentMixin, Document):
     """
     JSON Canvas 1.0 compliant node model.
     Represents cards, groups, files, or links on the whiteboard.
@@ -47,44 +108,83 @@ class CanvasNode(Document):
     # Nested Whiteboard Navigation
     sub_whiteboard_id: Optional[str] = None # ID of the whiteboard this node links to
     
+    # Derived from text, maintained in save() (None until first computed)
+    title: Optional[str] = None
+    preview: Optional[str] = None
+
+    # Intrinsic pixel size of an image file card (None for other cards / unknown)
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+    
     # Metadata
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     
     class Settings:
         name = "canvas_nodes"
+        indexes = [
+            # Board load (whiteboard_id prefix) and group children lookups
+            IndexModel([("whiteboard_id", ASCENDING), ("parent_id", ASCENDING)], name="whiteboard_parent"),
+            # Viewport rectangle queries
+            IndexModel([("whiteboard_id", ASCENDING), ("x", ASCENDING), ("y", ASCENDING)], name="whiteboard_position"),
+            # LibraryCard.get_projections / delete_with_projections
+            IndexModel([("library_card_id", ASCENDING)], name="library_card"),
+            # CascadeService: sub-board links into deleted boards
+            IndexModel([("sub_whiteboard_id", ASCENDING)], name="sub_whiteboard"),
+        ]
     
     async def save(self, *args, **kwargs):
-        """Override save to update the updated_at timestamp"""
+        """Override save to update the updated_at timestamp and derived fields"""
         self.updated_at = datetime.now()
+        self.refresh_derived()
         return await super().save(*args, **kwargs)
-    
-    def get_title(self) -> str:
-        """Extract title from text content (first line)"""
-        if self.type == "text" and self.text:
-            lines = self.text.strip().split('\n')
-            title = lines[0] if lines else "Untitled"
-            # Strip markdown headers if present
-            import re
-            return re.sub(r'^#+\s*', '', title)[:50]
-        elif self.type == "group":
-            return self.text or "Untitled Group"
-        elif self.type == "link":
-            return self.url or "Link"
-        elif self.type == "file":
-            return self.file or "File"
-        return "Untitled"
 
-    def get_preview(self) -> str:
-        """Extract preview content from text (everything after first line)"""
-        if self.type == "text" and self.text:
-            lines = self.text.strip().split('\n')
-            if len(lines) <= 1:
-                return ""
-            content = "\n".join(lines[1:]).strip()
-            # Clean up common markdown
-            import re
-            content = re.sub(r'^#+\s*', '', content, flags=re.MULTILINE)
-            content = re.sub(r'[*`]', '', content)
-            return content
-        return ""
+
+class CanvasNodeView(CardContentMixin, BaseModel):
+    """
+    Lean read model of CanvasNode: only what the canvas renders and edits.
+    Leaves out whiteboard_id and timestamps. Saving a view through
+    BoardService only $sets these fields, so the omitted ones are never clobbered.
+    """
+    id: str
+    type: Literal["text", "file", "link", "group"]
+    x: float
+    y: float
+    width: float
+    height: float
+    text: Optional[str] = None
+    file: Optional[str] = None
+    url: Optional[str] = None
+    color: Optional[str] = None
+    parent_id: Optional[str] = None
+    collapsed: bool = False
+    tags: List[str] = Field(default_factory=list)
+    exclude_from_export: bool = False
+    sub_whiteboard_id: Optional[str] = None
+    library_card_id: Optional[str] = None
+    title: Optional[str] = None
+    preview: Optional[str] = None
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+
+    class Settings:
+        # Beanie's project() projection, filled in from the fields below the class
+        projection: Dict[str, Any] = {}
+
+    @classmethod
+    def mongo_projection(cls) -> Dict[str, int]:
+        return {name: 1 for name in cls.model_fields if name != "id"}
+
+    @classmethod
+    def from_trusted(cls, doc: Dict[str, Any]) -> "CanvasNodeView":
+        """Build from a raw Mongo document written by this app, skipping validation"""
+        doc["id"] = doc.pop("_id")
+        return cls.model_construct(**doc)
+
+    def changes(self) -> Dict[str, Any]:
+        """Field values to $set when this view is saved"""
+        return {name: getattr(self, name) for name in type(self).model_fields if name != "id"}
+
+
+# Derived from model_fields like mongo_projection()/changes(), so a new field is loaded everywhere
+CanvasNodeView.Settings.projection = {"id": "$_id", **CanvasNodeView.mongo_projection()}
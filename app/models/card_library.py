@@ -30,9 +30,12 @@ class LibraryCard(Document):
         name = "library_cards"
     
     async def save(self, *args, **kwargs):
-        """Override save to update the updated_at timestamp"""
+        """Override save to update the updated_at timestamp (and the search index)"""
+        from app.services.search_service import SearchService
         self.updated_at = datetime.now()
-        return await super().save(*args, **kwargs)
+        result = await super().save(*args, **kwargs)
+        SearchService.index_library_card(self)
+        return result
     
     async def get_projections(self):
         """Get all whiteboard instances (projections) of this library card"""
@@ -44,7 +47,24 @@ class LibraryCard(Document):
     async def delete_with_projections(self):
         """Delete this card and all its projections from whiteboards"""
         from app.models.canvas_node import CanvasNode
-        projections = await self.get_projections()
-        for projection in projections:
-            await projection.delete()
+        from app.models.canvas_edge import CanvasEdge
+        from app.services.search_service import SearchService
+        from app.services.tag_facet_service import TagFacetService
+
+        # Ids, boards and tags of the projections in one query, then set-based deletes
+        nodes = CanvasNode.get_pymongo_collection()
+        projections = [
+            doc async for doc in nodes.find({"library_card_id": self.id}, {"whiteboard_id": 1, "tags": 1})
+        ]
+        projection_ids = [doc["_id"] for doc in projections]
+        if projection_ids:
+            await CanvasEdge.get_pymongo_collection().delete_many(
+                {"$or": [{"fromNode": {"$in": projection_ids}}, {"toNode": {"$in": projection_ids}}]}
+            )
+            await nodes.delete_many({"_id": {"$in": projection_ids}})
         await self.delete()
+
+        SearchService.remove_nodes(projection_ids)
+        SearchService.remove_library_card(self.id)
+        for doc in projections:
+            TagFacetService.apply(doc["whiteboard_id"], removed=set(doc.get("tags") or ()))
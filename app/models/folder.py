@@ -1,21 +1,29 @@
 from typing import Optional
 from beanie import Document
-from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from pydantic import Field, field_validator
 from datetime import datetime
 import uuid
 
+from app.utils import rank
+
 class Folder(Document):
     """
     Folder model for grouping whiteboards.
     """
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str = "New Folder"
-    order: int = 0
+    order: str = rank.key_between(None, None)  # Rank key among folders (app.utils.rank)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
     class Settings:
         name = "folders"
+        indexes = [
+            IndexModel([("order", ASCENDING)], name="order"),
+        ]
+
+    _legacy_order = field_validator("order", mode="before")(rank.coerce)
 
     async def save(self, *args, **kwargs):
         """Override save to update the updated_at timestamp"""
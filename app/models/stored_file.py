@@ -0,0 +1,30 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime
+
+class StoredFile(Document):
+    """
+    Reference table of content-addressed uploads.
+
+    One document per distinct file content (id = SHA-256 hex digest), stored once under
+    app/static/uploads/<digest><ext>. `upload_count` counts the uploads that resolved to it,
+    so pasting the same screenshot again only bumps the count, not another copy.
+
+    `upload_count` only ever grows: deleting cards does not decrease it, so it is not a live
+    reference count and must not be used to decide whether a file can be removed.
+    """
+    id: str  # SHA-256 hex digest of the content
+    file_name: str  # Name under app/static/uploads
+    size: int
+    content_type: str = "application/octet-stream"
+    upload_count: int = 0
+
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "stored_files"
+
+    @property
+    def url(self) -> str:
+        return f"/static/uploads/{self.file_name}"
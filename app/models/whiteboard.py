@@ -1,9 +1,12 @@
 from typing import List, Optional, Dict
 from beanie import Document
-from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from datetime import datetime
 import uuid
 
+from app.utils import rank
+
 class Whiteboard(Document):
     """
     Whiteboard model representing a canvas.
@@ -15,7 +18,7 @@ class Whiteboard(Document):
     # Hierarchy
     parent_id: Optional[str] = None  # Deprecated in favor of folder_id for now, or used for nesting whiteboards directly? Keeping for backward compat if needed.
     folder_id: Optional[str] = None
-    order: int = 0
+    order: str = rank.key_between(None, None)  # Rank key within its folder (app.utils.rank)
     
     # Viewport state for restoring user's view position
     viewport: Dict[str, float] = Field(default_factory=lambda: {
@@ -29,9 +32,33 @@ class Whiteboard(Document):
     
     class Settings:
         name = "whiteboards"
+        indexes = [
+            IndexModel([("created_at", ASCENDING)], name="created_at"),
+            # Sidebar: global sort and per-folder sort
+            IndexModel([("order", ASCENDING)], name="order"),
+            IndexModel([("folder_id", ASCENDING), ("order", ASCENDING)], name="folder_order"),
+            # CascadeService subtree walk
+            IndexModel([("parent_id", ASCENDING)], name="parent"),
+        ]
     
+    _legacy_order = field_validator("order", mode="before")(rank.coerce)
+
     async def save(self, *args, **kwargs):
         """Override save to update the updated_at timestamp"""
         self.updated_at = datetime.now()
         return await super().save(*args, **kwargs)
 
+
+class WhiteboardEntry(BaseModel):
+    """
+    Sidebar projection of a whiteboard: what a list row needs, without the viewport.
+    Used with Whiteboard.find(...).project(WhiteboardEntry).
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str = Field(alias="_id")
+    name: str = "Untitled Whiteboard"
+    folder_id: Optional[str] = None
+    order: str = rank.key_between(None, None)
+
+    _legacy_order = field_validator("order", mode="before")(rank.coerce)
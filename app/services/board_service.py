@@ -1,8 +1,19 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Tuple, Union
+from datetime import datetime
+from app.models.folder import Folder
 from app.models.whiteboard import Whiteboard
-from app.models.canvas_node import CanvasNode
+from app.models.canvas_node import CanvasNode, CanvasNodeView
 from app.models.canvas_edge import CanvasEdge
-from beanie.operators import Or
+from beanie import BulkWriter
+from beanie.operators import Or, In, Set
+from pymongo import UpdateOne
+from app.services.library_service import LibraryService
+from app.services.search_service import SearchService
+from app.services.tag_facet_service import TagFacetService
+from app.utils import rank
+
+# Either a full document or a lean projection loaded for the canvas
+AnyNode = Union[CanvasNode, CanvasNodeView]
 
 class BoardService:
     @staticmethod
@@ -15,10 +26,66 @@ class BoardService:
 
     @staticmethod
     async def create_whiteboard(name: str, parent_id: Optional[str] = None) -> Whiteboard:
-        wb = Whiteboard(name=name, parent_id=parent_id)
+        wb = Whiteboard(name=name, parent_id=parent_id, order=await BoardService.next_whiteboard_order(None))
         await wb.save()
         return wb
 
+    # Sidebar ordering: rank keys (app.utils.rank), so a move writes only the moved document
+    @staticmethod
+    async def next_whiteboard_order(folder_id: Optional[str]) -> str:
+        """Rank key placing a new whiteboard at the end of a folder (None = root)"""
+        last = await Whiteboard.get_pymongo_collection().find_one(
+            {"folder_id": folder_id}, {"order": 1}, sort=[("order", -1)]
+        )
+        return rank.key_between(rank.coerce(last["order"]) if last else None, None)
+
+    @staticmethod
+    async def has_numeric_orders(folder_id: Optional[str]) -> bool:
+        """
+        Whether a folder's whiteboards (None = root) still hold integer orders from before
+        rank keys. Mongo sorts every number before every string, so a single key written into
+        such a list lands after all of them: the list must be rebalanced instead.
+        """
+        doc = await Whiteboard.get_pymongo_collection().find_one(
+            {"folder_id": folder_id, "order": {"$type": "number"}}, {"_id": 1}
+        )
+        return doc is not None
+
+    @staticmethod
+    async def move_whiteboard(whiteboard_id: str, folder_id: Optional[str], order: str) -> None:
+        """Put a whiteboard into a folder (None = root) at a rank key: one document written"""
+        await Whiteboard.find_one(Whiteboard.id == whiteboard_id).update(
+            Set({Whiteboard.folder_id: folder_id, Whiteboard.order: order, Whiteboard.updated_at: datetime.now()})
+        )
+
+    @staticmethod
+    async def _rebalance(collection, query: Dict[str, Any], ordered_ids: Optional[List[str]] = None) -> Dict[str, str]:
+        if ordered_ids is None:
+            docs = await collection.find(query, {"_id": 1}).sort([("order", 1), ("created_at", 1), ("_id", 1)]).to_list(None)
+            ordered_ids = [doc["_id"] for doc in docs]
+        keys = dict(zip(ordered_ids, rank.spread(len(ordered_ids))))
+        if keys:
+            now = datetime.now()  # Incremental backups pick documents by updated_at
+            await collection.bulk_write(
+                [UpdateOne({"_id": doc_id}, {"$set": {"order": key, "updated_at": now}}) for doc_id, key in keys.items()],
+                ordered=False
+            )
+        return keys
+
+    @staticmethod
+    async def rebalance_whiteboards(folder_id: Optional[str], ordered_ids: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Re-issue short, evenly spaced rank keys to the whiteboards of a folder (None = root),
+        in `ordered_ids` order or their current order. For keys grown too long or duplicated.
+        Returns whiteboard id -> new key.
+        """
+        return await BoardService._rebalance(Whiteboard.get_pymongo_collection(), {"folder_id": folder_id}, ordered_ids)
+
+    @staticmethod
+    async def rebalance_folders(ordered_ids: Optional[List[str]] = None) -> Dict[str, str]:
+        """rebalance_whiteboards() for the folder list"""
+        return await BoardService._rebalance(Folder.get_pymongo_collection(), {}, ordered_ids)
+
     @staticmethod
     async def save_whiteboard(whiteboard: Whiteboard) -> Whiteboard:
         await whiteboard.save()
@@ -37,8 +104,121 @@ class BoardService:
         return await CanvasEdge.find(CanvasEdge.whiteboard_id == whiteboard_id).to_list()
 
     @staticmethod
-    async def save_node(node: CanvasNode) -> CanvasNode:
-        await node.save()
+    async def find_node_views(*criteria, trusted: bool = True) -> List[CanvasNodeView]:
+        """
+        Lean read path for rendering: only CanvasNodeView fields leave the database.
+        trusted=True (documents written by this app) skips Pydantic validation entirely;
+        trusted=False goes through Beanie's validated projection.
+        """
+        query = CanvasNode.find(*criteria)
+        if not trusted:
+            return await query.project(CanvasNodeView).to_list()
+        cursor = CanvasNode.get_pymongo_collection().find(
+            query.get_filter_query(), CanvasNodeView.mongo_projection()
+        )
+        return [CanvasNodeView.from_trusted(doc) async for doc in cursor]
+
+    @staticmethod
+    async def get_node_views(whiteboard_id: str, trusted: bool = True) -> List[CanvasNodeView]:
+        """Every node of a board, library card projections showing the card's current content"""
+        nodes = await BoardService.find_node_views(CanvasNode.whiteboard_id == whiteboard_id, trusted=trusted)
+        await LibraryService.resolve(nodes)
+        return nodes
+
+    @staticmethod
+    async def count_nodes(whiteboard_id: str) -> int:
+        return await CanvasNode.find(CanvasNode.whiteboard_id == whiteboard_id).count()
+
+    @staticmethod
+    async def count_exportable_nodes(whiteboard_id: str) -> int:
+        return await CanvasNode.find(
+            CanvasNode.whiteboard_id == whiteboard_id, CanvasNode.exclude_from_export != True
+        ).count()
+
+    @staticmethod
+    async def get_nodes_in_rect(whiteboard_id: str, x: float, y: float, width: float, height: float) -> List[CanvasNodeView]:
+        """Nodes whose rectangle intersects the given world-space rectangle"""
+        return await BoardService.find_node_views(
+            CanvasNode.whiteboard_id == whiteboard_id,
+            CanvasNode.x < x + width,
+            CanvasNode.y < y + height,
+            {"$expr": {"$and": [
+                {"$gt": [{"$add": ["$x", "$width"]}, x]},
+                {"$gt": [{"$add": ["$y", "$height"]}, y]}
+            ]}}
+        )
+
+    @staticmethod
+    async def get_edges_for_nodes(whiteboard_id: str, node_ids: List[str]) -> List[CanvasEdge]:
+        """Edges with at least one endpoint in node_ids"""
+        if not node_ids:
+            return []
+        return await CanvasEdge.find(
+            CanvasEdge.whiteboard_id == whiteboard_id,
+            Or(
+                In(CanvasEdge.fromNode, node_ids),
+                In(CanvasEdge.toNode, node_ids)
+            )
+        ).to_list()
+
+    @staticmethod
+    async def get_region(
+        whiteboard_id: str, x: float, y: float, width: float, height: float,
+        loaded_node_ids: Iterable[str] = (), loaded_edge_ids: Iterable[str] = ()
+    ) -> Tuple[List[CanvasNodeView], List[CanvasEdge]]:
+        """
+        Everything the canvas needs to draw a rectangle of the board that is not loaded yet.
+        
+        - nodes intersecting the rectangle
+        - their parent groups and every child of a returned group, so a loaded group
+          always has all of its members loaded and group moves stay consistent
+        - edges touching the new nodes whose other endpoint is (or now becomes) loaded;
+          the rest are picked up when their far endpoint streams in
+        
+        Costs at most three queries regardless of board size (plus one for the content of
+        library card projections, if any).
+        """
+        loaded_nodes = set(loaded_node_ids)
+        loaded_edges = set(loaded_edge_ids)
+        
+        found: Dict[str, CanvasNodeView] = {
+            n.id: n for n in await BoardService.get_nodes_in_rect(whiteboard_id, x, y, width, height)
+            if n.id not in loaded_nodes
+        }
+        
+        parent_ids = list({n.parent_id for n in found.values() if n.parent_id} - loaded_nodes)
+        group_ids = [n.id for n in found.values() if n.type == 'group'] + parent_ids
+        if group_ids:
+            related = await BoardService.find_node_views(
+                CanvasNode.whiteboard_id == whiteboard_id,
+                Or(
+                    In(CanvasNode.parent_id, group_ids),
+                    In(CanvasNode.id, parent_ids)
+                )
+            )
+            for node in related:
+                if node.id not in loaded_nodes:
+                    found.setdefault(node.id, node)
+        
+        await LibraryService.resolve(found.values())
+        drawable = loaded_nodes | found.keys()
+        edges = [
+            e for e in await BoardService.get_edges_for_nodes(whiteboard_id, list(found.keys()))
+            if e.id not in loaded_edges and e.fromNode in drawable and e.toNode in drawable
+        ]
+        
+        return list(found.values()), edges
+
+    @staticmethod
+    async def save_node(node: AnyNode) -> AnyNode:
+        if isinstance(node, CanvasNodeView):
+            node.refresh_derived()
+            await CanvasNode.find_one(CanvasNode.id == node.id).update(
+                Set({**node.changes(), CanvasNode.updated_at: datetime.now()})
+            )
+        else:
+            await node.save()
+        SearchService.index_node(node)
         return node
 
     @staticmethod
@@ -46,30 +226,107 @@ class BoardService:
         await edge.save()
         return edge
 
+    @staticmethod
+    async def save_nodes_bulk(nodes: List[AnyNode]) -> List[AnyNode]:
+        """Upsert many nodes (views: $set of their fields) with a single unordered bulk_write"""
+        if not nodes:
+            return nodes
+        now = datetime.now()
+        async with BulkWriter(ordered=False, object_class=CanvasNode) as bulk_writer:
+            for node in nodes:
+                if isinstance(node, CanvasNodeView):
+                    node.refresh_derived()
+                    await CanvasNode.find_one(CanvasNode.id == node.id).update(
+                        Set({**node.changes(), CanvasNode.updated_at: now}),
+                        bulk_writer=bulk_writer
+                    )
+                else:
+                    await node.save(bulk_writer=bulk_writer)
+        SearchService.index_nodes(nodes)
+        return nodes
+
+    @staticmethod
+    async def insert_nodes_bulk(nodes: List[CanvasNode]) -> List[CanvasNode]:
+        """Insert brand new nodes with a single unordered insert_many"""
+        if nodes:
+            # insert_many bypasses save(), keep the derived fields in sync here
+            for node in nodes:
+                node.refresh_derived()
+            await CanvasNode.insert_many(nodes, ordered=False)
+            SearchService.index_nodes(nodes)
+        return nodes
+
+    @staticmethod
+    async def insert_edges_bulk(edges: List[CanvasEdge]) -> List[CanvasEdge]:
+        """Insert brand new edges with a single unordered insert_many"""
+        if edges:
+            await CanvasEdge.insert_many(edges, ordered=False)
+        return edges
+
+    @staticmethod
+    async def update_geometry_bulk(nodes: List[AnyNode]) -> int:
+        """
+        Persist x/y/width/height of the given nodes in one unordered bulk_write.
+        Partial updates without upsert, so deleted nodes are never recreated.
+        """
+        if not nodes:
+            return 0
+        now = datetime.now()
+        async with BulkWriter(ordered=False, object_class=CanvasNode) as bulk_writer:
+            for node in nodes:
+                await CanvasNode.find_one(CanvasNode.id == node.id).update(
+                    Set({
+                        CanvasNode.x: node.x, CanvasNode.y: node.y,
+                        CanvasNode.width: node.width, CanvasNode.height: node.height,
+                        CanvasNode.updated_at: now
+                    }),
+                    bulk_writer=bulk_writer
+                )
+        return len(nodes)
+
+    @staticmethod
+    async def update_viewport(whiteboard: Whiteboard) -> None:
+        """Persist only the viewport of a whiteboard"""
+        whiteboard.updated_at = datetime.now()
+        await Whiteboard.find_one(Whiteboard.id == whiteboard.id).update(
+            Set({Whiteboard.viewport: whiteboard.viewport, Whiteboard.updated_at: whiteboard.updated_at})
+        )
+
     @staticmethod
     async def delete_nodes_and_edges(node_ids: List[str], whiteboard_id: str) -> Dict[str, int]:
-        deleted_nodes = 0
-        deleted_edges = 0
+        """
+        Delete the given nodes and every edge touching them.
+        Set-based: one delete_many for nodes and one for edges, regardless of selection size.
+        """
+        if not node_ids:
+            return {"nodes": 0, "edges": 0}
+        node_ids = list(set(node_ids))
         
-        for node_id in node_ids:
-            node = await CanvasNode.find_one(CanvasNode.id == node_id)
-            if node:
-                await node.delete()
-                deleted_nodes += 1
-            
-            edges = await CanvasEdge.find(
-                CanvasEdge.whiteboard_id == whiteboard_id,
-                Or(
-                    CanvasEdge.fromNode == node_id,
-                    CanvasEdge.toNode == node_id
-                )
-            ).to_list()
-            
-            for edge in edges:
-                await edge.delete()
-                deleted_edges += 1
-                
-        return {"nodes": deleted_nodes, "edges": deleted_edges}
+        node_result = await CanvasNode.find(In(CanvasNode.id, node_ids)).delete()
+        SearchService.remove_nodes(node_ids)
+        edge_result = await CanvasEdge.find(
+            CanvasEdge.whiteboard_id == whiteboard_id,
+            Or(
+                In(CanvasEdge.fromNode, node_ids),
+                In(CanvasEdge.toNode, node_ids)
+            )
+        ).delete()
+        
+        return {
+            "nodes": node_result.deleted_count if node_result else 0,
+            "edges": edge_result.deleted_count if edge_result else 0
+        }
+
+    @staticmethod
+    async def delete_edges(edge_ids: List[str], whiteboard_id: str) -> int:
+        """Delete many edges of a whiteboard with one delete_many. Returns the deleted count."""
+        if not edge_ids:
+            return 0
+        result = await CanvasEdge.find(
+            In(CanvasEdge.id, list(set(edge_ids))),
+            CanvasEdge.whiteboard_id == whiteboard_id
+        ).delete()
+        return result.deleted_count if result else 0
 
     @staticmethod
     async def delete_edge(edge_id: str, whiteboard_id: str) -> bool:
@@ -102,6 +359,7 @@ class BoardService:
                     "file": n.file,
                     "url": n.url,
                     "color": n.color,
+                    "title": n.title,
                     "exclude_from_export": n.exclude_from_export if hasattr(n, 'exclude_from_export') else False
                 }
                 for n in nodes
@@ -120,15 +378,31 @@ class BoardService:
             ]
         }
 
+    @staticmethod
+    async def get_linear_export_data(whiteboard: Whiteboard) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Nodes and edges for the linear export: excluded cards and edges touching them left out"""
+        data = await BoardService.export_to_json_canvas(whiteboard)
+        nodes = [n for n in data['nodes'] if not n.get('exclude_from_export', False)]
+        included_ids = {n['id'] for n in nodes}
+        # Both source and target must be included
+        edges = [
+            e for e in data['edges']
+            if e['fromNode'] in included_ids and e['toNode'] in included_ids
+        ]
+        return nodes, edges
+
     @staticmethod
     async def import_from_json_canvas(whiteboard: Whiteboard, data: Dict[str, Any]):
         # Clear existing
         await CanvasNode.find(CanvasNode.whiteboard_id == whiteboard.id).delete()
         await CanvasEdge.find(CanvasEdge.whiteboard_id == whiteboard.id).delete()
+        SearchService.remove_board(whiteboard.id)
+        TagFacetService.invalidate(whiteboard.id)
         
         for node_data in data.get("nodes", []):
             node = CanvasNode(**node_data, whiteboard_id=whiteboard.id)
             await node.save()
+            SearchService.index_node(node)
             
         for edge_data in data.get("edges", []):
             edge = CanvasEdge(**edge_data, whiteboard_id=whiteboard.id)
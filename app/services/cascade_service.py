@@ -0,0 +1,190 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.models.canvas_edge import CanvasEdge
+from app.models.canvas_node import CanvasNode
+from app.models.folder import Folder
+from app.models.whiteboard import Whiteboard
+from app.services.search_service import SearchService
+from app.services.tag_facet_service import TagFacetService
+
+# Called with the final status of a background job
+JobCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class CascadeService:
+    """
+    Set-based deletes of whiteboards and folders with everything that hangs off them.
+
+    Deleting a board removes its nodes and edges, and optionally its sub-board subtree:
+    boards whose parent_id points at it and boards linked from its cards' sub_whiteboard_id,
+    recursively. The subtree is collected level by level (two queries per level), then
+    deleted with a fixed number of update_many/delete_many calls regardless of its size.
+
+    The board documents go first, so the sidebar and links update right away. When the
+    content to remove exceeds BACKGROUND_NODES, nodes and edges are deleted afterwards by a
+    background job, board by board (status: job(), GET /api/cascade/jobs/{id}). Finished
+    jobs are kept for JOB_RETENTION seconds. Content left behind by an interrupted job, or
+    by deletes from before this service existed, is removed by purge_orphans().
+    """
+    BACKGROUND_NODES = int(os.getenv("CASCADE_BACKGROUND_NODES", "20000"))
+    JOB_RETENTION = float(os.getenv("CASCADE_JOB_RETENTION", "3600"))
+
+    # job id -> status dict (state: running | done | failed) of background jobs
+    _jobs: Dict[str, Dict[str, Any]] = {}
+    _tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    async def collect_subtree(whiteboard_id: str) -> List[str]:
+        """The board and every board below it (parent_id / sub_whiteboard_id links), root first"""
+        boards = Whiteboard.get_pymongo_collection()
+        nodes = CanvasNode.get_pymongo_collection()
+        found = [whiteboard_id]
+        seen = {whiteboard_id}
+        frontier = [whiteboard_id]
+        while frontier:
+            children = {doc["_id"] async for doc in boards.find({"parent_id": {"$in": frontier}}, {"_id": 1})}
+            children.update(await nodes.distinct(
+                "sub_whiteboard_id", {"whiteboard_id": {"$in": frontier}, "sub_whiteboard_id": {"$ne": None}}
+            ))
+            frontier = [board_id for board_id in children if board_id and board_id not in seen]
+            seen.update(frontier)
+            found.extend(frontier)
+        return found
+
+    @staticmethod
+    async def count_content(whiteboard_ids: List[str]) -> int:
+        return await CanvasNode.get_pymongo_collection().count_documents({"whiteboard_id": {"$in": whiteboard_ids}})
+
+    @staticmethod
+    async def delete_whiteboard(whiteboard_id: str, include_subtree: bool = False,
+                                background: Optional[bool] = None,
+                                on_done: Optional[JobCallback] = None) -> Dict[str, Any]:
+        """
+        Delete a board (and optionally its subtree) with its nodes and edges.
+        `background` forces or prevents a background job for the content; by default one is
+        used above BACKGROUND_NODES nodes. A background job calls `on_done` with its final
+        status. Returns the status dict (see job()).
+        """
+        ids = await CascadeService.collect_subtree(whiteboard_id) if include_subtree else [whiteboard_id]
+        if background is None:
+            background = await CascadeService.count_content(ids) > CascadeService.BACKGROUND_NODES
+
+        status = {
+            "id": str(uuid.uuid4()), "state": "running", "whiteboard_ids": ids,
+            "boards": 0, "nodes": 0, "edges": 0, "error": None,
+            "started_at": datetime.now(), "finished_at": None,
+        }
+        status["boards"] = await CascadeService._delete_boards(ids)
+        if not background:
+            await CascadeService._delete_content(ids, status)
+            status["state"] = "done"
+            status["finished_at"] = datetime.now()
+            return status
+
+        CascadeService._prune_jobs()
+        CascadeService._jobs[status["id"]] = status
+        task = asyncio.create_task(CascadeService._run_job(ids, status, on_done))
+        CascadeService._tasks.add(task)
+        task.add_done_callback(CascadeService._tasks.discard)
+        return status
+
+    @staticmethod
+    def job(job_id: str) -> Optional[Dict[str, Any]]:
+        CascadeService._prune_jobs()
+        return CascadeService._jobs.get(job_id)
+
+    @staticmethod
+    def _prune_jobs() -> None:
+        now = datetime.now()
+        for job_id, status in list(CascadeService._jobs.items()):
+            finished_at = status["finished_at"]
+            if finished_at is not None and (now - finished_at).total_seconds() > CascadeService.JOB_RETENTION:
+                del CascadeService._jobs[job_id]
+
+    @staticmethod
+    async def _run_job(ids: List[str], status: Dict[str, Any], on_done: Optional[JobCallback] = None) -> None:
+        try:
+            # One board at a time, so other requests get the database in between
+            for board_id in ids:
+                await CascadeService._delete_content([board_id], status)
+            status["state"] = "done"
+        except Exception as e:
+            status["state"] = "failed"
+            status["error"] = str(e)
+            print(f"Cascade delete of {ids[0]} failed: {e}")
+        status["finished_at"] = datetime.now()
+        if on_done is not None:
+            try:
+                await on_done(status)
+            except Exception as e:
+                print(f"Cascade job callback failed: {e}")
+
+    @staticmethod
+    async def _delete_boards(ids: List[str]) -> int:
+        """Board documents, links into them, and the in-memory indexes (fixed number of queries)"""
+        result = await Whiteboard.get_pymongo_collection().delete_many({"_id": {"$in": ids}})
+        # Surviving boards and cards that pointed at a deleted board (updated_at: picked up
+        # by incremental backups, which would otherwise restore the dangling links)
+        now = datetime.now()
+        await Whiteboard.get_pymongo_collection().update_many(
+            {"parent_id": {"$in": ids}}, {"$set": {"parent_id": None, "updated_at": now}}
+        )
+        await CanvasNode.get_pymongo_collection().update_many(
+            {"sub_whiteboard_id": {"$in": ids}}, {"$set": {"sub_whiteboard_id": None, "updated_at": now}}
+        )
+        SearchService.remove_boards(ids)
+        for board_id in ids:
+            TagFacetService.invalidate(board_id)
+        return result.deleted_count
+
+    @staticmethod
+    async def _delete_content(ids: List[str], status: Dict[str, Any]) -> None:
+        nodes = await CanvasNode.get_pymongo_collection().delete_many({"whiteboard_id": {"$in": ids}})
+        edges = await CanvasEdge.get_pymongo_collection().delete_many({"whiteboard_id": {"$in": ids}})
+        status["nodes"] += nodes.deleted_count
+        status["edges"] += edges.deleted_count
+
+    @staticmethod
+    async def delete_folder(folder_id: str, delete_whiteboards: bool = False) -> Dict[str, Any]:
+        """
+        Delete a folder. Its boards move to the root list (one update_many), or are deleted
+        with their content when `delete_whiteboards` is set.
+        """
+        boards = Whiteboard.get_pymongo_collection()
+        status = {"boards": 0, "moved": 0, "nodes": 0, "edges": 0}
+        if delete_whiteboards:
+            ids = await boards.distinct("_id", {"folder_id": folder_id})
+            if ids:
+                status["boards"] = await CascadeService._delete_boards(ids)
+                await CascadeService._delete_content(ids, status)
+        else:
+            result = await boards.update_many(
+                {"folder_id": folder_id}, {"$set": {"folder_id": None, "updated_at": datetime.now()}}
+            )
+            status["moved"] = result.modified_count
+        await Folder.get_pymongo_collection().delete_one({"_id": folder_id})
+        return status
+
+    @staticmethod
+    async def purge_orphans(dry_run: bool = False) -> Dict[str, int]:
+        """Delete nodes and edges whose board no longer exists"""
+        nodes = CanvasNode.get_pymongo_collection()
+        edges = CanvasEdge.get_pymongo_collection()
+        referenced = {
+            board_id for board_id in [*await nodes.distinct("whiteboard_id"), *await edges.distinct("whiteboard_id")]
+            if board_id
+        }
+        existing = set(await Whiteboard.get_pymongo_collection().distinct("_id", {"_id": {"$in": list(referenced)}}))
+        missing = [board_id for board_id in referenced if board_id not in existing]
+        if dry_run or not missing:
+            return {
+                "boards": len(missing),
+                "nodes": await nodes.count_documents({"whiteboard_id": {"$in": missing}}) if missing else 0,
+                "edges": await edges.count_documents({"whiteboard_id": {"$in": missing}}) if missing else 0,
+            }
+        status = {"boards": len(missing), "nodes": 0, "edges": 0}
+        await CascadeService._delete_content(missing, status)
+        return status
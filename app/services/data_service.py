@@ -1,128 +1,617 @@
 import os
+import io
 import shutil
 import json
 import zipfile
 import tempfile
 import asyncio
-from typing import List, Dict, Any
+import itertools
+import uuid
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
 
+from beanie.odm.utils.dump import get_dict
+from pymongo import IndexModel, ReplaceOne
+
 from app.models.whiteboard import Whiteboard
 from app.models.folder import Folder
 from app.models.canvas_node import CanvasNode
 from app.models.canvas_edge import CanvasEdge
 from app.models.card_library import LibraryCard
+from app.models.stored_file import StoredFile
+from app.utils.json_stream import iter_object_arrays
+
+# Archive collection name -> model (same keys as the legacy database.json)
+BACKUP_COLLECTIONS = {
+    "whiteboards": Whiteboard,
+    "folders": Folder,
+    "nodes": CanvasNode,
+    "edges": CanvasEdge,
+    "library_cards": LibraryCard,
+    "stored_files": StoredFile,
+}
+
+# progress(stage, done, total): stage is a collection name or "uploads", total may be None
+ProgressCallback = Callable[[str, int, Optional[int]], Any]
+
+# Already compressed media is stored as-is instead of being deflated again
+_STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.zip', '.gz', '.mp4', '.mp3', '.pdf'}
+
+def _json_default(obj):
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+class _QueueSink(io.RawIOBase):
+    """
+    Write-only, unseekable file object that hands every chunk to an asyncio queue.
+    Written to from a worker thread; blocks while the queue is full (backpressure).
+    """
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self._queue = queue
+        self._loop = loop
+        self.aborted = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.aborted:
+            raise BrokenPipeError("Backup download was aborted")
+        if data:
+            asyncio.run_coroutine_threadsafe(self._queue.put(bytes(data)), self._loop).result()
+        return len(data)
+
+    def abort(self) -> None:
+        """Make further writes fail, so the export unwinds instead of blocking on the queue"""
+        self.aborted = True
+
+class _IdManifestDiff:
+    """
+    Fed the sorted ids (or upload paths) currently present, writes them to the new state
+    file and, merged against the previous sorted list, emits the ones that disappeared
+    since the previous backup into `deleted` (a binary zip entry). Streams both lists.
+    """
+    def __init__(self, new_path: str, previous_path: Optional[str] = None, deleted=None):
+        self._new = open(new_path, 'w', encoding='utf-8')
+        self._prev = open(previous_path, 'r', encoding='utf-8') \
+            if previous_path and os.path.exists(previous_path) else None
+        self._deleted = deleted
+        self._next_prev = self._read_previous()
+        self.deleted_count = 0
+
+    def _read_previous(self) -> Optional[str]:
+        if self._prev is None:
+            return None
+        line = self._prev.readline()
+        return line.rstrip('\n') if line else None
+
+    def feed(self, ids: Iterable[str]) -> None:
+        gone = []
+        lines = []
+        for item_id in ids:
+            lines.append(item_id)
+            while self._next_prev is not None and self._next_prev < item_id:
+                gone.append(self._next_prev)
+                self._next_prev = self._read_previous()
+            if self._next_prev == item_id:
+                self._next_prev = self._read_previous()
+        if lines:
+            self._new.write('\n'.join(lines) + '\n')
+        self._emit(gone)
+
+    def finish(self) -> int:
+        gone = []
+        while self._next_prev is not None:
+            gone.append(self._next_prev)
+            self._next_prev = self._read_previous()
+        self._emit(gone)
+        self._new.close()
+        if self._prev is not None:
+            self._prev.close()
+        return self.deleted_count
+
+    def _emit(self, gone: List[str]) -> None:
+        if gone and self._deleted is not None:
+            self._deleted.write(('\n'.join(gone) + '\n').encode('utf-8'))
+            self.deleted_count += len(gone)
+
+def _reset_dir(path: str) -> None:
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+def _replace_dir(new: str, target: str) -> None:
+    """Move `new` to `target`, replacing it (near-atomic: two renames)"""
+    old = target + '.old'
+    if os.path.exists(old):
+        shutil.rmtree(old)
+    if os.path.exists(target):
+        os.rename(target, old)
+    os.rename(new, target)
+    shutil.rmtree(old, ignore_errors=True)
 
 class DataService:
     """Service for exporting and importing all application data"""
     
     STATIC_UPLOADS_DIR = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
+    BACKUP_FORMAT_VERSION = "2.0"
+    # Documents per cursor batch / per write handed to the worker thread
+    EXPORT_BATCH_SIZE = int(os.getenv("BACKUP_BATCH_SIZE", "1000"))
+    IMPORT_BATCH_SIZE = int(os.getenv("RESTORE_BATCH_SIZE", "1000"))
+    STAGING_SUFFIX = "__restore"
+    STREAM_CHUNK_SIZE = 1024 * 1024
+    STREAM_QUEUE_CHUNKS = 8
+    # Watermark and id manifests of the last backup, the base of the next incremental one
+    BACKUP_STATE_DIR = os.getenv("BACKUP_STATE_DIR", os.path.join(os.getcwd(), 'data', 'backup_state'))
+    _backup_lock = asyncio.Lock()
     
     @staticmethod
-    async def export_all_data() -> str:
+    def backup_filename(incremental: bool = False) -> str:
+        kind = "incremental_" if incremental else ""
+        return f"telescope_backup_{kind}{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+    @staticmethod
+    def load_backup_state() -> Optional[Dict[str, Any]]:
+        """State of the last completed backup (backup_id, watermark), None if there is none"""
+        path = os.path.join(DataService.BACKUP_STATE_DIR, 'state.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def reset_backup_state() -> None:
+        """Forget the last backup, so the next incremental backup is written as a full one"""
+        shutil.rmtree(DataService.BACKUP_STATE_DIR, ignore_errors=True)
+
+    @staticmethod
+    async def write_backup(fileobj, incremental: bool = False) -> Dict[str, Any]:
         """
-        Exports all DB collections and static uploads to a zip file.
-        Returns the path to the zip file.
+        Writes a backup archive to a binary file object, which may be unseekable:
+            db/<collection>.ndjson   one JSON document per line, read from a Mongo cursor
+            uploads/...              upload files, read straight from disk
+            deleted/<name>.ids       (incremental) ids / upload paths removed since the base
+            manifest.json            kind, backup ids, watermark and counts
+        Memory stays bounded by EXPORT_BATCH_SIZE documents. All zip I/O and compression runs
+        in worker threads, the event loop only drives the cursors.
+
+        incremental=True only exports documents whose updated_at is at or after the watermark
+        of the previous backup, and upload files modified since. Deletions are found by diffing
+        the sorted id lists against those recorded with the previous backup. Without a previous
+        backup a full one is written. Once the archive is complete its watermark and id lists
+        become the base of the next incremental backup. Returns the manifest.
         """
-        # Create a temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # 1. Export Database Collections
-            data = {
-                "version": "1.0",
+        # One backup at a time: each one reads and then replaces the backup state
+        async with DataService._backup_lock:
+            return await DataService._write_backup(fileobj, incremental)
+
+    @staticmethod
+    async def _write_backup(fileobj, incremental: bool) -> Dict[str, Any]:
+        started_at = datetime.now()
+        previous = DataService.load_backup_state() if incremental else None
+        since = datetime.fromisoformat(previous['watermark']) if previous else None
+        state_dir = DataService.BACKUP_STATE_DIR
+        new_state_dir = state_dir + '.new'
+        previous_dir = state_dir if previous else None
+        await asyncio.to_thread(_reset_dir, new_state_dir)
+
+        zf = await asyncio.to_thread(
+            zipfile.ZipFile, fileobj, 'w', zipfile.ZIP_DEFLATED, strict_timestamps=False
+        )
+        try:
+            counts, deleted = {}, {}
+            for name, model in BACKUP_COLLECTIONS.items():
+                query = {"updated_at": {"$gte": since}} if since else {}
+                counts[name] = await DataService._write_collection(zf, name, model, query)
+                deleted[name] = await DataService._write_id_manifest(zf, name, model, previous_dir, new_state_dir)
+            uploads, deleted['uploads'] = await asyncio.to_thread(
+                DataService._write_uploads, zf, since, previous_dir, new_state_dir
+            )
+
+            manifest = {
+                "version": DataService.BACKUP_FORMAT_VERSION,
+                "format": "ndjson",
+                "kind": "incremental" if previous else "full",
+                "backup_id": str(uuid.uuid4()),
+                "base_id": previous['backup_id'] if previous else None,
+                "since": since.isoformat() if since else None,
+                "watermark": started_at.isoformat(),
                 "timestamp": datetime.now().isoformat(),
-                "whiteboards": [w.dict() for w in await Whiteboard.find_all().to_list()],
-                "folders": [f.dict() for f in await Folder.find_all().to_list()],
-                "nodes": [n.dict() for n in await CanvasNode.find_all().to_list()],
-                "edges": [e.dict() for e in await CanvasEdge.find_all().to_list()],
-                "library_cards": [c.dict() for c in await LibraryCard.find_all().to_list()]
+                "started_at": started_at.isoformat(),
+                "collections": counts,
+                "uploads": uploads,
             }
-            
-            # Serialize UUIDs and IDs to strings
-            def json_serial(obj):
-                if hasattr(obj, 'isoformat'):
-                    return obj.isoformat()
-                return str(obj)
-
-            with open(os.path.join(temp_dir, 'database.json'), 'w', encoding='utf-8') as f:
-                json.dump(data, f, default=json_serial, indent=2)
-            
-            # 2. Copy Uploads
-            temp_uploads = os.path.join(temp_dir, 'uploads')
-            if os.path.exists(DataService.STATIC_UPLOADS_DIR):
-                shutil.copytree(DataService.STATIC_UPLOADS_DIR, temp_uploads)
-            else:
-                os.makedirs(temp_uploads)
-                
-            # 3. Zip it all
-            zip_filename = f"telescope_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-            zip_path = os.path.join(tempfile.gettempdir(), zip_filename)
-            
-            shutil.make_archive(zip_path.replace('.zip', ''), 'zip', temp_dir)
-            
-            return zip_path
-
-    @staticmethod
-    async def import_all_data(zip_file_obj) -> bool:
+            if previous:
+                manifest["deleted"] = deleted
+            await asyncio.to_thread(zf.writestr, 'manifest.json', json.dumps(manifest, indent=2))
+        finally:
+            await asyncio.to_thread(zf.close)
+
+        # The archive is complete: it is now the base for the next incremental backup
+        state = {key: manifest[key] for key in ("backup_id", "kind", "watermark", "timestamp")}
+        await asyncio.to_thread(DataService._commit_backup_state, new_state_dir, state)
+        return manifest
+
+    @staticmethod
+    def _commit_backup_state(new_state_dir: str, state: Dict[str, Any]) -> None:
+        with open(os.path.join(new_state_dir, 'state.json'), 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        _replace_dir(new_state_dir, DataService.BACKUP_STATE_DIR)
+
+    @staticmethod
+    async def _write_collection(zf: zipfile.ZipFile, name: str, model, query: Optional[Dict] = None) -> int:
+        entry = await asyncio.to_thread(zf.open, f'db/{name}.ndjson', 'w', force_zip64=True)
+        count = 0
+        try:
+            batch = []
+            cursor = model.get_pymongo_collection().find(query or {}, batch_size=DataService.EXPORT_BATCH_SIZE)
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= DataService.EXPORT_BATCH_SIZE:
+                    await asyncio.to_thread(DataService._write_lines, entry, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(DataService._write_lines, entry, batch)
+                count += len(batch)
+        finally:
+            await asyncio.to_thread(entry.close)
+        return count
+
+    @staticmethod
+    def _write_lines(entry, docs: List[Dict[str, Any]]) -> None:
+        lines = []
+        for doc in docs:
+            # Same field naming as model.dict() (and the legacy format): "_id" -> "id"
+            doc["id"] = doc.pop("_id")
+            lines.append(json.dumps(doc, default=_json_default, ensure_ascii=False))
+        entry.write(("\n".join(lines) + "\n").encode('utf-8'))
+
+    @staticmethod
+    async def _write_id_manifest(zf: zipfile.ZipFile, name: str, model,
+                                 previous_dir: Optional[str], new_dir: str) -> int:
         """
-        Imports data from a zip file, REPLACING current state.
-        zip_file_obj: file-like object or bytes from upload
+        Record the sorted ids of a collection (read from the _id index only) in the new state;
+        with a previous state, write the ids deleted since into deleted/<name>.ids.
         """
+        entry = await asyncio.to_thread(zf.open, f'deleted/{name}.ids', 'w', force_zip64=True) \
+            if previous_dir else None
+        diff = await asyncio.to_thread(
+            _IdManifestDiff,
+            os.path.join(new_dir, f'{name}.ids'),
+            os.path.join(previous_dir, f'{name}.ids') if previous_dir else None,
+            entry
+        )
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Save uploaded file to temp zip
-                zip_path = os.path.join(temp_dir, 'import.zip')
-                with open(zip_path, 'wb') as f:
-                    f.write(zip_file_obj.read())
-                
-                # Extract
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(temp_dir)
-                
-                # Check for database.json
-                db_path = os.path.join(temp_dir, 'database.json')
-                if not os.path.exists(db_path):
-                    raise Exception("Invalid backup: database.json missing")
-                
-                # 1. Restore Database (Clear then Insert)
-                with open(db_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Clear existing
-                await Whiteboard.delete_all()
-                await Folder.delete_all()
-                await CanvasNode.delete_all()
-                await CanvasEdge.delete_all()
-                await LibraryCard.delete_all()
-                
-                # Insert new (Bulk insert if supported, or loop)
-                # Beanie .insert_many()
-                if data.get('whiteboards'):
-                    await Whiteboard.insert_many([Whiteboard(**d) for d in data['whiteboards']])
-                if data.get('folders'):
-                    await Folder.insert_many([Folder(**d) for d in data['folders']])
-                if data.get('nodes'):
-                    # Some nodes referencing parent_ids that don't exist yet? 
-                    # IDs are preserved, so order shouldn't matter for Mongo/Beanie insert usually.
-                    await CanvasNode.insert_many([CanvasNode(**d) for d in data['nodes']])
-                if data.get('edges'):
-                    await CanvasEdge.insert_many([CanvasEdge(**d) for d in data['edges']])
-                if data.get('library_cards'):
-                    await LibraryCard.insert_many([LibraryCard(**d) for d in data['library_cards']])
-                
-                # 2. Restore Uploads
-                temp_uploads = os.path.join(temp_dir, 'uploads')
-                if os.path.exists(temp_uploads):
-                    # Clear existing uploads
-                    if os.path.exists(DataService.STATIC_UPLOADS_DIR):
-                        shutil.rmtree(DataService.STATIC_UPLOADS_DIR)
-                    # Move new uploads
-                    shutil.move(temp_uploads, DataService.STATIC_UPLOADS_DIR)
-                else:
-                    # If backup has no uploads, ensure dir exists empty
-                    if not os.path.exists(DataService.STATIC_UPLOADS_DIR):
-                        os.makedirs(DataService.STATIC_UPLOADS_DIR)
-                        
-            return True
-        except Exception as e:
+            batch = []
+            cursor = model.get_pymongo_collection().find(
+                {}, {"_id": 1}, batch_size=DataService.EXPORT_BATCH_SIZE
+            ).sort("_id", 1)
+            async for doc in cursor:
+                batch.append(doc["_id"])
+                if len(batch) >= DataService.EXPORT_BATCH_SIZE:
+                    await asyncio.to_thread(diff.feed, batch)
+                    batch = []
+            await asyncio.to_thread(diff.feed, batch)
+            return await asyncio.to_thread(diff.finish)
+        finally:
+            if entry is not None:
+                await asyncio.to_thread(entry.close)
+
+    @staticmethod
+    def _write_uploads(zf: zipfile.ZipFile, since: Optional[datetime] = None,
+                       previous_dir: Optional[str] = None, new_dir: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Add upload files, streamed from disk (no staging copy); with `since`, only files
+        modified after it. Records the sorted path list in the new state and, against the
+        previous one, the removed paths. Returns (files added, files deleted).
+        """
+        root = DataService.STATIC_UPLOADS_DIR
+        paths = []
+        if os.path.exists(root):
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    paths.append(os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/'))
+        paths.sort()
+
+        deleted = 0
+        if new_dir is not None:
+            entry = zf.open('deleted/uploads.ids', 'w') if previous_dir else None
+            try:
+                diff = _IdManifestDiff(
+                    os.path.join(new_dir, 'uploads.ids'),
+                    os.path.join(previous_dir, 'uploads.ids') if previous_dir else None,
+                    entry
+                )
+                diff.feed(paths)
+                deleted = diff.finish()
+            finally:
+                if entry is not None:
+                    entry.close()
+
+        threshold = since.timestamp() if since else None
+        count = 0
+        for rel in paths:
+            path = os.path.join(root, rel)
+            if threshold is not None and os.path.getmtime(path) < threshold:
+                continue
+            ext = os.path.splitext(rel)[1].lower()
+            compress = zipfile.ZIP_STORED if ext in _STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            zf.write(path, 'uploads/' + rel, compress_type=compress)
+            count += 1
+        return count, deleted
+
+    @staticmethod
+    async def stream_backup(incremental: bool = False) -> AsyncIterator[bytes]:
+        """
+        Yields a backup archive chunk by chunk while it is being written, for a streamed
+        HTTP download. Nothing is staged on disk; at most STREAM_QUEUE_CHUNKS chunks are buffered.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=DataService.STREAM_QUEUE_CHUNKS)
+        raw = _QueueSink(queue, loop)
+        sink = io.BufferedWriter(raw, buffer_size=DataService.STREAM_CHUNK_SIZE)
+
+        async def produce():
+            try:
+                await DataService.write_backup(sink, incremental)
+                await asyncio.to_thread(sink.flush)
+            finally:
+                if not raw.aborted:
+                    await queue.put(None)
+
+        task = asyncio.create_task(produce())
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+            await task  # surface export errors
+        finally:
+            if not task.done():
+                # Client went away. Not cancelled: the worker thread would keep using the zip
+                # concurrently with the cleanup. Failing its writes lets the export unwind itself.
+                raw.abort()
+                while not queue.empty():
+                    queue.get_nowait()
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    @staticmethod
+    async def export_all_data(incremental: bool = False) -> str:
+        """
+        Exports all DB collections and static uploads to a zip file
+        (only what changed since the previous backup when incremental).
+        Returns the path to the zip file.
+        """
+        zip_path = os.path.join(tempfile.gettempdir(), DataService.backup_filename(incremental))
+        f = await asyncio.to_thread(open, zip_path, 'wb')
+        try:
+            await DataService.write_backup(f, incremental)
+        finally:
+            await asyncio.to_thread(f.close)
+        return zip_path
+
+    @staticmethod
+    async def import_all_data(source, progress: Optional[ProgressCallback] = None,
+                              batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Restores a backup archive, REPLACING current state.
+        source: path of the zip file or a seekable binary file object, or a list of them forming
+        a chain: one full backup plus the incremental backups taken after it (any order).
+
+        Each collection is parsed incrementally (NDJSON, or the legacy database.json through a
+        streaming parser), validated and inserted in batches of `batch_size` into a staging
+        collection; increments are then applied on top (upserts, then their deletions). Only
+        once everything has loaded are the staging collections renamed over the live ones and
+        the uploads directory swapped, so a failed import leaves the current data untouched.
+        progress(stage, done, total) is called after every batch (total may be None).
+        Returns the number of restored documents per collection.
+        """
+        batch_size = batch_size or DataService.IMPORT_BATCH_SIZE
+        report = progress or (lambda stage, done, total: None)
+        staging = {name: DataService._staging_collection(model) for name, model in BACKUP_COLLECTIONS.items()}
+        staged_uploads = DataService.STATIC_UPLOADS_DIR + DataService.STAGING_SUFFIX
+        sources = list(source) if isinstance(source, (list, tuple)) else [source]
+
+        archives = []
+        try:
+            for src in sources:
+                archives.append(await asyncio.to_thread(zipfile.ZipFile, src, 'r'))
+            chain = DataService._order_chain([(zf, DataService._read_manifest(zf)) for zf in archives])
+
+            # 1. Load every collection into staging (live data is not touched yet)
+            for collection in staging.values():
+                await collection.drop()
+            has_uploads = any(DataService._touches_uploads(zf) for zf, _ in chain)
+            if has_uploads:
+                await asyncio.to_thread(_reset_dir, staged_uploads)
+
+            for position, (zf, manifest) in enumerate(chain):
+                totals = manifest.get('collections', {})
+                done = {name: 0 for name in BACKUP_COLLECTIONS}
+                batches = DataService._read_backup(zf, batch_size)
+                while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+                    name, docs = batch
+                    if position == 0:
+                        await staging[name].insert_many(docs, ordered=False)
+                    else:
+                        await staging[name].bulk_write(
+                            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False
+                        )
+                    done[name] += len(docs)
+                    report(name, done[name], totals.get(name))
+
+                if position > 0:
+                    for name in BACKUP_COLLECTIONS:
+                        ids = DataService._read_deleted(zf, name, batch_size)
+                        while (batch := await asyncio.to_thread(next, ids, None)) is not None:
+                            await staging[name].delete_many({"_id": {"$in": batch}})
+
+                if has_uploads:
+                    uploads = await asyncio.to_thread(DataService._extract_uploads, zf, staged_uploads)
+                    report('uploads', uploads, manifest.get('uploads'))
+                    if position > 0:
+                        await asyncio.to_thread(DataService._remove_deleted_uploads, zf, staged_uploads)
+
+            # 2. Swap staging in
+            counts = {name: await staging[name].count_documents({}) for name in BACKUP_COLLECTIONS}
+            for name, model in BACKUP_COLLECTIONS.items():
+                await DataService._swap_collection(model, staging[name], counts[name])
+            if has_uploads:
+                await asyncio.to_thread(_replace_dir, staged_uploads, DataService.STATIC_UPLOADS_DIR)
+            elif not os.path.exists(DataService.STATIC_UPLOADS_DIR):
+                os.makedirs(DataService.STATIC_UPLOADS_DIR)
+            # Restored documents keep their updated_at, so the watermark and id lists of the
+            # last backup no longer describe the data: the next incremental one is a full one
+            async with DataService._backup_lock:
+                await asyncio.to_thread(DataService.reset_backup_state)
+        except BaseException as e:
             print(f"Import Failed: {e}")
-            raise e
+            for collection in staging.values():
+                await collection.drop()
+            await asyncio.to_thread(shutil.rmtree, staged_uploads, True)
+            raise
+        finally:
+            for zf in archives:
+                await asyncio.to_thread(zf.close)
+        return counts
+
+    @staticmethod
+    def _read_manifest(zf: zipfile.ZipFile) -> Dict[str, Any]:
+        try:
+            return json.loads(zf.read('manifest.json'))
+        except KeyError:
+            return {}  # legacy backup: always a full one
+
+    @staticmethod
+    def _order_chain(archives: List[Tuple[zipfile.ZipFile, Dict[str, Any]]]):
+        """Full backup first, then each increment after the backup it was taken against"""
+        bases = [item for item in archives if item[1].get('kind') != 'incremental']
+        if len(bases) != 1:
+            raise ValueError("A restore needs exactly one full backup (plus its incremental backups)")
+        chain = bases
+        pending = {item[1].get('base_id'): item for item in archives if item[1].get('kind') == 'incremental'}
+        while pending:
+            following = pending.pop(chain[-1][1].get('backup_id'), None)
+            if following is None:
+                raise ValueError("Incremental backups do not form a chain starting at the full backup")
+            chain.append(following)
+        return chain
+
+    @staticmethod
+    def _touches_uploads(zf: zipfile.ZipFile) -> bool:
+        for info in zf.infolist():
+            if info.filename.startswith('uploads/') or (info.filename == 'deleted/uploads.ids' and info.file_size):
+                return True
+        return False
+
+    @staticmethod
+    def _read_deleted(zf: zipfile.ZipFile, name: str, batch_size: int) -> Iterator[List[str]]:
+        entry = f'deleted/{name}.ids'
+        if entry not in zf.namelist():
+            return
+        with zf.open(entry) as raw:
+            batch = []
+            for line in io.TextIOWrapper(raw, encoding='utf-8'):
+                if line.strip():
+                    batch.append(line.rstrip('\n'))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    @staticmethod
+    def _read_backup(zf: zipfile.ZipFile, batch_size: int) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yields (collection, documents ready for insert_many) batches.
+        Blocking (decompression, parsing, validation): consumed from a worker thread.
+        """
+        names = set(zf.namelist())
+        if any(n.startswith('db/') for n in names):
+            for name, model in BACKUP_COLLECTIONS.items():
+                entry = f'db/{name}.ndjson'
+                if entry not in names:
+                    continue
+                with zf.open(entry) as raw:
+                    lines = io.TextIOWrapper(raw, encoding='utf-8')
+                    docs = (json.loads(line) for line in lines if line.strip())
+                    yield from DataService._batches(name, model, docs, batch_size)
+        elif 'database.json' in names:
+            # Legacy single-document format: stream the arrays instead of json.load-ing it
+            with zf.open('database.json') as raw:
+                items = iter_object_arrays(io.TextIOWrapper(raw, encoding='utf-8'))
+                for name, group in itertools.groupby(items, key=lambda item: item[0]):
+                    model = BACKUP_COLLECTIONS.get(name)
+                    if model is not None:
+                        yield from DataService._batches(name, model, (doc for _, doc in group), batch_size)
+        else:
+            raise ValueError("Invalid backup: database.json missing")
+
+    @staticmethod
+    def _batches(name: str, model, docs: Iterable[Dict[str, Any]], batch_size: int):
+        batch = []
+        for data in docs:
+            batch.append(DataService._to_document(model, data))
+            if len(batch) >= batch_size:
+                yield name, batch
+                batch = []
+        if batch:
+            yield name, batch
+
+    @staticmethod
+    def _to_document(model, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a backed-up document (ISO dates -> datetime etc.) and encode it for Mongo"""
+        return get_dict(model.model_validate(data), to_db=True, keep_nulls=model.get_settings().keep_nulls)
+
+    @staticmethod
+    def _staging_collection(model):
+        live = model.get_pymongo_collection()
+        return live.database[live.name + DataService.STAGING_SUFFIX]
+
+    @staticmethod
+    async def _swap_collection(model, staged, count: int) -> None:
+        """Replace the live collection by the staged one, keeping the live index definitions"""
+        live = model.get_pymongo_collection()
+        if count == 0:
+            await live.delete_many({})
+            return
+        indexes = [
+            IndexModel(spec['key'], name=index_name,
+                       **{k: v for k, v in spec.items() if k not in ('key', 'v', 'ns')})
+            for index_name, spec in (await live.index_information()).items()
+            if index_name != '_id_'
+        ]
+        # Building the indexes after the bulk load is cheaper than maintaining them during it
+        if indexes:
+            await staged.create_indexes(indexes)
+        await staged.rename(live.name, dropTarget=True)
+
+    @staticmethod
+    def _extract_uploads(zf: zipfile.ZipFile, target: str) -> int:
+        count = 0
+        for info in zf.infolist():
+            if not info.filename.startswith('uploads/') or info.is_dir():
+                continue
+            path = DataService._upload_path(target, info.filename[len('uploads/'):])
+            if path is None:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with zf.open(info) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, DataService.STREAM_CHUNK_SIZE)
+            count += 1
+        return count
+
+    @staticmethod
+    def _remove_deleted_uploads(zf: zipfile.ZipFile, target: str) -> None:
+        for batch in DataService._read_deleted(zf, 'uploads', DataService.IMPORT_BATCH_SIZE):
+            for rel in batch:
+                path = DataService._upload_path(target, rel)
+                if path is not None and os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def _upload_path(target: str, rel: str) -> Optional[str]:
+        """Absolute path of an archived upload, None if it would escape the uploads dir"""
+        root = os.path.realpath(target)
+        path = os.path.realpath(os.path.join(target, rel))
+        return path if path.startswith(root + os.sep) else None
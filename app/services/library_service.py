@@ -0,0 +1,120 @@
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from app.models.canvas_node import CanvasNode, CanvasNodeView
+from app.models.card_library import LibraryCard
+from app.services.search_service import SearchService
+from app.services.tag_facet_service import TagFacetService
+
+# Called with (library card id, changed projection fields) for each open board showing it
+ProjectionListener = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+class LibraryService:
+    """
+    Library cards projected onto boards (CanvasNode.library_card_id).
+
+    The LibraryCard is the source of truth for the text and tags of its projections:
+    - resolve() merges the current card content into loaded nodes, with one $in query for
+      every card they reference, so a board never shows stale projections
+    - update_card() saves the card, rewrites every projection with one update_many and
+      pushes the patch to every open board session showing one (see subscribe())
+    """
+    # whiteboard id -> listeners of the sessions that have it open
+    _listeners: Dict[str, Set[ProjectionListener]] = {}
+
+    # Open sessions
+    @staticmethod
+    def subscribe(whiteboard_id: str, listener: ProjectionListener) -> None:
+        LibraryService._listeners.setdefault(whiteboard_id, set()).add(listener)
+
+    @staticmethod
+    def unsubscribe(whiteboard_id: str, listener: ProjectionListener) -> None:
+        listeners = LibraryService._listeners.get(whiteboard_id)
+        if listeners is not None:
+            listeners.discard(listener)
+            if not listeners:
+                del LibraryService._listeners[whiteboard_id]
+
+    # Reading
+    @staticmethod
+    async def get_cards(card_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Content and tags of library cards by id, in one query"""
+        card_ids = list({card_id for card_id in card_ids if card_id})
+        if not card_ids:
+            return {}
+        cursor = LibraryCard.get_pymongo_collection().find({"_id": {"$in": card_ids}}, {"content": 1, "tags": 1})
+        return {doc["_id"]: doc async for doc in cursor}
+
+    @staticmethod
+    async def resolve(nodes: Iterable[Any]) -> int:
+        """Merge library card content into the projections among `nodes`. Returns how many changed."""
+        projections = [n for n in nodes if getattr(n, "library_card_id", None)]
+        cards = await LibraryService.get_cards(n.library_card_id for n in projections)
+        merged = 0
+        for node in projections:
+            card = cards.get(node.library_card_id)
+            if card is None:
+                continue  # Card deleted without its projections: keep the last known content
+            text, tags = card.get("content", ""), list(card.get("tags") or [])
+            if node.text != text or list(node.tags or []) != tags:
+                node.text, node.tags = text, tags
+                node.refresh_derived()
+                merged += 1
+        return merged
+
+    # Writing
+    @staticmethod
+    def projection_fields(card: LibraryCard) -> Dict[str, Any]:
+        """What a projection shows of a card: text, tags and the title/preview derived from them"""
+        probe = CanvasNodeView(id="", type="text", x=0, y=0, width=0, height=0, text=card.content)
+        probe.refresh_derived()
+        return {"text": card.content, "tags": list(card.tags), "title": probe.title, "preview": probe.preview}
+
+    @staticmethod
+    async def update_card(card: LibraryCard, content: Optional[str] = None, tags: Optional[List[str]] = None,
+                          title: Optional[str] = None) -> int:
+        """
+        Save changes to a library card and fan them out to all its projections.
+        Returns the number of projections updated.
+        """
+        if content is not None:
+            card.content = content
+        if tags is not None:
+            card.tags = list(tags)
+        if title is not None:
+            card.title = title
+        await card.save()
+
+        nodes = CanvasNode.get_pymongo_collection()
+        # Board and previous tags of each projection, for the search index and tag facets
+        previous = [
+            doc async for doc in nodes.find({"library_card_id": card.id}, {"whiteboard_id": 1, "tags": 1, "type": 1})
+        ]
+        if not previous:
+            return 0
+        fields = LibraryService.projection_fields(card)
+        await nodes.update_many(
+            {"library_card_id": card.id}, {"$set": {**fields, "updated_at": datetime.now()}}
+        )
+
+        boards: Set[str] = set()
+        for doc in previous:
+            TagFacetService.update_node_tags(doc["whiteboard_id"], doc.get("tags") or [], fields["tags"])
+            boards.add(doc["whiteboard_id"])
+        SearchService.index_nodes(
+            SimpleNamespace(id=doc["_id"], type=doc.get("type", "text"), whiteboard_id=doc["whiteboard_id"], **fields)
+            for doc in previous
+        )
+        await LibraryService.notify(card.id, fields, boards)
+        return len(previous)
+
+    @staticmethod
+    async def notify(card_id: str, fields: Dict[str, Any], whiteboard_ids: Iterable[str]) -> None:
+        """Push changed projection fields to the open sessions of the given boards"""
+        for whiteboard_id in whiteboard_ids:
+            for listener in list(LibraryService._listeners.get(whiteboard_id, ())):
+                try:
+                    await listener(card_id, fields)
+                except Exception as e:
+                    print(f"Projection update for board {whiteboard_id} failed: {e}")
@@ -0,0 +1,175 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.models.canvas_node import CanvasNode
+from app.models.card_library import LibraryCard
+from app.models.whiteboard import Whiteboard
+from app.utils.search_index import SearchIndex
+
+NODE_FIELDS = {"type": 1, "text": 1, "tags": 1, "title": 1, "whiteboard_id": 1}
+LIBRARY_FIELDS = {"title": 1, "content": 1, "tags": 1}
+
+class SearchService:
+    """
+    Full-text search across all boards (card text, titles, tags) and the card library.
+
+    The index lives in memory (see SearchIndex): built from Mongo once at startup, then
+    kept current by BoardService / LibraryCard writes. Changes made while a rebuild is
+    running are replayed on the new index before it replaces the old one.
+    """
+    EXCERPT_LENGTH = 160
+    index = SearchIndex()
+    _ready: Optional[asyncio.Event] = None
+    _rebuild_lock: Optional[asyncio.Lock] = None
+    # Operations recorded while a rebuild is running (None when not rebuilding)
+    _replay: Optional[List] = None
+
+    # Document ids / fields
+    @staticmethod
+    def node_key(node_id: str) -> str:
+        return f"node:{node_id}"
+
+    @staticmethod
+    def library_key(card_id: str) -> str:
+        return f"library:{card_id}"
+
+    @staticmethod
+    def _excerpt(text: Optional[str]) -> str:
+        text = " ".join((text or "").split())
+        limit = SearchService.EXCERPT_LENGTH
+        return text if len(text) <= limit else text[:limit - 1] + "…"
+
+    @staticmethod
+    def _node_entry(doc: Dict[str, Any]):
+        title = doc.get("title") or ("" if doc.get("type") == "text" else doc.get("text")) or ""
+        fields = {"title": title, "text": doc.get("text"), "tags": doc.get("tags") or []}
+        meta = {
+            "kind": "node", "id": doc["id"], "whiteboard_id": doc.get("whiteboard_id"),
+            "type": doc.get("type"), "title": title, "excerpt": SearchService._excerpt(doc.get("text")),
+        }
+        return SearchService.node_key(doc["id"]), fields, meta
+
+    @staticmethod
+    def _library_entry(doc: Dict[str, Any]):
+        fields = {"title": doc.get("title"), "text": doc.get("content"), "tags": doc.get("tags") or []}
+        meta = {
+            "kind": "library", "id": doc["id"], "whiteboard_id": None, "type": "text",
+            "title": doc.get("title") or "", "excerpt": SearchService._excerpt(doc.get("content")),
+        }
+        return SearchService.library_key(doc["id"]), fields, meta
+
+    # Incremental maintenance
+    @staticmethod
+    def _apply(op: str, *args) -> None:
+        if op == "add":
+            SearchService.index.add(*args)
+        else:
+            SearchService.index.remove(*args)
+        if SearchService._replay is not None:
+            SearchService._replay.append((op, args))
+
+    @staticmethod
+    def index_nodes(nodes: Iterable[Any]) -> None:
+        """(Re)index saved nodes; full documents or views (which keep their known board)"""
+        for node in nodes:
+            doc = {name: getattr(node, name, None) for name in ("id", *NODE_FIELDS)}
+            key = SearchService.node_key(node.id)
+            if not doc["whiteboard_id"]:
+                doc["whiteboard_id"] = SearchService.index.meta.get(key, {}).get("whiteboard_id")
+            SearchService._apply("add", *SearchService._node_entry(doc))
+
+    @staticmethod
+    def index_node(node: Any) -> None:
+        SearchService.index_nodes([node])
+
+    @staticmethod
+    def remove_nodes(node_ids: Iterable[str]) -> None:
+        for node_id in node_ids:
+            SearchService._apply("remove", SearchService.node_key(node_id))
+
+    @staticmethod
+    def remove_board(whiteboard_id: str) -> None:
+        SearchService.remove_boards([whiteboard_id])
+
+    @staticmethod
+    def remove_boards(whiteboard_ids: Iterable[str]) -> None:
+        """Drop every card of the given boards (one pass over the index)"""
+        whiteboard_ids = set(whiteboard_ids)
+        keys = [
+            key for key, meta in SearchService.index.meta.items()
+            if meta.get("kind") == "node" and meta.get("whiteboard_id") in whiteboard_ids
+        ]
+        for key in keys:
+            SearchService._apply("remove", key)
+
+    @staticmethod
+    def index_library_card(card: LibraryCard) -> None:
+        SearchService._apply("add", *SearchService._library_entry(
+            {"id": card.id, "title": card.title, "content": card.content, "tags": card.tags}
+        ))
+
+    @staticmethod
+    def remove_library_card(card_id: str) -> None:
+        SearchService._apply("remove", SearchService.library_key(card_id))
+
+    # Building
+    @staticmethod
+    async def rebuild() -> int:
+        """Build a fresh index from the database and swap it in. Returns the document count."""
+        if SearchService._rebuild_lock is None:
+            SearchService._rebuild_lock = asyncio.Lock()
+        if SearchService._ready is None:
+            SearchService._ready = asyncio.Event()
+        async with SearchService._rebuild_lock:
+            fresh = SearchIndex()
+            SearchService._replay = []
+            try:
+                async for doc in CanvasNode.get_pymongo_collection().find({}, NODE_FIELDS):
+                    doc["id"] = doc.pop("_id")
+                    fresh.add(*SearchService._node_entry(doc))
+                async for doc in LibraryCard.get_pymongo_collection().find({}, LIBRARY_FIELDS):
+                    doc["id"] = doc.pop("_id")
+                    fresh.add(*SearchService._library_entry(doc))
+                for op, args in SearchService._replay:
+                    if op == "add":
+                        fresh.add(*args)
+                    else:
+                        fresh.remove(*args)
+                SearchService.index = fresh
+            finally:
+                SearchService._replay = None
+                # Searches stop waiting even if the build failed (they get the previous index)
+                SearchService._ready.set()
+            return len(fresh)
+
+    @staticmethod
+    async def wait_ready() -> None:
+        if SearchService._ready is None:
+            SearchService._ready = asyncio.Event()
+        await SearchService._ready.wait()
+
+    # Querying
+    @staticmethod
+    async def search(query: str, page: int = 1, page_size: int = 20,
+                     whiteboard_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ranked results for a query, one page at a time. Each result carries the board
+        (id and name) to open and the card to jump to.
+        """
+        await SearchService.wait_ready()
+        page, page_size = max(page, 1), max(min(page_size, 100), 1)
+        index = SearchService.index
+        predicate = None
+        if whiteboard_id:
+            predicate = lambda key: index.meta[key].get("whiteboard_id") == whiteboard_id
+        total, hits = index.search(query, offset=(page - 1) * page_size, limit=page_size, predicate=predicate)
+
+        results = [dict(index.meta[key], score=round(score, 4)) for key, score in hits]
+        board_ids = list({r["whiteboard_id"] for r in results if r["whiteboard_id"]})
+        names = {}
+        if board_ids:
+            async for doc in Whiteboard.get_pymongo_collection().find({"_id": {"$in": board_ids}}, {"name": 1}):
+                names[doc["_id"]] = doc.get("name")
+        for result in results:
+            result["whiteboard_name"] = names.get(result["whiteboard_id"])
+        return {"query": query, "page": page, "page_size": page_size, "total": total, "results": results}
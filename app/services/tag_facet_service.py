@@ -0,0 +1,119 @@
+import asyncio
+import os
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models.canvas_node import CanvasNode
+
+class TagFacetService:
+    """
+    Tag facets: tag -> number of cards carrying it, per board and across all boards.
+
+    A facet is computed with one aggregation the first time it is asked for, then kept
+    current by apply() wherever cards gain or lose tags (edit, paste, delete, restore).
+    Changes to whole boards (JSON import, backup restore, board deletion) invalidate().
+    Deltas arriving while a facet is being aggregated mark it stale instead of guessing
+    whether the aggregation saw them; it is recomputed on the next request.
+    """
+    MAX_BOARDS = int(os.getenv("TAG_FACET_MAX_BOARDS", "64"))
+    GLOBAL = None  # Key of the all-boards facet
+
+    _facets: "OrderedDict[Optional[str], Counter]" = OrderedDict()
+    _loading: Dict[Optional[str], asyncio.Future] = {}
+    _stale: Set[Optional[str]] = set()
+
+    @staticmethod
+    def _pipeline(whiteboard_id: Optional[str]) -> List[dict]:
+        match = {"tags.0": {"$exists": True}}
+        if whiteboard_id is not None:
+            match["whiteboard_id"] = whiteboard_id
+        return [
+            {"$match": match},
+            # A tag repeated on one card counts once
+            {"$project": {"_id": 0, "tags": {"$setUnion": ["$tags", []]}}},
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        ]
+
+    @staticmethod
+    async def _aggregate(whiteboard_id: Optional[str]) -> Counter:
+        counts = Counter()
+        async for doc in CanvasNode.get_pymongo_collection().aggregate(TagFacetService._pipeline(whiteboard_id)):
+            counts[doc["_id"]] = doc["count"]
+        return counts
+
+    @staticmethod
+    async def _facet(key: Optional[str]) -> Counter:
+        facets = TagFacetService._facets
+        if key in facets:
+            facets.move_to_end(key)
+            return facets[key]
+
+        future = TagFacetService._loading.get(key)
+        if future is None:
+            future = asyncio.ensure_future(TagFacetService._aggregate(key))
+            TagFacetService._loading[key] = future
+            TagFacetService._stale.discard(key)
+            try:
+                counts = await future
+            finally:
+                TagFacetService._loading.pop(key, None)
+            if key in TagFacetService._stale:
+                TagFacetService._stale.discard(key)
+            else:
+                facets[key] = counts
+                board_keys = [k for k in facets if k is not TagFacetService.GLOBAL]
+                for evicted in board_keys[:max(len(board_keys) - TagFacetService.MAX_BOARDS, 0)]:
+                    del facets[evicted]
+            return counts
+        return await asyncio.shield(future)
+
+    @staticmethod
+    async def board_tags(whiteboard_id: str) -> Dict[str, int]:
+        """Tag -> number of cards on the board carrying it"""
+        return dict(await TagFacetService._facet(whiteboard_id))
+
+    @staticmethod
+    async def global_tags() -> Dict[str, int]:
+        """Tag -> number of cards on any board carrying it"""
+        return dict(await TagFacetService._facet(TagFacetService.GLOBAL))
+
+    @staticmethod
+    def top(counts: Dict[str, int], limit: Optional[int] = None, prefix: str = "") -> List[Tuple[str, int]]:
+        """Most used tags first (ties alphabetical), optionally only those starting with `prefix`"""
+        prefix = prefix.lower()
+        items = [(t, c) for t, c in counts.items() if t.lower().startswith(prefix)] if prefix else counts.items()
+        return sorted(items, key=lambda item: (-item[1], item[0]))[:limit]
+
+    # Incremental maintenance
+    @staticmethod
+    def apply(whiteboard_id: str, removed: Iterable[str] = (), added: Iterable[str] = ()) -> None:
+        """Tags taken off / put on cards of a board (one entry per card)"""
+        removed, added = list(removed), list(added)
+        if not removed and not added:
+            return
+        for key in (whiteboard_id, TagFacetService.GLOBAL):
+            if key in TagFacetService._loading:
+                TagFacetService._stale.add(key)
+            counts = TagFacetService._facets.get(key)
+            if counts is None:
+                continue
+            counts.update(added)
+            counts.subtract(removed)
+            for tag in set(removed):
+                if counts[tag] <= 0:
+                    del counts[tag]
+
+    @staticmethod
+    def update_node_tags(whiteboard_id: str, old_tags: Iterable[str], new_tags: Iterable[str]) -> None:
+        """Facet update for a single card whose tags changed"""
+        old_tags, new_tags = set(old_tags or ()), set(new_tags or ())
+        TagFacetService.apply(whiteboard_id, removed=old_tags - new_tags, added=new_tags - old_tags)
+
+    @staticmethod
+    def invalidate(whiteboard_id: Optional[str] = None) -> None:
+        """Forget a board's facet (and the global one), or every facet when no board is given"""
+        keys = list(TagFacetService._facets) if whiteboard_id is None else [whiteboard_id, TagFacetService.GLOBAL]
+        for key in keys:
+            TagFacetService._facets.pop(key, None)
+        TagFacetService._stale.update(k for k in TagFacetService._loading if whiteboard_id is None or k in keys)
@@ -0,0 +1,161 @@
+import os
+import asyncio
+from typing import Dict, Optional, Set, Tuple
+
+from app.services.upload_service import UploadService
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional: without Pillow the original images are served
+    Image = None
+    ImageOps = None
+
+# EXIF orientations that rotate the image by 90/270 degrees (width and height swap)
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+_EXIF_ORIENTATION = 0x0112
+
+class ThumbnailService:
+    """
+    Downscaled copies of uploaded images for level-of-detail serving.
+
+    Every raster upload gets thumbnails whose longest edge is one of SIZES, generated in a
+    worker thread right after the upload (or on first request for older files). They are
+    derived data and live outside the uploads folder (THUMBNAIL_DIR), so backups skip them.
+    GIFs (animation) and SVGs (vector) are always served as they are.
+    """
+    SIZES = (256, 1024)
+    THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", os.path.join(os.getcwd(), 'data', 'thumbnails'))
+    RASTER_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff'}
+    QUALITY = 82
+
+    # file name -> running generation, so concurrent requests share one
+    _pending: Dict[str, asyncio.Future] = {}
+    # Background generation tasks, referenced until done
+    _tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def available() -> bool:
+        return Image is not None
+
+    @staticmethod
+    def upload_path(file_name: str) -> Optional[str]:
+        """Path of an upload by its bare name (None for anything that could leave the folder)"""
+        if not file_name or file_name != os.path.basename(file_name) or file_name.startswith('.'):
+            return None
+        return os.path.join(UploadService.UPLOAD_DIR, file_name)
+
+    @staticmethod
+    def thumbnail_path(file_name: str, size: int) -> str:
+        return os.path.join(ThumbnailService.THUMBNAIL_DIR, str(size), file_name + '.webp')
+
+    @staticmethod
+    def supports(file_name: str) -> bool:
+        return ThumbnailService.available() and \
+            os.path.splitext(file_name)[1].lower() in ThumbnailService.RASTER_EXTENSIONS
+
+    @staticmethod
+    def pick_size(requested: Optional[int]) -> Optional[int]:
+        """
+        Smallest thumbnail size covering `requested` pixels (longest edge), or None for the
+        original (nothing requested, or more than the largest thumbnail)
+        """
+        if not requested:
+            return None
+        for size in ThumbnailService.SIZES:
+            if size >= requested:
+                return size
+        return None
+
+    # Image inspection / generation (blocking, run in a worker thread)
+    @staticmethod
+    def image_size(path: str) -> Optional[Tuple[int, int]]:
+        """Intrinsic (display) width and height, read from the header only"""
+        if Image is None:
+            return None
+        try:
+            with Image.open(path) as img:
+                width, height = img.size
+                if img.getexif().get(_EXIF_ORIENTATION) in _TRANSPOSED_ORIENTATIONS:
+                    width, height = height, width
+                return width, height
+        except Exception:
+            return None
+
+    @staticmethod
+    def generate(file_name: str) -> int:
+        """Write every missing thumbnail of an upload. Returns how many were written."""
+        path = ThumbnailService.upload_path(file_name)
+        if path is None or not ThumbnailService.supports(file_name) or not os.path.exists(path):
+            return 0
+        missing = [s for s in ThumbnailService.SIZES if not os.path.exists(ThumbnailService.thumbnail_path(file_name, s))]
+        if not missing:
+            return 0
+
+        written = 0
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+            # Largest first, each smaller size is downscaled from the previous one
+            for size in sorted(missing, reverse=True):
+                if max(img.size) <= size:
+                    continue  # Served as the original
+                img = img.copy()
+                img.thumbnail((size, size), Image.LANCZOS)
+                target = ThumbnailService.thumbnail_path(file_name, size)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp = f"{target}.{os.getpid()}.tmp"
+                img.save(tmp, 'WEBP', quality=ThumbnailService.QUALITY)
+                os.replace(tmp, target)
+                written += 1
+        return written
+
+    # Async entry points
+    @staticmethod
+    async def ensure(file_name: str) -> None:
+        """Generate the thumbnails of an upload now (shared with any generation already running)"""
+        future = ThumbnailService._pending.get(file_name)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(ThumbnailService.generate, file_name))
+            ThumbnailService._pending[file_name] = future
+            future.add_done_callback(lambda _: ThumbnailService._pending.pop(file_name, None))
+        await asyncio.shield(future)
+
+    @staticmethod
+    def schedule(file_name: str) -> None:
+        """Generate the thumbnails of a new upload in the background"""
+        if not ThumbnailService.supports(file_name):
+            return
+
+        async def run():
+            try:
+                await ThumbnailService.ensure(file_name)
+            except Exception as e:
+                print(f"Thumbnail generation failed for {file_name}: {e}")
+
+        task = asyncio.create_task(run())
+        ThumbnailService._tasks.add(task)
+        task.add_done_callback(ThumbnailService._tasks.discard)
+
+    @staticmethod
+    async def resolve(file_name: str, requested: Optional[int]) -> Optional[str]:
+        """
+        Path of the file to serve for `requested` pixels (longest edge): a thumbnail when one
+        fits, else the original. None if the upload does not exist.
+        """
+        path = ThumbnailService.upload_path(file_name)
+        if path is None or not await asyncio.to_thread(os.path.isfile, path):
+            return None
+        size = ThumbnailService.pick_size(requested)
+        if size is None or not ThumbnailService.supports(file_name):
+            return path
+
+        thumbnail = ThumbnailService.thumbnail_path(file_name, size)
+        if not await asyncio.to_thread(os.path.exists, thumbnail):
+            try:
+                await ThumbnailService.ensure(file_name)
+            except Exception as e:
+                print(f"Thumbnail generation failed for {file_name}: {e}")
+                return path
+        # Not written when the original is already small enough
+        return thumbnail if await asyncio.to_thread(os.path.exists, thumbnail) else path
@@ -0,0 +1,129 @@
+import os
+import re
+import uuid
+import asyncio
+import hashlib
+from typing import AsyncIterator, BinaryIO, Optional
+from datetime import datetime
+
+from beanie.operators import Inc, Set
+from pymongo.errors import DuplicateKeyError
+
+from app.models.stored_file import StoredFile
+
+# Kept from the client's file name so static serving picks the right content type
+_SAFE_EXTENSION = re.compile(r'^\.[A-Za-z0-9]{1,10}$')
+
+class UploadTooLarge(ValueError):
+    pass
+
+def _write_chunk(f: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    f.write(chunk)
+
+class UploadService:
+    """
+    Content-addressed storage for uploaded files.
+
+    Uploads are streamed in chunks to a temporary file next to the store (writes and
+    hashing run in a worker thread), then moved to <sha256><ext>. Identical content is
+    stored once; every upload is counted in StoredFile (see upload_count).
+    """
+    UPLOAD_DIR = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+    CHUNK_SIZE = 1024 * 1024
+
+    @staticmethod
+    def path(stored: StoredFile) -> str:
+        return os.path.join(UploadService.UPLOAD_DIR, stored.file_name)
+
+    @staticmethod
+    def stored_name(digest: str, original_name: str) -> str:
+        ext = os.path.splitext(original_name or '')[1].lower()
+        return digest + (ext if _SAFE_EXTENSION.match(ext) else '')
+
+    @staticmethod
+    async def store_upload(upload, max_bytes: Optional[int] = None) -> StoredFile:
+        """Store a NiceGUI FileUpload (e.file of an upload event)"""
+        max_bytes = UploadService.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+        # Cheap early rejection, the size is known before reading
+        if upload.size() > max_bytes:
+            raise UploadTooLarge(f"{upload.name} is larger than {max_bytes // (1024 * 1024)} MB")
+        return await UploadService.store_stream(
+            upload.iterate(chunk_size=UploadService.CHUNK_SIZE), upload.name,
+            content_type=upload.content_type, max_bytes=max_bytes
+        )
+
+    @staticmethod
+    async def store_stream(
+        chunks: AsyncIterator[bytes],
+        original_name: str,
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None
+    ) -> StoredFile:
+        """
+        Write the chunks to the store and count the upload.
+        Raises UploadTooLarge (nothing is kept) once more than max_bytes arrive.
+        """
+        max_bytes = UploadService.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+        upload_dir = UploadService.UPLOAD_DIR
+        await asyncio.to_thread(os.makedirs, upload_dir, exist_ok=True)
+
+        tmp_path = os.path.join(upload_dir, f".upload-{uuid.uuid4()}.part")
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            f = await asyncio.to_thread(open, tmp_path, 'wb')
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(f"{original_name} is larger than {max_bytes // (1024 * 1024)} MB")
+                    await asyncio.to_thread(_write_chunk, f, hasher, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+
+            digest = hasher.hexdigest()
+            # Same content uploaded before (maybe under another extension): reuse its file
+            existing = await StoredFile.get(digest)
+            file_name = existing.file_name if existing else UploadService.stored_name(digest, original_name)
+            await asyncio.to_thread(UploadService._commit_file, tmp_path, os.path.join(upload_dir, file_name))
+        except BaseException:
+            await asyncio.to_thread(UploadService._remove, tmp_path)
+            raise
+
+        return await UploadService._count_upload(digest, file_name, size, content_type)
+
+    @staticmethod
+    def _commit_file(tmp_path: str, final_path: str) -> None:
+        if os.path.exists(final_path):
+            # Same content already stored
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    async def _count_upload(digest: str, file_name: str, size: int, content_type: Optional[str]) -> StoredFile:
+        for attempt in range(2):
+            try:
+                await StoredFile.find_one(StoredFile.id == digest).upsert(
+                    Inc({StoredFile.upload_count: 1}),
+                    Set({StoredFile.updated_at: datetime.now()}),
+                    on_insert=StoredFile(
+                        id=digest, file_name=file_name, size=size,
+                        content_type=content_type or "application/octet-stream", upload_count=1
+                    )
+                )
+                break
+            except DuplicateKeyError:
+                # Concurrent first upload of the same content inserted it, update instead
+                if attempt:
+                    raise
+        return await StoredFile.get(digest)
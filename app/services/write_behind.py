@@ -0,0 +1,133 @@
+import os
+import asyncio
+import weakref
+from typing import Dict, Iterable, Optional
+
+from app.models.canvas_node import CanvasNode
+from app.models.whiteboard import Whiteboard
+from app.services.board_service import BoardService
+
+class WriteBehindBuffer:
+    """
+    Per-board write-behind buffer for high-frequency canvas events.
+
+    Moves, resizes and viewport changes are only recorded in memory; repeated updates
+    of the same document within `window` seconds collapse into one pending write.
+    When the window elapses everything pending is written at once: node geometry as a
+    single unordered bulk_write, the viewport as one partial update.
+
+    Writes are partial ($set of the changed fields, no upsert), so a flush can never
+    resurrect a document that was deleted meanwhile. Call discard_nodes() before deleting
+    nodes anyway to avoid writing to them needlessly. Failed writes stay pending and are
+    retried with a growing delay.
+    """
+    DEFAULT_WINDOW = float(os.getenv("WRITE_BEHIND_WINDOW", "0.5"))
+    MAX_RETRY_DELAY = 30.0  # Seconds between retries of a failing flush, at most
+
+    # All live buffers, so shutdown can flush whatever is still pending
+    _instances: "weakref.WeakSet[WriteBehindBuffer]" = weakref.WeakSet()
+
+    def __init__(self, window: Optional[float] = None):
+        self.window = self.DEFAULT_WINDOW if window is None else window
+        self._nodes: Dict[str, CanvasNode] = {}
+        self._whiteboard: Optional[Whiteboard] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._failures = 0  # Consecutive failed flushes
+        self.stats = {"events": 0, "documents_written": 0, "round_trips": 0}
+        WriteBehindBuffer._instances.add(self)
+
+    @property
+    def pending(self) -> int:
+        return len(self._nodes) + (1 if self._whiteboard is not None else 0)
+
+    # Recording
+    def queue_nodes(self, nodes: Iterable[CanvasNode]) -> None:
+        """Record a geometry change (x/y/width/height) of one or more nodes"""
+        for node in nodes:
+            self._nodes[node.id] = node
+        self.stats["events"] += 1
+        self._schedule()
+
+    def queue_node(self, node: CanvasNode) -> None:
+        self.queue_nodes([node])
+
+    def queue_viewport(self, whiteboard: Whiteboard) -> None:
+        self._whiteboard = whiteboard
+        self.stats["events"] += 1
+        self._schedule()
+
+    def discard_nodes(self, node_ids: Iterable[str]) -> None:
+        for node_id in node_ids:
+            self._nodes.pop(node_id, None)
+
+    def _schedule(self, delay: Optional[float] = None) -> None:
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later(self.window if delay is None else delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # Detach first: close() only cancels a timer that is still sleeping, never a write
+        self._timer = None
+        await self.flush()
+
+    # Flushing
+    async def flush(self) -> None:
+        """
+        Write everything pending now. A failed write (lost connection, ...) puts its
+        updates back, unless newer ones were queued meanwhile, and is retried later.
+        """
+        async with self._lock:
+            nodes, self._nodes = self._nodes, {}
+            whiteboard, self._whiteboard = self._whiteboard, None
+            failed = False
+
+            if nodes:
+                try:
+                    await BoardService.update_geometry_bulk(list(nodes.values()))
+                    self.stats["documents_written"] += len(nodes)
+                    self.stats["round_trips"] += 1
+                except Exception as e:
+                    print(f"Write-behind flush of {len(nodes)} nodes failed: {e}")
+                    self._nodes = {**nodes, **self._nodes}
+                    failed = True
+            if whiteboard is not None:
+                try:
+                    await BoardService.update_viewport(whiteboard)
+                    self.stats["documents_written"] += 1
+                    self.stats["round_trips"] += 1
+                except Exception as e:
+                    print(f"Write-behind viewport flush failed: {e}")
+                    if self._whiteboard is None:
+                        self._whiteboard = whiteboard
+                    failed = True
+
+            if failed:
+                # Back off while the database stays unreachable
+                self._failures += 1
+                self._schedule(min(self.window * 2 ** self._failures, self.MAX_RETRY_DELAY))
+            else:
+                self._failures = 0
+
+    async def close(self) -> None:
+        """Cancel the pending timer and flush (client disconnect / navigation)"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()
+
+    @classmethod
+    def totals(cls) -> Dict[str, int]:
+        """Counters summed over all live buffers"""
+        totals = {"buffers": 0, "events": 0, "documents_written": 0, "round_trips": 0, "pending": 0}
+        for buffer in list(cls._instances):
+            totals["buffers"] += 1
+            totals["pending"] += buffer.pending
+            for key, value in buffer.stats.items():
+                totals[key] += value
+        return totals
+
+    @classmethod
+    async def flush_all(cls) -> None:
+        for buffer in list(cls._instances):
+            await buffer.close()
@@ -1,3 +1,6 @@
+// Thumbnail sizes served by /api/images (longest edge, px), same as ThumbnailService.SIZES
+const IMAGE_LOD_SIZES = [256, 1024];
+
 /**
  * Controller for handling Konva component rendering and styling
  */
@@ -91,7 +94,8 @@ class RenderingController {
             padding: 12,
             width: nodeData.width - 40,
             fill: '#0f172a',
-            ellipsis: true
+            ellipsis: true,
+            name: 'card-title'
         });
 
         // Edit button
@@ -305,23 +309,7 @@ class RenderingController {
         group.add(bg);
 
         if (isImage) {
-            const imageObj = new Image();
-            imageObj.onload = () => {
-                const imgNode = new Konva.Image({
-                    image: imageObj,
-                    x: 5,
-                    y: 5,
-                    width: nodeData.width - 10,
-                    height: nodeData.height - 10,
-                    cornerRadius: 4,
-                    name: 'file-preview'
-                });
-                group.add(imgNode);
-                imgNode.moveToBottom();
-                bg.moveToBottom();
-                this.canvas.layers.card.batchDraw();
-            };
-            imageObj.src = nodeData.file;
+            this.loadCardImage(nodeData, group, this.imageLevel(nodeData));
         } else {
             const icon = new Konva.Text({
                 text: '📄', fontSize: 48,
@@ -355,6 +343,65 @@ class RenderingController {
         });
     }
 
+    /**
+     * Image level of detail: the thumbnail size (longest edge, see IMAGE_LOD_SIZES) that covers
+     * the card at the current zoom, or 0 for the original image.
+     */
+    imageLevel(nodeData) {
+        const needed = Math.max(nodeData.width, nodeData.height) * this.canvas.stage.scaleX() * (window.devicePixelRatio || 1);
+        const level = IMAGE_LOD_SIZES.find(size => size >= needed) || 0;
+        // A thumbnail at least as large as the image itself is just the original
+        const intrinsic = Math.max(nodeData.image_width || 0, nodeData.image_height || 0);
+        return intrinsic && level >= intrinsic ? 0 : level;
+    }
+
+    imageUrl(nodeData, level) {
+        const match = /^\/static\/uploads\/([^/?#]+)$/.exec(nodeData.file || '');
+        if (!match) return nodeData.file;
+        return `/api/images/${match[1]}` + (level ? `?w=${level}` : '');
+    }
+
+    /** Load (or upgrade) the image of a file card at the given level */
+    loadCardImage(nodeData, group, level) {
+        group.setAttr('imageLevel', level);
+        const imageObj = new Image();
+        imageObj.onload = () => {
+            // A higher level requested meanwhile wins
+            if (group.getAttr('imageLevel') !== level) return;
+            const existing = group.findOne('.file-preview');
+            if (existing) {
+                existing.image(imageObj);
+                this.canvas.layers.card.batchDraw();
+                return;
+            }
+            const imgNode = new Konva.Image({
+                image: imageObj,
+                x: 5,
+                y: 5,
+                width: nodeData.width - 10,
+                height: nodeData.height - 10,
+                cornerRadius: 4,
+                name: 'file-preview'
+            });
+            group.add(imgNode);
+            imgNode.moveToBottom();
+            group.findOne('.bg')?.moveToBottom();
+            this.canvas.layers.card.batchDraw();
+        };
+        imageObj.src = this.imageUrl(nodeData, level);
+    }
+
+    /** After zooming in: fetch higher resolution images for visible cards that need them (never downgrades) */
+    updateImageLevels() {
+        const rank = level => level || Infinity;
+        this.canvas.layers.card.getChildren().forEach(card => {
+            const current = card.getAttr('imageLevel');
+            if (current === undefined || !card.visible() || !card.nodeData) return;
+            const needed = this.imageLevel(card.nodeData);
+            if (rank(needed) > rank(current)) this.loadCardImage(card.nodeData, card, needed);
+        });
+    }
+
     renderTags(nodeData, group) {
         if (!nodeData.tags || nodeData.tags.length === 0) return;
 
@@ -387,6 +434,31 @@ class RenderingController {
         group.add(tagsGroup);
     }
 
+    /**
+     * Apply changed fields to an already rendered card in place.
+     * nodeData has already been updated; only the affected shapes are touched.
+     */
+    patchCard(group, changes) {
+        const nodeData = group.nodeData;
+        if ('text' in changes || 'title' in changes) {
+            const title = group.findOne('.card-title');
+            if (title) title.text(nodeData.title || this.extractTitle(nodeData.text));
+        }
+        if ('text' in changes || 'preview' in changes) {
+            const preview = group.findOne('.text-preview');
+            if (preview) preview.text(nodeData.preview || this.extractPreview(nodeData.text));
+        }
+        if ('color' in changes) {
+            const bg = group.findOne('.bg');
+            if (bg) bg.fill(nodeData.color || '#ffffff');
+        }
+        if ('tags' in changes) {
+            const oldTags = group.findOne('.tags-container');
+            if (oldTags) oldTags.destroy();
+            this.renderTags(nodeData, group);
+        }
+    }
+
     addGroup(nodeData) {
         const group = new Konva.Group({
             x: nodeData.x, y: nodeData.y,
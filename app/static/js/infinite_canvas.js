@@ -67,6 +67,90 @@ class InfiniteCanvas {
         return edgeGroup;
     }
 
+    /**
+     * Add a batch of serialized nodes and edges (initial load or a streamed viewport tile).
+     * Edge endpoints are resolved from the batch first, then from what is already on the canvas.
+     */
+    loadNodes(nodes, edges) {
+        const byId = new Map();
+        nodes.forEach(node => {
+            byId.set(node.id, node);
+            if (node.type === 'text' || node.type === 'file') {
+                const card = this.addCard(node);
+                if (window.cardResizer) window.cardResizer.addResizeHandles(card, node);
+                if (window.connectionManager) window.connectionManager.addAnchors(card, node);
+            } else if (node.type === 'group') {
+                this.addGroup(node);
+            }
+        });
+
+        nodes.forEach(node => {
+            if ((node.type === 'text' || node.type === 'file') && node.parent_id && window.groupManager) {
+                const groupInfo = window.groupManager.groups.get(node.parent_id);
+                if (groupInfo) groupInfo.members.add(node.id);
+            }
+        });
+
+        const resolve = (id) => {
+            if (byId.has(id)) return byId.get(id);
+            const shape = this.layers.card.findOne(`#card-${id}`) || this.layers.group.findOne(`#group-${id}`);
+            return shape ? shape.nodeData : null;
+        };
+        (edges || []).forEach(edge => {
+            const fromNode = resolve(edge.fromNode);
+            const toNode = resolve(edge.toNode);
+            if (fromNode && toNode) this.addEdge(edge, fromNode, toNode);
+        });
+
+        this.updateVisibility();
+    }
+
+    /**
+     * Incremental update of one card: `changes` holds only the fields that changed.
+     * The Konva group, its handles and anchors are kept; only affected shapes are redrawn.
+     */
+    patchNode(id, changes) {
+        const card = this.layers.card.findOne(`#card-${id}`);
+        if (!card || !card.nodeData) return;
+        Object.assign(card.nodeData, changes);
+        this.renderingController.patchCard(card, changes);
+        if (this.currentFilter) this._applyFilter(card);
+        this.layers.card.batchDraw();
+    }
+
+    /** Restore a saved { x, y, scale } viewport without echoing it back to the backend */
+    setViewport(viewport) {
+        if (!viewport) return;
+        const scale = viewport.scale || 1;
+        this.stage.position({ x: viewport.x || 0, y: viewport.y || 0 }).scale({ x: scale, y: scale });
+        this.drawGrid();
+        this.updateVisibility();
+    }
+
+    /** Center the view on a card or group and flash its outline (jump from search results) */
+    focusNode(id) {
+        const shape = this.layers.card.findOne(`#card-${id}`) || this.layers.group.findOne(`#group-${id}`);
+        if (!shape) return;
+        const box = shape.getClientRect({ relativeTo: this.stage });
+        const scale = this.stage.scaleX();
+        this.stage.position({
+            x: this.stage.width() / 2 - (box.x + box.width / 2) * scale,
+            y: this.stage.height() / 2 - (box.y + box.height / 2) * scale
+        });
+        this.updateViewport();
+
+        const outline = shape.findOne('.bg') || shape.findOne('.group-bg');
+        if (!outline) return;
+        const stroke = outline.stroke();
+        const strokeWidth = outline.strokeWidth();
+        outline.stroke('#f59e0b').strokeWidth(4);
+        shape.getLayer().batchDraw();
+        setTimeout(() => {
+            outline.stroke(stroke).strokeWidth(strokeWidth);
+            shape.getLayer().batchDraw();
+        }, 1500);
+    }
+
     _setupEdgeEvents(group, edgeData) {
         group.on('click tap', (e) => {
             e.cancelBubble = true;
@@ -207,7 +291,10 @@ class InfiniteCanvas {
         // Throttled backend sync
         if (this._viewportTimeout) clearTimeout(this._viewportTimeout);
         this._viewportTimeout = setTimeout(() => {
-            this.emitEvent('viewport_changed', { x: pos.x, y: pos.y, scale: scale });
+            this.emitEvent('viewport_changed', {
+                x: pos.x, y: pos.y, scale: scale,
+                width: this.stage.width(), height: this.stage.height()
+            });
         }, 100);
     }
 
@@ -245,6 +332,11 @@ class InfiniteCanvas {
 
         this.layers.card.batchDraw();
         this.layers.edge.batchDraw();
+
+        if (scale !== this._imageLevelScale) {
+            this._imageLevelScale = scale;
+            this.renderingController.updateImageLevels();
+        }
     }
 
     _setupGroupEvents(group, nodeData) {
@@ -511,8 +603,27 @@ class InfiniteCanvas {
     }
 
     // --- Search & Filter ---
+    _matchesQuery(node, lowerQuery) {
+        const textMatch = (node.text || '').toLowerCase().includes(lowerQuery);
+        const tagMatch = (node.tags || []).some(tag => tag.toLowerCase().includes(lowerQuery));
+        const fileMatch = (node.file || '').toLowerCase().includes(lowerQuery);
+        return textMatch || tagMatch || fileMatch;
+    }
+
+    // Re-evaluate the active filter for a single card (after a patch)
+    _applyFilter(group) {
+        const node = group.nodeData;
+        const isVisible = this.currentFilterMode === 'tag'
+            ? (node.tags || []).includes(this.currentFilter)
+            : this._matchesQuery(node, this.currentFilter.toLowerCase());
+        group.opacity(isVisible ? 1 : 0.1);
+        group.visible(isVisible);
+        group.listening(isVisible);
+    }
+
     filterNodes(query) {
         this.currentFilter = query;
+        this.currentFilterMode = 'query';
         const lowerQuery = query.toLowerCase();
 
         this.layers.card.getChildren().forEach(group => {
@@ -520,11 +631,7 @@ class InfiniteCanvas {
             const node = group.nodeData;
             if (!node) return;
 
-            const textMatch = (node.text || '').toLowerCase().includes(lowerQuery);
-            const tagMatch = (node.tags || []).some(tag => tag.toLowerCase().includes(lowerQuery));
-            const fileMatch = (node.file || '').toLowerCase().includes(lowerQuery);
-
-            const isVisible = textMatch || tagMatch || fileMatch;
+            const isVisible = this._matchesQuery(node, lowerQuery);
 
             // Animate opacity for better UX
             group.to({
@@ -540,6 +647,7 @@ class InfiniteCanvas {
 
     filterByTag(tag) {
         this.currentFilter = tag;
+        this.currentFilterMode = 'tag';
         this.layers.card.getChildren().forEach(group => {
             if (group.name() !== 'card-group') return;
             const node = group.nodeData;
@@ -0,0 +1,180 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import defaultdict
+
+from app.models.canvas_node import CanvasNode
+from app.models.canvas_edge import CanvasEdge
+from app.utils.spatial_index import SpatialGrid
+
+class BoardState:
+    """
+    In-memory index of the nodes and edges of the open whiteboard.
+
+    Keeps four indexes, all maintained incrementally:
+    - id -> node / id -> edge
+    - parent_id -> child ids
+    - node id -> ids of edges touching it
+    - a uniform spatial grid over node rectangles (hit testing, group containment)
+
+    Lookups are O(1), children/edge queries are O(result).
+    Parent changes must go through set_parent() and geometry changes through
+    move_node()/resize_node() so the indexes stay in sync.
+    """
+    def __init__(self, nodes: Optional[Iterable[CanvasNode]] = None, edges: Optional[Iterable[CanvasEdge]] = None):
+        self._nodes: Dict[str, CanvasNode] = {}
+        self._edges: Dict[str, CanvasEdge] = {}
+        self._children: Dict[str, Set[str]] = defaultdict(set)
+        self._node_edges: Dict[str, Set[str]] = defaultdict(set)
+        self._grid = SpatialGrid()
+
+        for node in nodes or []:
+            self.add_node(node)
+        for edge in edges or []:
+            self.add_edge(edge)
+
+    # Views (insertion ordered, same order as the lists they replace)
+    @property
+    def nodes(self) -> List[CanvasNode]:
+        return list(self._nodes.values())
+
+    @property
+    def edges(self) -> List[CanvasEdge]:
+        return list(self._edges.values())
+
+    def node_ids(self):
+        return self._nodes.keys()
+
+    def edge_ids(self):
+        return self._edges.keys()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def clear(self) -> None:
+        self._nodes.clear()
+        self._edges.clear()
+        self._children.clear()
+        self._node_edges.clear()
+        self._grid.clear()
+
+    # Nodes
+    def get_node(self, node_id: str) -> Optional[CanvasNode]:
+        return self._nodes.get(node_id)
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self._nodes
+
+    def add_node(self, node: CanvasNode) -> CanvasNode:
+        if node.id in self._nodes:
+            self.remove_node(node.id, cascade_edges=False)
+        self._nodes[node.id] = node
+        if node.parent_id:
+            self._children[node.parent_id].add(node.id)
+        self._grid.insert(node.id, node.x, node.y, node.width, node.height)
+        return node
+
+    def add_nodes(self, nodes: Iterable[CanvasNode]) -> None:
+        for node in nodes:
+            self.add_node(node)
+
+    def remove_node(self, node_id: str, cascade_edges: bool = True) -> Optional[CanvasNode]:
+        node = self._nodes.pop(node_id, None)
+        if not node:
+            return None
+        if node.parent_id:
+            self._discard_child(node.parent_id, node_id)
+        self._grid.remove(node_id)
+        if cascade_edges:
+            for edge_id in list(self._node_edges.get(node_id, ())):
+                self.remove_edge(edge_id)
+        return node
+
+    def remove_nodes(self, node_ids: Iterable[str]) -> Tuple[List[CanvasNode], List[CanvasEdge]]:
+        """Remove nodes and every edge touching them. Returns what was removed."""
+        removed_nodes, removed_edges = [], []
+        for node_id in set(node_ids):
+            for edge_id in list(self._node_edges.get(node_id, ())):
+                edge = self.remove_edge(edge_id)
+                if edge:
+                    removed_edges.append(edge)
+            node = self.remove_node(node_id, cascade_edges=False)
+            if node:
+                removed_nodes.append(node)
+        return removed_nodes, removed_edges
+
+    def set_parent(self, node: CanvasNode, parent_id: Optional[str]) -> None:
+        if node.parent_id == parent_id:
+            return
+        if node.parent_id:
+            self._discard_child(node.parent_id, node.id)
+        node.parent_id = parent_id
+        if parent_id and node.id in self._nodes:
+            self._children[parent_id].add(node.id)
+
+    def children_of(self, parent_id: str) -> List[CanvasNode]:
+        return [self._nodes[cid] for cid in self._children.get(parent_id, ()) if cid in self._nodes]
+
+    # Geometry
+    def move_node(self, node: CanvasNode, x: float, y: float) -> None:
+        node.x, node.y = x, y
+        if node.id in self._nodes:
+            self._grid.update(node.id, x, y, node.width, node.height)
+
+    def resize_node(self, node: CanvasNode, width: float, height: float) -> None:
+        node.width, node.height = width, height
+        if node.id in self._nodes:
+            self._grid.update(node.id, node.x, node.y, width, height)
+
+    def nodes_at(self, x: float, y: float) -> List[CanvasNode]:
+        return [self._nodes[nid] for nid in self._grid.query_point(x, y)]
+
+    def nodes_in_rect(self, x: float, y: float, width: float, height: float) -> List[CanvasNode]:
+        return [self._nodes[nid] for nid in self._grid.query_rect(x, y, width, height)]
+
+    def group_at(self, x: float, y: float, width: float = 0.0, height: float = 0.0) -> Optional[CanvasNode]:
+        """Innermost (smallest) group containing the point, or the whole rect if a size is given"""
+        groups = [
+            self._nodes[nid] for nid in self._grid.query_containing(x, y, width, height)
+            if self._nodes[nid].type == 'group'
+        ]
+        return min(groups, key=lambda g: g.width * g.height, default=None)
+
+    def _discard_child(self, parent_id: str, child_id: str) -> None:
+        siblings = self._children.get(parent_id)
+        if siblings is not None:
+            siblings.discard(child_id)
+            if not siblings:
+                del self._children[parent_id]
+
+    # Edges
+    def get_edge(self, edge_id: str) -> Optional[CanvasEdge]:
+        return self._edges.get(edge_id)
+
+    def has_edge(self, edge_id: str) -> bool:
+        return edge_id in self._edges
+
+    def add_edge(self, edge: CanvasEdge) -> CanvasEdge:
+        if edge.id in self._edges:
+            self.remove_edge(edge.id)
+        self._edges[edge.id] = edge
+        self._node_edges[edge.fromNode].add(edge.id)
+        self._node_edges[edge.toNode].add(edge.id)
+        return edge
+
+    def add_edges(self, edges: Iterable[CanvasEdge]) -> None:
+        for edge in edges:
+            self.add_edge(edge)
+
+    def remove_edge(self, edge_id: str) -> Optional[CanvasEdge]:
+        edge = self._edges.pop(edge_id, None)
+        if not edge:
+            return None
+        for node_id in (edge.fromNode, edge.toNode):
+            edge_ids = self._node_edges.get(node_id)
+            if edge_ids is not None:
+                edge_ids.discard(edge_id)
+                if not edge_ids:
+                    del self._node_edges[node_id]
+        return edge
+
+    def edges_of(self, node_id: str) -> List[CanvasEdge]:
+        return [self._edges[eid] for eid in self._node_edges.get(node_id, ())]
@@ -1,13 +1,36 @@
 from nicegui import ui
-from typing import List, Callable, Any, Set
+from typing import Dict, Iterable
+from collections import Counter
+import json
+
+from app.services.tag_facet_service import TagFacetService
+from app.ui.components.global_search import GlobalSearch
+from app.ui.components.tag_browser import TagBrowser
 
 class BoardSearch:
-    """Search and filter interface for the whiteboard"""
-    def __init__(self, nodes: List[Any]):
-        self.nodes = nodes
+    """
+    Search and filter interface for the whiteboard.
+
+    The tag bar shows the board's tag facet (tag -> number of cards carrying it, see
+    TagFacetService), the MAX_CHIPS most used tags as chips; all tags of this board or
+    of every board are in the tag browser. Edits go through apply_tag_changes() which
+    only touches the chips whose count changed; refresh_tags() rebuilds the bar.
+    """
+    MAX_CHIPS = 40
+
+    def __init__(self, tag_counts: Dict[str, int]):
+        self.tag_counts: Counter = Counter(tag_counts)
+        self._chips: Dict[str, ui.chip] = {}
+        self._tag_row = None
+        self.global_search = None
+        self.tag_browser = None
         self.render_tags_refreshable = ui.refreshable(self._render_tags)
 
     def render(self):
+        self.global_search = GlobalSearch()
+        self.global_search.render()
+        self.tag_browser = TagBrowser(self.tag_counts, on_board_tag=self._filter_by_tag, global_search=self.global_search)
+        self.tag_browser.render()
         with ui.element('div').classes('fixed top-4 right-4 z-[9999] flex flex-col gap-2 items-end'):
             # Search Bar
             with ui.row().classes('bg-white/90 backdrop-blur-md shadow-xl rounded-full px-4 py-1 items-center border border-slate-200/50'):
@@ -23,28 +46,78 @@ class BoardSearch:
                 search_input.on_value_change(handle_search)
                 
                 ui.button(icon='close', on_click=lambda: search_input.set_value('')).props('flat round dense color=grey-5').classes('scale-75')
+                ui.button(icon='travel_explore', on_click=lambda: self.global_search.open()) \
+                    .props('flat round dense color=grey-7').classes('scale-75').tooltip('Search all boards')
             
             # Tag Quick Filter
             self.render_tags_refreshable()
 
+    @staticmethod
+    def _chip_text(tag: str, count: int) -> str:
+        return f'{tag} · {count}'
+
     def _render_tags(self):
-        all_tags: Set[str] = set()
-        for node in self.nodes:
-            if hasattr(node, 'tags') and node.tags:
-                all_tags.update(node.tags)
-        
-        if all_tags:
-            with ui.row().classes('gap-2'):
-                for tag in sorted(list(all_tags)):
-                    def filter_by_tag(t=tag):
-                        ui.run_javascript(f'if (window.canvas) window.canvas.filterByTag("{t}")')
-                    
-                    ui.chip(tag, icon='local_offer', on_click=filter_by_tag, selectable=True) \
-                        .classes('bg-blue-50 text-blue-600 border border-blue-100 hover:bg-blue-100 transition-colors')
-                
-                ui.button(icon='filter_list_off', on_click=lambda: ui.run_javascript('if (window.canvas) window.canvas.clearFilters()')) \
-                    .props('flat round dense color=grey-5')
+        self._chips = {}
+        self._tag_row = ui.row().classes('gap-2 justify-end')
+        self._tag_row.set_visibility(bool(self.tag_counts))
+        with self._tag_row:
+            shown = sorted(TagFacetService.top(self.tag_counts, self.MAX_CHIPS))
+            for tag, count in shown:
+                self._chips[tag] = self._make_chip(tag, count)
+
+            ui.button(icon='sell', on_click=lambda: self.tag_browser.open()) \
+                .props('flat round dense color=grey-5').tooltip('All tags')
+            ui.button(icon='filter_list_off', on_click=lambda: ui.run_javascript('if (window.canvas) window.canvas.clearFilters()')) \
+                .props('flat round dense color=grey-5')
+
+    @staticmethod
+    def _filter_by_tag(tag: str) -> None:
+        ui.run_javascript(f'if (window.canvas) window.canvas.filterByTag({json.dumps(tag)})')
+
+    def _make_chip(self, tag: str, count: int) -> ui.chip:
+        return ui.chip(self._chip_text(tag, count), icon='local_offer', on_click=lambda t=tag: self._filter_by_tag(t), selectable=True) \
+            .classes('bg-blue-50 text-blue-600 border border-blue-100 hover:bg-blue-100 transition-colors')
+
+    def apply_tag_changes(self, removed: Iterable[str] = (), added: Iterable[str] = ()) -> None:
+        """
+        Update the facet with tags taken off / put on cards (one entry per card).
+        Only chips of changed tags are touched; a new tag gets a chip while the bar has room.
+        """
+        changed = set()
+        for tag in removed:
+            self.tag_counts[tag] -= 1
+            changed.add(tag)
+        for tag in added:
+            self.tag_counts[tag] += 1
+            changed.add(tag)
+
+        for tag in changed:
+            count = self.tag_counts[tag]
+            chip = self._chips.get(tag)
+            if count <= 0:
+                del self.tag_counts[tag]
+                if chip is not None:
+                    del self._chips[tag]
+                    chip.delete()
+            elif chip is not None:
+                chip.set_text(self._chip_text(tag, count))
+            elif self._tag_row is not None and len(self._chips) < self.MAX_CHIPS:
+                with self._tag_row:
+                    chip = self._make_chip(tag, count)
+                # Keep the chips sorted; the browser and clear-filter buttons stay last
+                chip.move(target_index=sorted(self._chips.keys() | {tag}).index(tag))
+                self._chips[tag] = chip
+        if self.tag_browser is not None:
+            self.tag_browser.refresh()
+        if self._tag_row is not None:
+            self._tag_row.set_visibility(bool(self.tag_counts))
+
+    def update_node_tags(self, old_tags: Iterable[str], new_tags: Iterable[str]) -> None:
+        """Facet update for a single card whose tags changed"""
+        old_tags, new_tags = set(old_tags or ()), set(new_tags or ())
+        self.apply_tag_changes(removed=old_tags - new_tags, added=new_tags - old_tags)
 
-    def refresh_tags(self, new_nodes: List[Any]):
-        self.nodes = new_nodes
+    def refresh_tags(self, tag_counts: Dict[str, int]):
+        self.tag_counts.clear()
+        self.tag_counts.update(tag_counts)
         self.render_tags_refreshable.refresh()
@@ -71,7 +71,10 @@ class BoardToolbar:
                     on_click=self.on_redo
                 ).props('round flat dense size=sm color=grey-9').tooltip('Redo (Ctrl+Shift+Z)')
                 
-                ui.button(icon='print', on_click=self.on_export).props('flat round dense size=sm color=grey-9').tooltip('Export as Linear Document')
+                with ui.button(icon='print').props('flat round dense size=sm color=grey-9').tooltip('Export as Linear Document'):
+                    with ui.menu():
+                        ui.menu_item('HTML (images embedded)', on_click=lambda: self.on_export('html'))
+                        ui.menu_item('ZIP (HTML + image files)', on_click=lambda: self.on_export('zip'))
                 
                 ui.separator().props('vertical')
                 
@@ -0,0 +1,97 @@
+from nicegui import ui
+from typing import Any, Dict
+from urllib.parse import urlencode
+
+from app.models.canvas_node import CanvasNode
+from app.services.search_service import SearchService
+
+class GlobalSearch:
+    """
+    Search dialog over every board and the card library.
+
+    The input is debounced client-side; responses to superseded queries are dropped.
+    Picking a result opens its board centered on the card.
+    """
+    PAGE_SIZE = 20
+    DEBOUNCE_MS = 300
+
+    def __init__(self):
+        self.query = ''
+        self.page = 1
+        self.dialog = None
+        self._results = None
+        self._summary = None
+        self._more = None
+        self._input = None
+
+    def render(self):
+        with ui.dialog() as self.dialog, ui.card().classes('w-[640px] max-h-[80vh] p-4 gap-2'):
+            self._input = ui.input(placeholder='Search all boards...', on_change=self._on_query) \
+                .props(f'autofocus clearable dense debounce={self.DEBOUNCE_MS}') \
+                .classes('w-full')
+            self._summary = ui.label().classes('text-xs text-slate-500')
+            self._results = ui.column().classes('w-full gap-1 overflow-auto')
+            self._more = ui.button('More results', on_click=self._load_more).props('flat dense')
+            self._more.set_visibility(False)
+
+    def open(self, query: str = None):
+        if query is not None:
+            self._input.set_value(query)
+        self.dialog.open()
+
+    async def _on_query(self, e):
+        self.query = (e.value or '').strip()
+        self.page = 1
+        self._results.clear()
+        await self._load()
+
+    async def _load_more(self):
+        self.page += 1
+        await self._load()
+
+    async def _load(self):
+        query, page = self.query, self.page
+        if not query:
+            self._summary.set_text('')
+            self._more.set_visibility(False)
+            return
+        data = await SearchService.search(query, page=page, page_size=self.PAGE_SIZE)
+        if query != self.query or page != self.page:
+            return  # A newer query was typed meanwhile
+
+        total = data['total']
+        self._summary.set_text(f'{total} result{"" if total == 1 else "s"}' if total else 'No results')
+        with self._results:
+            for result in data['results']:
+                self._render_result(result)
+        self._more.set_visibility(page * self.PAGE_SIZE < total)
+
+    def _render_result(self, result: Dict[str, Any]):
+        if result['kind'] == 'library':
+            where, icon = 'Card library', 'local_library'
+        else:
+            where = result.get('whiteboard_name') or 'Unknown board'
+            icon = {'group': 'folder', 'file': 'image'}.get(result.get('type'), 'notes')
+
+        with ui.row().classes('w-full items-start gap-2 p-2 rounded cursor-pointer hover:bg-slate-100 no-wrap') \
+                .on('click', lambda r=result: self._open_result(r)):
+            ui.icon(icon).classes('text-slate-400 mt-1')
+            with ui.column().classes('gap-0 min-w-0'):
+                ui.label(result.get('title') or result.get('excerpt') or 'Untitled').classes('font-medium truncate')
+                if result.get('excerpt') and result.get('excerpt') != result.get('title'):
+                    ui.label(result['excerpt']).classes('text-xs text-slate-500 line-clamp-2')
+                ui.label(where).classes('text-xs text-blue-500')
+
+    async def _open_result(self, result: Dict[str, Any]):
+        whiteboard_id, node_id = result.get('whiteboard_id'), result['id']
+        if result['kind'] == 'library':
+            # Jump to the first board the library card is placed on
+            projection = await CanvasNode.find_one(CanvasNode.library_card_id == result['id'])
+            if not projection:
+                ui.notify('This library card is not placed on any board', type='info')
+                return
+            whiteboard_id, node_id = projection.whiteboard_id, projection.id
+        if not whiteboard_id:
+            return
+        self.dialog.close()
+        ui.navigate.to('/?' + urlencode({'id': whiteboard_id, 'focus': node_id}))
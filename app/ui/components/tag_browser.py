@@ -0,0 +1,82 @@
+from nicegui import ui
+from typing import Callable, Dict, Optional
+
+from app.services.tag_facet_service import TagFacetService
+
+class TagBrowser:
+    """
+    Dialog listing every tag with its card count, for this board or across all boards.
+
+    Only the LIMIT most used tags matching the filter are rendered, so boards with
+    very many tags open immediately. Picking a board tag filters the canvas; picking
+    a tag in the all-boards view runs a global search for it.
+    """
+    LIMIT = 200
+
+    def __init__(self, board_counts: Dict[str, int], on_board_tag: Callable[[str], None], global_search=None):
+        self.board_counts = board_counts  # Shared with (and kept current by) the tag bar
+        self.global_counts: Optional[Dict[str, int]] = None
+        self.on_board_tag = on_board_tag
+        self.global_search = global_search
+        self.scope = 'board'
+        self.filter = ''
+        self.dialog = None
+        self._list = None
+        self._summary = None
+
+    def render(self):
+        with ui.dialog() as self.dialog, ui.card().classes('w-[480px] max-h-[80vh] p-4 gap-2'):
+            with ui.row().classes('w-full items-center no-wrap gap-2'):
+                ui.input(placeholder='Filter tags...', on_change=self._on_filter) \
+                    .props('autofocus clearable dense debounce=200').classes('flex-grow')
+                ui.toggle({'board': 'This board', 'global': 'All boards'}, value=self.scope, on_change=self._on_scope) \
+                    .props('dense no-caps')
+            self._summary = ui.label().classes('text-xs text-slate-500')
+            self._list = ui.column().classes('w-full gap-0 overflow-auto')
+
+    async def open(self):
+        self.dialog.open()
+        await self._show()
+
+    def refresh(self):
+        """Re-render after the board facet changed (only while the board list is open)"""
+        if self.dialog is not None and self.dialog.value and self.scope == 'board':
+            self._render_list(self.board_counts)
+
+    async def _on_filter(self, e):
+        self.filter = (e.value or '').strip()
+        await self._show()
+
+    async def _on_scope(self, e):
+        self.scope = e.value
+        await self._show()
+
+    async def _show(self):
+        if self.scope == 'global':
+            # The global facet is kept current by TagFacetService; refetch is a dict copy
+            self.global_counts = await TagFacetService.global_tags()
+            self._render_list(self.global_counts)
+        else:
+            self._render_list(self.board_counts)
+
+    def _render_list(self, counts: Dict[str, int]):
+        matches = TagFacetService.top(counts, prefix=self.filter)
+        shown = matches[:self.LIMIT]
+        self._summary.set_text(
+            f'{len(matches)} tag{"" if len(matches) == 1 else "s"}'
+            + (f', showing the {len(shown)} most used' if len(shown) < len(matches) else '')
+        )
+        self._list.clear()
+        with self._list:
+            for tag, count in shown:
+                with ui.row().classes('w-full items-center justify-between px-2 py-1 rounded cursor-pointer hover:bg-slate-100 no-wrap') \
+                        .on('click', lambda t=tag: self._pick(t)):
+                    ui.label(tag).classes('truncate')
+                    ui.badge(str(count)).props('color=blue-1 text-color=blue-8')
+
+    def _pick(self, tag: str):
+        self.dialog.close()
+        if self.scope == 'global' and self.global_search is not None:
+            self.global_search.open(tag)
+        else:
+            self.on_board_tag(tag)
@@ -1,11 +1,16 @@
 from nicegui import ui
-import os
+import asyncio
+import json
 import uuid
 from typing import List, Any, Optional
 from app.models.canvas_node import CanvasNode
 from app.models.canvas_edge import CanvasEdge
 from app.models.whiteboard import Whiteboard
+from app.models.card_library import LibraryCard
 from app.services.board_service import BoardService
+from app.services.library_service import LibraryService
+from app.services.thumbnail_service import ThumbnailService
+from app.services.upload_service import UploadService, UploadTooLarge
 
 class CanvasHandlers:
     """Event handlers for whiteboard interactions"""
@@ -15,27 +20,27 @@ class CanvasHandlers:
     async def on_card_moved(self, e):
         node_id = e.args['id']
         x, y = e.args['x'], e.args['y']
-        node = next((n for n in self.view.nodes if n.id == node_id), None)
+        node = self.view.board.get_node(node_id)
         if node:
-            node.x, node.y = x, y
-            await BoardService.save_node(node)
+            self.view.board.move_node(node, x, y)
+            self.view.write_buffer.queue_node(node)
     
     async def on_group_moved(self, e):
         node_id = e.args['id']
         x, y = e.args['x'], e.args['y']
-        node = next((n for n in self.view.nodes if n.id == node_id), None)
+        node = self.view.board.get_node(node_id)
         if node:
             dx = x - node.x
             dy = y - node.y
-            node.x, node.y = x, y
-            await BoardService.save_node(node)
+            self.view.board.move_node(node, x, y)
+            moved = [node]
             
             # Move child cards
-            for child in self.view.nodes:
-                if child.parent_id == node_id:
-                    child.x += dx
-                    child.y += dy
-                    await BoardService.save_node(child)
+            for child in self.view.board.children_of(node_id):
+                self.view.board.move_node(child, child.x + dx, child.y + dy)
+                moved.append(child)
+            
+            self.view.write_buffer.queue_nodes(moved)
     
     async def on_canvas_dblclick(self, e):
         x, y = e.args['x'], e.args['y']
@@ -49,7 +54,7 @@ class CanvasHandlers:
             whiteboard_id=self.view.whiteboard_id
         )
         await BoardService.save_node(new_node)
-        self.view.nodes.append(new_node)
+        self.view.board.add_node(new_node)
         
         # Add to canvas
         await ui.run_javascript(f'''
@@ -74,7 +79,7 @@ class CanvasHandlers:
             whiteboard_id=self.view.whiteboard_id
         )
         await BoardService.save_node(new_group)
-        self.view.nodes.append(new_group)
+        self.view.board.add_node(new_group)
         
         await ui.run_javascript(f'''
             if (window.canvas && window.groupManager) {{
@@ -88,46 +93,70 @@ class CanvasHandlers:
     async def on_card_content_saved(self, e):
         node_id = e.args['id']
         new_content = e.args['content']
-        node = next((n for n in self.view.nodes if n.id == node_id), None)
+        node = self.view.board.get_node(node_id)
         if node:
-            node.text = new_content
-            if 'tags' in e.args:
+            old_tags = list(node.tags or [])
+            changed = []
+            if node.text != new_content:
+                node.text = new_content
+                changed.append('text')
+            if 'tags' in e.args and e.args['tags'] != node.tags:
                 node.tags = e.args['tags']
-            if 'color' in e.args:
+                changed.append('tags')
+            if 'color' in e.args and e.args['color'] != node.color:
                 node.color = e.args['color']
+                changed.append('color')
+            if not changed:
+                return
+            if getattr(node, 'library_card_id', None) and {'text', 'tags'} & set(changed):
+                await self._save_library_projection(node, old_tags, changed)
+                ui.notify('Card updated!')
+                return
             await BoardService.save_node(node)
             
-            await ui.run_javascript(f'''
-                if (window.canvas) {{
-                    const oldCard = window.canvas.layers.card.findOne('#card-{node_id}');
-                    if (oldCard) oldCard.destroy();
-                    
-                    const nodeData = {self.view.serialize_node(node)};
-                    const card = window.canvas.addCard(nodeData);
-                    
-                    if (window.cardResizer) window.cardResizer.addResizeHandles(card, nodeData);
-                    if (window.connectionManager) window.connectionManager.addAnchors(card, nodeData);
-                    
-                    if (window.canvas.currentFilter) window.canvas.filterNodes(window.canvas.currentFilter);
-                }}
-            ''')
+            # Patch the card in place instead of destroying and re-creating it
+            await self.view.patch_node(node, changed)
             
-            if hasattr(self.view, 'search_interface'):
-                self.view.search_interface.refresh_tags(self.view.nodes)
+            if 'tags' in changed:
+                old_tags, new_tags = set(old_tags), set(node.tags or ())
+                self.view.apply_tag_changes(removed=old_tags - new_tags, added=new_tags - old_tags)
             ui.notify('Card updated!')
 
+    async def _save_library_projection(self, node, old_tags, changed):
+        """
+        Text/tags of a projection belong to its library card: the card is updated and every
+        projection (this one included) is patched through LibraryService.
+        """
+        card = await LibraryCard.get(node.library_card_id)
+        if card is None:
+            # The library card is gone: the projection keeps its content as a plain card
+            node.library_card_id = None
+            await BoardService.save_node(node)
+            await self.view.patch_node(node, changed)
+            if 'tags' in changed:
+                old_set, new_set = set(old_tags), set(node.tags or ())
+                self.view.apply_tag_changes(removed=old_set - new_set, added=new_set - old_set)
+            return
+        # Local values go back to what the card has until its update arrives
+        new_text, new_tags = node.text, list(node.tags or [])
+        node.tags = old_tags
+        await LibraryService.update_card(card, content=new_text, tags=new_tags)
+        if 'color' in changed:
+            await BoardService.save_node(node)
+            await self.view.patch_node(node, ['color'])
+
     async def on_viewport_changed(self, e):
         if self.view.current_wb:
             self.view.current_wb.viewport = e.args
-            await BoardService.save_whiteboard(self.view.current_wb)
+            self.view.write_buffer.queue_viewport(self.view.current_wb)
+            await self.view.load_viewport(e.args)
 
     async def on_card_resized(self, e):
         node_id = e.args['id']
-        node = next((n for n in self.view.nodes if n.id == node_id), None)
+        node = self.view.board.get_node(node_id)
         if node:
-            node.width = e.args['width']
-            node.height = e.args['height']
-            await BoardService.save_node(node)
+            self.view.board.resize_node(node, e.args['width'], e.args['height'])
+            self.view.write_buffer.queue_node(node)
             ui.notify(f'Card resized')
 
     async def on_edge_create(self, e):
@@ -141,7 +170,7 @@ class CanvasHandlers:
             color=e.args.get('color', '#64748b')
         )
         await BoardService.save_edge(edge)
-        self.view.edges.append(edge)
+        self.view.board.add_edge(edge)
         ui.notify('Connection created')
         
         await ui.run_javascript(f'''
@@ -164,52 +193,56 @@ class CanvasHandlers:
 
     async def on_delete_nodes(self, e):
         node_ids = e.args['nodeIds']
+        self.view.write_buffer.discard_nodes(node_ids)
+        removed_tags = [
+            tag for node_id in set(node_ids)
+            for tag in set(getattr(self.view.board.get_node(node_id), 'tags', None) or ())
+        ]
         result = await BoardService.delete_nodes_and_edges(node_ids, self.view.whiteboard_id or "")
-        self.view.nodes = [n for n in self.view.nodes if n.id not in node_ids]
-        # Remove edges connected to these nodes
-        self.view.edges = [ed for ed in self.view.edges if ed.fromNode not in node_ids and ed.toNode not in node_ids]
+        # Also drops edges connected to these nodes
+        self.view.board.remove_nodes(node_ids)
+        self.view.apply_tag_changes(removed=removed_tags)
         if result["nodes"] > 0:
             ui.notify(f'Deleted {result["nodes"]} item(s)')
 
     async def on_delete_edges(self, e):
-        edge_ids = e.args['edgeIds']
-        deleted_count = 0
-        for edge_id in edge_ids:
-            if await BoardService.delete_edge(edge_id, self.view.whiteboard_id or ""):
-                deleted_count += 1
-                self.view.edges = [ed for ed in self.view.edges if ed.id != edge_id]
+        edge_ids = set(e.args['edgeIds'])
+        deleted_count = await BoardService.delete_edges(list(edge_ids), self.view.whiteboard_id or "")
+        if deleted_count > 0:
+            for edge_id in edge_ids:
+                self.view.board.remove_edge(edge_id)
         
         if deleted_count > 0:
             ui.notify(f'Deleted {deleted_count} connection(s)')
 
     async def handle_upload(self, e):
-        upload_dir = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
-        os.makedirs(upload_dir, exist_ok=True)
-        
+        original_name = e.file.name
         try:
-            original_name = e.file.name
-            file_name = f"{uuid.uuid4()}_{original_name}"
-            file_path = os.path.join(upload_dir, file_name)
-            content = await e.file.read()
-            with open(file_path, 'wb') as f:
-                f.write(content)
+            stored = await UploadService.store_upload(e.file)
+        except UploadTooLarge as ex:
+            ui.notify(str(ex), type='warning')
+            return
         except Exception as ex:
             ui.notify(f"Upload failed: {ex}", type='negative')
             return
 
+        # Header read only; thumbnails are generated in the background
+        dimensions = await asyncio.to_thread(ThumbnailService.image_size, UploadService.path(stored))
+        ThumbnailService.schedule(stored.file_name)
+
         vp = self.view.current_wb.viewport or {"x": 0, "y": 0, "scale": 1.0}
         vx, vy, vs = vp.get("x", 0), vp.get("y", 0), vp.get("scale", 1.0)
         new_x, new_y = -vx / vs + 100, -vy / vs + 100
         
-        parent_id = None
-        for node in self.view.nodes:
-            if node.type == 'group' and node.x <= new_x <= node.x + node.width and node.y <= new_y <= node.y + node.height:
-                parent_id = node.id
-                break
+        parent_group = self.view.board.group_at(new_x, new_y)
+        parent_id = parent_group.id if parent_group else None
         
         new_node = CanvasNode(
             type="file",
-            file=f"/static/uploads/{file_name}",
+            file=stored.url,
+            title=original_name,
+            image_width=dimensions[0] if dimensions else None,
+            image_height=dimensions[1] if dimensions else None,
             x=new_x,
             y=new_y,
             width=300,
@@ -218,7 +251,7 @@ class CanvasHandlers:
             whiteboard_id=self.view.whiteboard_id
         )
         await BoardService.save_node(new_node)
-        self.view.nodes.append(new_node)
+        self.view.board.add_node(new_node)
         
         if hasattr(self.view, 'upload_dialog'):
             self.view.upload_dialog.close()
@@ -277,11 +310,26 @@ class CanvasHandlers:
 
     async def on_card_grouped(self, e):
         card_id = e.args['cardId']
-        group_id = e.args['groupId']
-        card = next((n for n in self.view.nodes if n.id == card_id), None)
-        if card:
-            card.parent_id = group_id
+        card = self.view.board.get_node(card_id)
+        if not card:
+            return
+        # The drop target is resolved here from the spatial index (innermost group containing
+        # the whole card); the client's pick only decides whether its membership needs fixing
+        group = self.view.board.group_at(card.x, card.y, card.width, card.height)
+        group_id = group.id if group else None
+        if card.parent_id != group_id:
+            self.view.board.set_parent(card, group_id)
             await BoardService.save_node(card)
+        client_group_id = e.args.get('groupId')
+        if client_group_id != group_id:
+            await ui.run_javascript(f'''
+                if (window.groupManager) {{
+                    const previous = window.groupManager.groups.get({json.dumps(client_group_id)});
+                    if (previous) previous.members.delete({json.dumps(card_id)});
+                    const target = window.groupManager.groups.get({json.dumps(group_id)});
+                    if (target) target.members.add({json.dumps(card_id)});
+                }}
+            ''')
 
     async def on_create_group_with_cards(self, e):
         group_id = str(uuid.uuid4())
@@ -295,15 +343,16 @@ class CanvasHandlers:
             height=e.args['height'],
             color='#e2e8f0'
         )
-        await BoardService.save_node(group)
-        self.view.nodes.append(group)
-        
         card_ids = e.args['cardIds']
+        changed = [group]
         for card_id in card_ids:
-            card = next((n for n in self.view.nodes if n.id == card_id), None)
+            card = self.view.board.get_node(card_id)
             if card:
-                card.parent_id = group_id
-                await BoardService.save_node(card)
+                self.view.board.set_parent(card, group_id)
+                changed.append(card)
+        
+        await BoardService.save_nodes_bulk(changed)
+        self.view.board.add_node(group)
         
         ui.notify(f'Group created from {len(card_ids)} cards')
         
@@ -325,25 +374,24 @@ class CanvasHandlers:
 
     async def on_card_ungrouped(self, e):
         card_id = e.args['cardId']
-        card = next((n for n in self.view.nodes if n.id == card_id), None)
+        card = self.view.board.get_node(card_id)
         if card:
-            card.parent_id = None
+            self.view.board.set_parent(card, None)
             await BoardService.save_node(card)
             ui.notify(f'Card removed from group')
 
     async def on_group_resized(self, e):
         group_id = e.args['id']
-        group = next((n for n in self.view.nodes if n.id == group_id), None)
+        group = self.view.board.get_node(group_id)
         if group:
-            group.width = e.args['width']
-            group.height = e.args['height']
-            await BoardService.save_node(group)
+            self.view.board.resize_node(group, e.args['width'], e.args['height'])
+            self.view.write_buffer.queue_node(group)
             ui.notify(f'Group resized')
 
     async def on_toggle_group_collapse(self, e):
         group_id = e.args['groupId']
         collapsed = e.args['collapsed']
-        group = next((n for n in self.view.nodes if n.id == group_id), None)
+        group = self.view.board.get_node(group_id)
         if group:
             group.collapsed = collapsed
             await BoardService.save_node(group)
@@ -353,7 +401,7 @@ class CanvasHandlers:
         current_text = e.args['text']
         
         async def save_rename(new_name):
-            node = next((n for n in self.view.nodes if n.id == group_id), None)
+            node = self.view.board.get_node(group_id)
             if node:
                 node.text = new_name
                 await BoardService.save_node(node)
@@ -385,8 +433,7 @@ class CanvasHandlers:
 
     async def on_restore_node(self, e):
         node_data = e.args['nodeData']
-        existing = next((n for n in self.view.nodes if n.id == node_data['id']), None)
-        if existing: return
+        if self.view.board.has_node(node_data['id']): return
         
         restored_node = CanvasNode(
             id=node_data['id'],
@@ -404,12 +451,12 @@ class CanvasHandlers:
             collapsed=node_data.get('collapsed', False)
         )
         await BoardService.save_node(restored_node)
-        self.view.nodes.append(restored_node)
+        self.view.board.add_node(restored_node)
+        self.view.apply_tag_changes(added=set(restored_node.tags or ()))
 
     async def on_restore_edge(self, e):
         edge_data = e.args['edgeData']
-        existing = next((ed for ed in self.view.edges if ed.id == edge_data['id']), None)
-        if existing: return
+        if self.view.board.has_edge(edge_data['id']): return
         
         restored_edge = CanvasEdge(
             id=edge_data['id'],
@@ -421,18 +468,19 @@ class CanvasHandlers:
             color=edge_data.get('color', '#64748b')
         )
         await BoardService.save_edge(restored_edge)
-        self.view.edges.append(restored_edge)
+        self.view.board.add_edge(restored_edge)
 
     async def on_create_sub_whiteboard(self, e):
         card_id = e.args['cardId']
-        card = next((n for n in self.view.nodes if n.id == card_id), None)
+        card = self.view.board.get_node(card_id)
         if not card or card.sub_whiteboard_id: return
             
         new_wb_id = str(uuid.uuid4())
         sub_wb = Whiteboard(
             id=new_wb_id,
             name=card.get_title(), 
-            parent_id=self.view.whiteboard_id
+            parent_id=self.view.whiteboard_id,
+            order=await BoardService.next_whiteboard_order(None)
         )
         await BoardService.save_whiteboard(sub_wb)
         
@@ -456,6 +504,7 @@ class CanvasHandlers:
 
     async def on_navigate_to_sub(self, e):
         wb_id = e.args['whiteboardId']
+        await self.view.write_buffer.close()
         ui.navigate.to(f'/?id={wb_id}')
             
     async def on_card_dblclick(self, e):
@@ -464,7 +513,7 @@ class CanvasHandlers:
         tags = e.args.get('tags', [])
         
         # Find node for color
-        node = next((n for n in self.view.nodes if n.id == node_id), None)
+        node = self.view.board.get_node(node_id)
         color = node.color if node else '#ffffff'
         
         # Trigger JS editor
@@ -477,21 +526,25 @@ class CanvasHandlers:
         new_nodes_data = data.get('nodes', [])
         new_edges_data = data.get('edges', [])
         
+        new_nodes = []
         for node_data in new_nodes_data:
             node_data['whiteboard_id'] = self.view.whiteboard_id
-            node = CanvasNode(**node_data)
-            await BoardService.save_node(node)
-            self.view.nodes.append(node)
+            new_nodes.append(CanvasNode(**node_data))
             
+        new_edges = []
         for edge_data in new_edges_data:
             edge_data['whiteboard_id'] = self.view.whiteboard_id
-            edge = CanvasEdge(**edge_data)
-            await BoardService.save_edge(edge)
-            self.view.edges.append(edge)
+            new_edges.append(CanvasEdge(**edge_data))
+        
+        await BoardService.insert_nodes_bulk(new_nodes)
+        await BoardService.insert_edges_bulk(new_edges)
+        self.view.board.add_nodes(new_nodes)
+        self.view.board.add_edges(new_edges)
+        self.view.apply_tag_changes(added=[t for n in new_nodes for t in set(n.tags or ())])
         
     async def on_toggle_export(self, e):
         card_id = e.args['cardId']
-        node = next((n for n in self.view.nodes if n.id == card_id), None)
+        node = self.view.board.get_node(card_id)
         if node:
             node.exclude_from_export = not node.exclude_from_export
             await BoardService.save_node(node)
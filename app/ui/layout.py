@@ -2,7 +2,7 @@ from nicegui import ui
 from app.ui.whiteboard_list import WhiteboardList
 from app.ui.whiteboard import WhiteboardView
 
-async def create_layout(whiteboard_id: str = None):
+async def create_layout(whiteboard_id: str = None, focus_node_id: str = None):
     # Sidebar
     from nicegui import app
     is_mini = app.storage.user.get('drawer_mini', True)
@@ -32,6 +32,6 @@ async def create_layout(whiteboard_id: str = None):
 
     # Main Content
     with ui.column().classes('w-full flex-grow p-0 m-0 overflow-hidden'):
-        view = WhiteboardView(whiteboard_id=whiteboard_id)
+        view = WhiteboardView(whiteboard_id=whiteboard_id, focus_node_id=focus_node_id)
         view.on_whiteboard_create = wb_list.refresh
         await view.render()
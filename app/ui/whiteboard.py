@@ -1,32 +1,58 @@
 from nicegui import ui
-from typing import List, Optional, Callable, Any
+from typing import List, Optional, Callable, Any, Dict, Iterable, Set, Tuple
 import json
+import math
+import os
 
 from app.models.canvas_node import CanvasNode
 from app.models.canvas_edge import CanvasEdge
 from app.models.whiteboard import Whiteboard
 from app.services.board_service import BoardService
+from app.services.library_service import LibraryService
+from app.services.tag_facet_service import TagFacetService
+from app.services.upload_service import UploadService
+from app.services.write_behind import WriteBehindBuffer
 from app.ui.components.board_toolbar import BoardToolbar
 from app.ui.components.board_search import BoardSearch
 from app.ui.handlers.canvas_handlers import CanvasHandlers
+from app.ui.board_state import BoardState
 
 class WhiteboardView:
     """Orchestrator for the Whiteboard UI"""
-    def __init__(self, whiteboard_id: Optional[str] = None):
+    # Boards larger than this only load the nodes around the viewport and stream the rest
+    LAZY_LOAD_THRESHOLD = int(os.getenv("LAZY_LOAD_THRESHOLD", "2000"))
+    TILE_SIZE = 2000.0        # World units per streamed tile
+    VIEWPORT_MARGIN = 1000.0  # World units loaded beyond the visible edges
+    DEFAULT_SCREEN = (1920.0, 1080.0)  # Assumed until the client reports its size
+    MIN_SCALE = 0.05          # Same clamp as the client's wheel zoom
+
+    def __init__(self, whiteboard_id: Optional[str] = None, focus_node_id: Optional[str] = None):
         self.whiteboard_id: Optional[str] = whiteboard_id
-        self.nodes: List[CanvasNode] = []
-        self.edges: List[CanvasEdge] = []
+        self.focus_node_id: Optional[str] = focus_node_id  # Card to center on when opening (search results)
+        self.board = BoardState()
+        self.lazy = False
+        self.loaded_tiles: Set[Tuple[int, int]] = set()
+        self.write_buffer = WriteBehindBuffer()
         self.current_wb: Optional[Whiteboard] = None
         self.on_whiteboard_create: Optional[Callable] = None
         
         # Initialize handlers and components
         self.handlers = CanvasHandlers(self)
         self.search_interface = None
+        self.client = None
         self.toolbar = None
         self.upload_dialog = None
     
-    async def export_linear_doc(self) -> None:
-        """Export current whiteboard as a linear HTML document"""
+    @property
+    def nodes(self) -> List[CanvasNode]:
+        return self.board.nodes
+
+    @property
+    def edges(self) -> List[CanvasEdge]:
+        return self.board.edges
+
+    async def export_linear_doc(self, format: str = 'html') -> None:
+        """Export current whiteboard as a linear HTML document (format='zip': images as separate files)"""
         try:
             if not self.current_wb:
                 await self.load_data() 
@@ -34,29 +60,14 @@ class WhiteboardView:
                 ui.notify("No whiteboard loaded", type='negative')
                 return
 
-            data = await BoardService.export_to_json_canvas(self.current_wb)
-            
-            # Filter out excluded nodes
-            all_nodes = data['nodes']
-            filtered_nodes = [n for n in all_nodes if not n.get('exclude_from_export', False)]
-            included_ids = {n['id'] for n in filtered_nodes}
-            
-            # Filter edges: both source and target must be included
-            all_edges = data['edges']
-            filtered_edges = [
-                e for e in all_edges 
-                if e['fromNode'] in included_ids and e['toNode'] in included_ids
-            ]
-            
-            if not filtered_nodes:
+            count = await BoardService.count_exportable_nodes(self.current_wb.id)
+            if not count:
                 ui.notify("No cards to export (all excluded or empty)", type='warning')
                 return
 
-            from app.utils.linear_export import NarrativeExporter
-            exporter = NarrativeExporter(filtered_nodes, filtered_edges)
-            html_content = exporter.generate_html(self.current_wb.name or "Whiteboard Export")
-            ui.download(html_content.encode('utf-8'), f"{self.current_wb.name}.html")
-            ui.notify(f"Exported {len(filtered_nodes)} cards", type='positive')
+            # Rendered and streamed by /api/whiteboards/{id}/export/linear, never held in memory
+            ui.download.from_url(f"/api/whiteboards/{self.current_wb.id}/export/linear?format={format}")
+            ui.notify(f"Exporting {count} cards", type='positive')
         except Exception as e:
             ui.notify(f"Export failed: {str(e)}", type='negative')
 
@@ -70,10 +81,24 @@ class WhiteboardView:
             self.current_wb = await BoardService.create_whiteboard("My First Whiteboard")
         
         self.whiteboard_id = self.current_wb.id
-        self.nodes = await BoardService.get_nodes(self.whiteboard_id)
-        self.edges = await BoardService.get_edges(self.whiteboard_id)
+        if self.focus_node_id:
+            await self._center_on_node(self.focus_node_id)
+        self.lazy = await BoardService.count_nodes(self.whiteboard_id) > self.LAZY_LOAD_THRESHOLD
         
-        if not self.nodes:
+        if self.lazy:
+            self.board = BoardState()
+            self.loaded_tiles = set()
+            nodes, edges = await self._fetch_viewport(self.current_wb.viewport or {})
+            self.board.add_nodes(nodes)
+            self.board.add_edges(edges)
+            return
+        
+        self.board = BoardState(
+            await BoardService.get_node_views(self.whiteboard_id),
+            await BoardService.get_edges(self.whiteboard_id)
+        )
+        
+        if not len(self.board):
             welcome_node = CanvasNode(
                 type="text",
                 text="# Welcome to Nomad Telescope\n\nDouble-click the canvas to add cards!",
@@ -81,8 +106,75 @@ class WhiteboardView:
                 whiteboard_id=self.whiteboard_id
             )
             await BoardService.save_node(welcome_node)
-            self.nodes.append(welcome_node)
+            self.board.add_node(welcome_node)
     
+    async def _center_on_node(self, node_id: str) -> None:
+        """Point the opening viewport at a card (not saved: the client reports it once shown)"""
+        node = await CanvasNode.find_one(CanvasNode.id == node_id, CanvasNode.whiteboard_id == self.whiteboard_id)
+        if not node:
+            self.focus_node_id = None
+            return
+        screen_w, screen_h = self.DEFAULT_SCREEN
+        self.current_wb.viewport = {
+            'x': screen_w / 2 - (node.x + node.width / 2),
+            'y': screen_h / 2 - (node.y + node.height / 2),
+            'scale': 1.0,
+        }
+
+    def apply_tag_changes(self, removed: Iterable[str] = (), added: Iterable[str] = ()) -> None:
+        """Tags taken off / put on cards of this board (one entry per card): facet and tag bar"""
+        removed, added = list(removed), list(added)
+        TagFacetService.apply(self.whiteboard_id, removed=removed, added=added)
+        if self.search_interface:
+            self.search_interface.apply_tag_changes(removed=removed, added=added)
+
+    async def load_viewport(self, viewport: Dict[str, float]) -> None:
+        """Stream nodes of tiles that just came into view to the client (lazy mode only)"""
+        if not self.lazy:
+            return
+        nodes, edges = await self._fetch_viewport(viewport)
+        if not nodes and not edges:
+            return
+        self.board.add_nodes(nodes)
+        self.board.add_edges(edges)
+        await ui.run_javascript(f'''
+            if (window.canvas) window.canvas.loadNodes({self.serialize_nodes(nodes)}, {self.serialize_edges(edges)});
+        ''')
+
+    async def _fetch_viewport(self, viewport: Dict[str, float]):
+        """Query the not-yet-loaded tiles covering the viewport plus margin"""
+        scale = max(viewport.get('scale') or 1.0, self.MIN_SCALE)
+        screen_w = viewport.get('width') or self.DEFAULT_SCREEN[0]
+        screen_h = viewport.get('height') or self.DEFAULT_SCREEN[1]
+        left = -viewport.get('x', 0.0) / scale - self.VIEWPORT_MARGIN
+        top = -viewport.get('y', 0.0) / scale - self.VIEWPORT_MARGIN
+        right = left + screen_w / scale + 2 * self.VIEWPORT_MARGIN
+        bottom = top + screen_h / scale + 2 * self.VIEWPORT_MARGIN
+        
+        tx1, tx2 = math.floor(left / self.TILE_SIZE), math.floor(right / self.TILE_SIZE)
+        ty1, ty2 = math.floor(top / self.TILE_SIZE), math.floor(bottom / self.TILE_SIZE)
+        missing = {
+            (tx, ty) for tx in range(tx1, tx2 + 1) for ty in range(ty1, ty2 + 1)
+        } - self.loaded_tiles
+        if not missing:
+            return [], []
+        
+        # One query for the bounding box of the missing tiles; already loaded ids are skipped
+        mx1 = min(t[0] for t in missing)
+        mx2 = max(t[0] for t in missing) + 1
+        my1 = min(t[1] for t in missing)
+        my2 = max(t[1] for t in missing) + 1
+        nodes, edges = await BoardService.get_region(
+            self.whiteboard_id,
+            mx1 * self.TILE_SIZE, my1 * self.TILE_SIZE,
+            (mx2 - mx1) * self.TILE_SIZE, (my2 - my1) * self.TILE_SIZE,
+            self.board.node_ids(), self.board.edge_ids()
+        )
+        self.loaded_tiles.update(
+            (tx, ty) for tx in range(mx1, mx2) for ty in range(my1, my2)
+        )
+        return nodes, edges
+
     async def render(self):
         """Render the Konva-based infinite canvas"""
         await self.load_data()
@@ -96,9 +188,15 @@ class WhiteboardView:
         self._add_scripts()
         self._init_canvas_js()
         self._setup_events()
+        # Pending moves/resizes/viewport must not be lost when the tab closes or navigates away
+        ui.context.client.on_disconnect(self.write_buffer.close)
+        # Library card edits made anywhere are patched into this session's projections
+        self.client = ui.context.client
+        LibraryService.subscribe(self.whiteboard_id, self.on_library_card_changed)
+        self.client.on_disconnect(lambda: LibraryService.unsubscribe(self.whiteboard_id, self.on_library_card_changed))
         
         # Components
-        self.search_interface = BoardSearch(self.nodes)
+        self.search_interface = BoardSearch(await TagFacetService.board_tags(self.whiteboard_id))
         self.search_interface.render()
         self.render_breadcrumbs()
         await self._render_toolbar_and_dialogs()
@@ -129,32 +227,10 @@ class WhiteboardView:
                 emitEvent('show_toast_backend', {{ message, type, color: colors[type] || colors.info }});
             }};
             
-            const nodes = {self.serialize_nodes()};
-            nodes.forEach(node => {{
-                if (node.type === 'text' || node.type === 'file') {{
-                    const card = canvas.addCard(node);
-                    window.cardResizer.addResizeHandles(card, node);
-                    window.connectionManager.addAnchors(card, node);
-                }} else if (node.type === 'group') {{
-                    const groupKonva = canvas.addGroup(node);
-                    window.groupManager.registerGroup(groupKonva, node);
-                    window.cardResizer.addGroupResizeHandles(groupKonva, node);
-                }}
-            }});
-            
-            nodes.forEach(node => {{
-                if ((node.type === 'text' || node.type === 'file') && node.parent_id) {{
-                    const groupInfo = window.groupManager.groups.get(node.parent_id);
-                    if (groupInfo) groupInfo.members.add(node.id);
-                }}
-            }});
-            
-            const edges = {self.serialize_edges()};
-            edges.forEach(edge => {{
-                const fromNode = nodes.find(n => n.id === edge.fromNode);
-                const toNode = nodes.find(n => n.id === edge.toNode);
-                if (fromNode && toNode) canvas.addEdge(edge, fromNode, toNode);
-            }});
+            canvas.setViewport({json.dumps(self.current_wb.viewport or {})});
+            canvas.loadNodes({self.serialize_nodes()}, {self.serialize_edges()});
+            {f"canvas.focusNode({json.dumps(self.focus_node_id)});" if self.focus_node_id else ""}
+            {"canvas.updateViewport(); // report the real screen size so missing tiles stream in" if self.lazy else ""}
             
             canvas.stage.on('dblclick', (e) => {{
                 if (e.target === canvas.stage) {{
@@ -201,7 +277,13 @@ class WhiteboardView:
         with ui.dialog() as self.upload_dialog:
             with ui.card().classes('w-[500px] p-6'):
                 ui.label('Add Image or File').classes('text-xl font-bold mb-4')
-                ui.upload(on_upload=self.handlers.handle_upload, auto_upload=True)
+                ui.upload(
+                    on_upload=self.handlers.handle_upload, auto_upload=True,
+                    max_file_size=UploadService.MAX_UPLOAD_BYTES,
+                    on_rejected=lambda: ui.notify(
+                        f"File is larger than {UploadService.MAX_UPLOAD_BYTES // (1024 * 1024)} MB", type='warning'
+                    )
+                )
                 with ui.row().classes('w-full justify-end mt-4'):
                     ui.button('Cancel', on_click=self.upload_dialog.close).props('flat')
         
@@ -254,10 +336,33 @@ class WhiteboardView:
         return json.dumps({
             'id': node.id, 'type': node.type, 'x': node.x, 'y': node.y, 'width': node.width, 'height': node.height,
             'text': node.text, 'file': node.file, 'color': node.color, 'parent_id': node.parent_id,
-            'sub_whiteboard_id': node.sub_whiteboard_id, 'tags': node.tags if hasattr(node, 'tags') else []
+            'sub_whiteboard_id': node.sub_whiteboard_id, 'tags': node.tags if hasattr(node, 'tags') else [],
+            'title': node.get_title(), 'preview': node.get_preview(),
+            'image_width': node.image_width, 'image_height': node.image_height
         })
     
-    def serialize_nodes(self):
+    async def on_library_card_changed(self, card_id: str, fields: Dict[str, Any]) -> None:
+        """A library card was edited: update its projections on this board in place"""
+        for node in [n for n in self.nodes if getattr(n, 'library_card_id', None) == card_id]:
+            old_tags = list(node.tags or [])
+            for name, value in fields.items():
+                setattr(node, name, value)
+            # The shared facet was updated by LibraryService; only this tag bar follows
+            if self.search_interface:
+                self.search_interface.update_node_tags(old_tags, node.tags)
+            with self.client:
+                await self.patch_node(node, ['text', 'tags'])
+
+    async def patch_node(self, node, fields: Iterable[str]) -> None:
+        """Send only the changed fields of a node; the client updates the card in place"""
+        changes = {name: getattr(node, name) for name in fields}
+        if 'text' in changes:
+            changes['title'], changes['preview'] = node.get_title(), node.get_preview()
+        await ui.run_javascript(
+            f'if (window.canvas) window.canvas.patchNode({json.dumps(node.id)}, {json.dumps(changes)});'
+        )
+    
+    def serialize_nodes(self, nodes: Optional[List[CanvasNode]] = None):
         return json.dumps([
             {
                 'id': n.id, 'type': n.type, 'x': n.x, 'y': n.y, 'width': n.width, 'height': n.height,
@@ -265,9 +370,13 @@ class WhiteboardView:
                 'collapsed': n.collapsed if hasattr(n, 'collapsed') else False,
                 'sub_whiteboard_id': n.sub_whiteboard_id, 'tags': n.tags if hasattr(n, 'tags') else [],
                 'exclude_from_export': n.exclude_from_export if hasattr(n, 'exclude_from_export') else False,
-                'title': n.get_title(), 'preview': n.get_preview()
-            } for n in self.nodes
+                'title': n.get_title(), 'preview': n.get_preview(),
+                'image_width': n.image_width, 'image_height': n.image_height
+            } for n in (self.nodes if nodes is None else nodes)
         ])
     
-    def serialize_edges(self):
-        return json.dumps([{'id': e.id, 'fromNode': e.fromNode, 'toNode': e.toNode, 'color': e.color} for e in self.edges])
+    def serialize_edges(self, edges: Optional[List[CanvasEdge]] = None):
+        return json.dumps([
+            {'id': e.id, 'fromNode': e.fromNode, 'toNode': e.toNode, 'color': e.color}
+            for e in (self.edges if edges is None else edges)
+        ])
@@ -1,82 +1,93 @@
 from nicegui import ui
-import os
-from app.models.whiteboard import Whiteboard
+from app.models.whiteboard import Whiteboard, WhiteboardEntry
 from app.models.folder import Folder
-from typing import List, Optional, Dict
+from beanie.operators import NotIn
+from app.services.board_service import BoardService
+from app.services.cascade_service import CascadeService
+from app.services.search_service import SearchService
+from app.services.tag_facet_service import TagFacetService
+from app.utils import rank
+from typing import Any, List, Optional, Dict, Tuple
 import asyncio
+import os
+import tempfile
 
 class WhiteboardList:
+    """
+    Sidebar tree of folders and whiteboards.
+
+    Rendered from a keyed model (container -> ordered entries, container = folder id or
+    None for the root list) and updated row by row: create, rename, delete and drag and
+    drop only insert, update, move or remove the affected rows. refresh() reconciles the
+    model with the database the same way. A folder's boards are fetched the first time it
+    is opened, and long lists render PAGE_SIZE rows at a time, more as they scroll into view.
+    """
+    PAGE_SIZE = 100
+    SORTABLE_JS = 'https://cdnjs.cloudflare.com/ajax/libs/Sortable/1.15.2/Sortable.min.js'
+
     def __init__(self):
         self.container = None
-        self.folders: List[Folder] = []
-        self.whiteboards: List[Whiteboard] = []
+        self.folders: Dict[str, Folder] = {}  # In display order
+        self.entries: Dict[Optional[str], List[WhiteboardEntry]] = {}  # Loaded containers only
+        self._folder_column = None
+        self._folder_rows: Dict[str, Dict[str, Any]] = {}
+        self._lists: Dict[Optional[str], ui.element] = {}  # Rendered sortable containers
+        self._rows: Dict[str, ui.row] = {}
+        self._labels: Dict[str, ui.label] = {}
+        self._shown: Dict[Optional[str], int] = {}  # Rendered rows per container (a prefix)
+        self._more: Dict[Optional[str], ui.element] = {}
+
+    # Keys
+    @staticmethod
+    def container_dom_id(folder_id: Optional[str]) -> str:
+        return f"sortable-{folder_id or 'root'}"
+
+    @staticmethod
+    def parse_container_id(dom_id: str) -> Tuple[bool, Optional[str]]:
+        """(valid, folder id) of a sortable container's DOM id"""
+        if not dom_id.startswith("sortable-"):
+            return False, None
+        fid_part = dom_id[len("sortable-"):]
+        return True, None if fid_part == "root" else fid_part
+
+    def locate(self, wb_id: str) -> Tuple[Optional[str], int]:
+        """(container, index) of a loaded whiteboard entry; index -1 if not loaded"""
+        for key, entries in self.entries.items():
+            for index, entry in enumerate(entries):
+                if entry.id == wb_id:
+                    return key, index
+        return None, -1
+
+    # Data
+    async def _fetch_entries(self, folder_id: Optional[str]) -> List[WhiteboardEntry]:
+        if folder_id is None:
+            # Root list: no folder, or a folder that no longer exists
+            query = Whiteboard.find(NotIn(Whiteboard.folder_id, list(self.folders)))
+        else:
+            query = Whiteboard.find(Whiteboard.folder_id == folder_id)
+        return await query.sort(+Whiteboard.order).project(WhiteboardEntry).to_list()
+
+    async def _fetch_folders(self) -> Dict[str, Folder]:
+        return {f.id: f for f in await Folder.find_all().sort(+Folder.order).to_list()}
 
+    # Rendering
     async def render(self):
+        # SortableJS is loaded once per page; each list initializes its own instance once
+        ui.add_head_html(f'<script src="{self.SORTABLE_JS}"></script>')
         self.container = ui.column().classes('w-full gap-0')
-        await self.refresh()
-
-    async def refresh(self):
-        self.container.clear()
-        
-        # Fetch data
-        self.folders = await Folder.find_all().sort(+Folder.order).to_list()
-        self.whiteboards = await Whiteboard.find_all().sort(+Whiteboard.order).to_list()
-        
-        # Group whiteboards
-        wb_by_folder: Dict[Optional[str], List[Whiteboard]] = {f.id: [] for f in self.folders}
-        wb_by_folder[None] = []
-        
-        for wb in self.whiteboards:
-            if wb.folder_id in wb_by_folder:
-                wb_by_folder[wb.folder_id].append(wb)
-            else:
-                # Fallback for orphaned whiteboards or if folder deleted
-                wb_by_folder[None].append(wb)
+        self.folders = await self._fetch_folders()
+        self.entries = {None: await self._fetch_entries(None)}
 
         with self.container:
-            # 1. Folders Section
-            # We use a sortable list for folders themselves? User said "rearrange witeboards", but usually folders too.
-            # For simplicity, render folders first, then root whiteboards.
-            
-            for folder in self.folders:
-                # We wrap in a row to potentially allowing sorting of folders themselves later, 
-                # or just to provide a clean container for the row context.
-                with ui.row().classes('w-full items-center group no-wrap flex-nowrap pl-2 pr-2 py-0 hover:bg-slate-200 transition-colors') as folder_row:
-                    folder_row.props(f'data-folder-id="{folder.id}"')
-                    
-                    # Folder Expansion
-                    with ui.expansion('', icon='folder').classes('w-full text-sm text-slate-700').props('header-class="p-0 min-h-8 w-full group/exp" hide-expand-icon') as expansion:
-                        # Custom header with slot
-                        with expansion.add_slot('header'):
-                            with ui.row().classes('w-full items-center no-wrap flex-nowrap cursor-pointer gap-2'):
-                                # Icon
-                                ui.icon('folder', size='xs').classes('text-slate-500 flex-shrink-0')
-                                # Label (Double click to rename)
-                                lbl = ui.label(folder.name).classes('text-body2 text-slate-700 truncate flex-grow select-none')
-                                # Prevent toggle when clicking name
-                                lbl.on('click.stop', lambda: None)
-                                lbl.on('dblclick.stop', lambda _, f=folder: self.rename_folder_dialog(f))
-                                
-                                # Edit Button (Right aligned, always visible but subtle)
-                                with ui.button(icon='more_vert').props('flat round dense size=sm').classes('text-slate-300 hover:text-slate-700 transition-colors flex-shrink-0') as edit_btn:
-                                    edit_btn.on('click.stop', lambda: None)
-                                    with ui.menu():
-                                        ui.menu_item('Rename', on_click=lambda f=folder: self.rename_folder_dialog(f))
-                                        ui.menu_item('Delete', on_click=lambda f=folder: self.delete_folder(f), auto_close=True).classes('text-red')
-
-                                # Expand icon (chevron) - Always visible
-                                ui.icon('expand_more').classes('text-slate-400 transition-transform duration-200 flex-shrink-0')
-
-                        # Content (Whiteboards in folder)
-                        with ui.element('div').classes('w-full pl-4') as drop_zone:
-                             await self.render_sortable_whiteboards(wb_by_folder[folder.id], folder_id=folder.id)
-
-            # 2. Root Whiteboards Section
-            await self.render_sortable_whiteboards(wb_by_folder[None], folder_id=None)
+            self._folder_column = ui.column().classes('w-full gap-0')
+            with self._folder_column:
+                for folder in self.folders.values():
+                    self._render_folder(folder)
+
+            self._render_list(None)
 
             ui.separator().classes('my-2')
             
-            # Action Buttons
             # Action Buttons
             with ui.row().classes('w-full px-2 gap-2'):
                 ui.button(on_click=self.create_whiteboard, icon='note_add').props('flat round dense size=sm').tooltip('New Whiteboard')
@@ -84,50 +95,76 @@ class WhiteboardList:
 
             self.render_data_actions()
 
-    async def render_sortable_whiteboards(self, whiteboards: List[Whiteboard], folder_id: Optional[str]):
-        # Manual SortableJS implementation
-        # 1. Ensure SortableJS is loaded (idempotent)
-        ui.add_head_html('<script src="https://cdnjs.cloudflare.com/ajax/libs/Sortable/1.15.2/Sortable.min.js"></script>')
-        
-        fid_str = str(folder_id) if folder_id else "root"
-        container_id = f"sortable-{fid_str}"
-        
-        # Container for the sortable list
-        # We give it a unique ID for JS to find
-        with ui.element('div').classes('w-full min-h-8 p-1 space-y-1').props(f'id="{container_id}"') as container:
-            for wb in whiteboards:
-                with ui.row().classes('w-full items-center group/wb no-wrap flex-nowrap py-1 px-2 cursor-pointer hover:bg-slate-200 transition-colors rounded relative-position draggable-item') as row:
-                    # We store the ID in the DOM for JS retrieval
-                    row.props(f'data-id="{wb.id}"')
-                    
-                    with ui.link(target=f'/?id={wb.id}').classes('flex-grow no-underline text-slate-700 hover:text-blue-600 overflow-hidden flex flex-row items-center flex-nowrap gap-2'):
-                         ui.icon('dashboard', size='xs').classes('flex-shrink-0 text-slate-400')
-                         ui.label(wb.name or "Untitled").classes('truncate text-sm select-none flex-grow min-w-0 whitespace-nowrap')
-
-                    # Delete button (visible on hover)
-                    # Use click.stop to prevent triggering row click if we add one later
-                    ui.button(icon='close', on_click=lambda w=wb: self.delete_wb(w)).props('flat round dense size=xs color=red').classes('opacity-0 group-hover/wb:opacity-100 transition-opacity flex-shrink-0').on('click', lambda: None)
-
-        # Initialize SortableJS for this container
-        
-        init_script = f'''
+    def _render_folder(self, folder: Folder):
+        with ui.row().classes('w-full items-center group no-wrap flex-nowrap pl-2 pr-2 py-0 hover:bg-slate-200 transition-colors') as folder_row:
+            folder_row.props(f'data-folder-id="{folder.id}"')
+            
+            # Folder Expansion
+            with ui.expansion('', icon='folder').classes('w-full text-sm text-slate-700').props('header-class="p-0 min-h-8 w-full group/exp" hide-expand-icon') as expansion:
+                # Custom header with slot
+                with expansion.add_slot('header'):
+                    with ui.row().classes('w-full items-center no-wrap flex-nowrap cursor-pointer gap-2'):
+                        # Icon
+                        ui.icon('folder', size='xs').classes('text-slate-500 flex-shrink-0')
+                        # Label (Double click to rename)
+                        lbl = ui.label(folder.name).classes('text-body2 text-slate-700 truncate flex-grow select-none')
+                        # Prevent toggle when clicking name
+                        lbl.on('click.stop', lambda: None)
+                        lbl.on('dblclick.stop', lambda _, f=folder: self.rename_folder_dialog(f))
+                        
+                        # Edit Button (Right aligned, always visible but subtle)
+                        with ui.button(icon='more_vert').props('flat round dense size=sm').classes('text-slate-300 hover:text-slate-700 transition-colors flex-shrink-0') as edit_btn:
+                            edit_btn.on('click.stop', lambda: None)
+                            with ui.menu():
+                                ui.menu_item('Rename', on_click=lambda f=folder: self.rename_folder_dialog(f))
+                                ui.menu_item('Delete', on_click=lambda f=folder: self.delete_folder(f), auto_close=True).classes('text-red')
+
+                        # Expand icon (chevron) - Always visible
+                        ui.icon('expand_more').classes('text-slate-400 transition-transform duration-200 flex-shrink-0')
+
+                # Content (Whiteboards in folder), loaded when first opened
+                drop_zone = ui.element('div').classes('w-full pl-4')
+
+        expansion.on_value_change(lambda e, f=folder: self._on_folder_toggle(f, e.value))
+        self._folder_rows[folder.id] = {'row': folder_row, 'label': lbl, 'body': drop_zone}
+
+    async def _on_folder_toggle(self, folder: Folder, opened: bool):
+        if not opened or folder.id in self._lists or folder.id not in self._folder_rows:
+            return
+        self.entries[folder.id] = await self._fetch_entries(folder.id)
+        with self._folder_rows[folder.id]['body']:
+            self._render_list(folder.id)
+
+    def _render_list(self, folder_id: Optional[str]):
+        """Sortable container of a folder (or the root) with its first page of rows"""
+        container_id = self.container_dom_id(folder_id)
+        container = ui.element('div').classes('w-full min-h-8 p-1 space-y-1').props(f'id="{container_id}"')
+        self._lists[folder_id] = container
+        self._shown[folder_id] = 0
+        more = ui.label().classes('w-full text-xs text-slate-500 px-2 py-1 cursor-pointer hover:text-blue-600') \
+            .props(f'id="{container_id}-more"')
+        more.on('click', lambda _, k=folder_id: self._show_more(k))
+        more.on('reveal', lambda _, k=folder_id: self._show_more(k))
+        self._more[folder_id] = more
+        self._show_more(folder_id)
+
+        # Rows are moved by the server (see handle_manual_drag_end): SortableJS only reports
+        # the drop and puts the DOM back, so the client never disagrees with the element tree.
+        ui.run_javascript(f"""
             if (typeof Sortable !== 'undefined') {{
                 const el = document.getElementById('{container_id}');
-                if (el) {{
-                    new Sortable(el, {{
+                if (el && !el._sortable) {{
+                    el._sortable = new Sortable(el, {{
                         group: 'whiteboards',
                         animation: 150,
                         ghostClass: 'opacity-50', 
                         onEnd: function (evt) {{
-                            const itemId = evt.item.getAttribute('data-id');
-                            const targetIdStr = evt.to.id; 
-                            
-                            // Dispatch a standard DOM CustomEvent. 
-                            // NiceGUI's ui.on() can listen to this if we specify the 'detail' argument.
+                            if (evt.from === evt.to && evt.oldIndex === evt.newIndex) return;
+                            evt.from.insertBefore(evt.item, evt.from.children[evt.oldIndex] || null);
                             el.dispatchEvent(new CustomEvent('drag_end', {{
                                 detail: {{
-                                    item_id: itemId,
-                                    to_container_id: targetIdStr,
+                                    item_id: evt.item.getAttribute('data-id'),
+                                    to_container_id: evt.to.id,
                                     new_index: evt.newIndex
                                 }},
                                 bubbles: true,
@@ -135,106 +172,257 @@ class WhiteboardList:
                         }}
                     }});
                 }}
+                const more = document.getElementById('{container_id}-more');
+                if (more && !more._observer) {{
+                    more._observer = new IntersectionObserver(entries => {{
+                        if (entries.some(e => e.isIntersecting) && more.offsetParent !== null) {{
+                            more.dispatchEvent(new CustomEvent('reveal'));
+                        }}
+                    }});
+                    more._observer.observe(more);
+                }}
             }}
-        '''
-        ui.run_javascript(init_script)
+        """)
         
-        # Attach the event listener to this specific container
         # We specify ['detail'] to tell NiceGUI to extract the 'detail' property from the event object
         container.on('drag_end', self.handle_manual_drag_end, ['detail'])
 
+    def _show_more(self, folder_id: Optional[str]):
+        """Render the next page of rows of a list"""
+        entries = self.entries.get(folder_id, [])
+        shown = self._shown.get(folder_id, 0)
+        with self._lists[folder_id]:
+            for entry in entries[shown:shown + self.PAGE_SIZE]:
+                self._make_row(entry)
+        self._shown[folder_id] = min(shown + self.PAGE_SIZE, len(entries))
+        self._update_more(folder_id)
+
+    def _update_more(self, folder_id: Optional[str]):
+        more = self._more.get(folder_id)
+        if more is None:
+            return
+        hidden = len(self.entries.get(folder_id, [])) - self._shown[folder_id]
+        more.set_text(f'Show {min(hidden, self.PAGE_SIZE)} more of {hidden}')
+        more.set_visibility(hidden > 0)
+
+    def _make_row(self, entry: WhiteboardEntry) -> ui.row:
+        with ui.row().classes('w-full items-center group/wb no-wrap flex-nowrap py-1 px-2 cursor-pointer hover:bg-slate-200 transition-colors rounded relative-position draggable-item') as row:
+            # We store the ID in the DOM for JS retrieval
+            row.props(f'data-id="{entry.id}"')
+            
+            with ui.link(target=f'/?id={entry.id}').classes('flex-grow no-underline text-slate-700 hover:text-blue-600 overflow-hidden flex flex-row items-center flex-nowrap gap-2'):
+                 ui.icon('dashboard', size='xs').classes('flex-shrink-0 text-slate-400')
+                 label = ui.label(entry.name or "Untitled").classes('truncate text-sm select-none flex-grow min-w-0 whitespace-nowrap')
+
+            # Delete button (visible on hover)
+            ui.button(icon='close', on_click=lambda w=entry: self.delete_wb(w)).props('flat round dense size=xs color=red').classes('opacity-0 group-hover/wb:opacity-100 transition-opacity flex-shrink-0').on('click', lambda: None)
+        self._rows[entry.id] = row
+        self._labels[entry.id] = label
+        return row
+
+    # Row-level model updates
+    def _drop_row(self, wb_id: str):
+        row = self._rows.pop(wb_id, None)
+        self._labels.pop(wb_id, None)
+        if row is not None:
+            row.delete()
+
+    def insert_entry(self, folder_id: Optional[str], entry: WhiteboardEntry, index: Optional[int] = None):
+        """Add a whiteboard to a loaded container (its row only if it falls in the rendered part)"""
+        if folder_id not in self.entries:
+            return  # Not loaded yet: fetched with the rest when the folder is opened
+        entries = self.entries[folder_id]
+        index = len(entries) if index is None else max(0, min(index, len(entries)))
+        entries.insert(index, entry)
+        if folder_id not in self._lists:
+            return
+        if index <= self._shown[folder_id]:
+            row = self._rows.get(entry.id)
+            if row is None:
+                with self._lists[folder_id]:
+                    row = self._make_row(entry)
+            row.move(target_container=self._lists[folder_id], target_index=index)
+            self._shown[folder_id] += 1
+        else:
+            self._drop_row(entry.id)
+        self._update_more(folder_id)
+
+    def remove_entry(self, wb_id: str, keep_row: bool = False) -> Optional[WhiteboardEntry]:
+        folder_id, index = self.locate(wb_id)
+        if index < 0:
+            return None
+        entry = self.entries[folder_id].pop(index)
+        if folder_id in self._lists and index < self._shown[folder_id]:
+            self._shown[folder_id] -= 1
+            self._update_more(folder_id)
+        if not keep_row:
+            self._drop_row(wb_id)
+        return entry
+
+    def rename_entry(self, wb_id: str, name: str):
+        folder_id, index = self.locate(wb_id)
+        if index >= 0:
+            self.entries[folder_id][index].name = name
+        if wb_id in self._labels:
+            self._labels[wb_id].set_text(name or "Untitled")
+
+    async def refresh(self):
+        """Reconcile the sidebar with the database, touching only rows that changed"""
+        folders = await self._fetch_folders()
+        for folder_id in [f for f in self.folders if f not in folders]:
+            self._remove_folder_row(folder_id)
+        for index, folder in enumerate(folders.values()):
+            parts = self._folder_rows.get(folder.id)
+            if parts is None:
+                with self._folder_column:
+                    self._render_folder(folder)
+                parts = self._folder_rows[folder.id]
+            elif parts['label'].text != folder.name:
+                parts['label'].set_text(folder.name)
+            if self._folder_column.default_slot.children.index(parts['row']) != index:
+                parts['row'].move(target_index=index)
+        self.folders = folders
+
+        for folder_id in list(self.entries):
+            if folder_id is not None and folder_id not in self.folders:
+                continue
+            fresh = await self._fetch_entries(folder_id)
+            if folder_id not in self._lists:
+                self.entries[folder_id] = fresh
+                continue
+            self._reconcile_list(folder_id, fresh)
+
+    def _reconcile_list(self, folder_id: Optional[str], fresh: List[WhiteboardEntry]):
+        container = self._lists[folder_id]
+        fresh_ids = {e.id for e in fresh}
+        for entry in self.entries.get(folder_id, []):
+            row = self._rows.get(entry.id)
+            if entry.id not in fresh_ids and row is not None and row.parent_slot.parent is container:
+                self._drop_row(entry.id)
+
+        self.entries[folder_id] = fresh
+        shown = min(max(self._shown[folder_id], self.PAGE_SIZE), len(fresh))
+        for index, entry in enumerate(fresh[:shown]):
+            row = self._rows.get(entry.id)
+            if row is None:
+                with container:
+                    row = self._make_row(entry)
+            elif self._labels[entry.id].text != (entry.name or "Untitled"):
+                self._labels[entry.id].set_text(entry.name or "Untitled")
+            children = container.default_slot.children
+            if row.parent_slot.parent is not container or children.index(row) != index:
+                row.move(target_container=container, target_index=index)
+        # Rows past the rendered prefix (e.g. pushed down by inserts)
+        for entry in fresh[shown:]:
+            row = self._rows.get(entry.id)
+            if row is not None and row.parent_slot.parent is container:
+                self._drop_row(entry.id)
+        self._shown[folder_id] = shown
+        self._update_more(folder_id)
+
+    def _remove_folder_row(self, folder_id: str):
+        parts = self._folder_rows.pop(folder_id, None)
+        for entry in self.entries.pop(folder_id, []):
+            self._rows.pop(entry.id, None)
+            self._labels.pop(entry.id, None)
+        self._lists.pop(folder_id, None)
+        self._shown.pop(folder_id, None)
+        self._more.pop(folder_id, None)
+        if parts is not None:
+            parts['row'].delete()
+
     async def handle_manual_drag_end(self, e):
         # e.args: { detail: { item_id, to_container_id, new_index } }
-        print(f"DEBUG: Drag End Event Received: {e.args}")
         data = e.args['detail']
         wb_id = data['item_id']
-        to_container = data['to_container_id']
-        new_index = data['new_index']
-        
-        # Parse folder ID from container ID "sortable-{fid}"
-        target_folder_id = None
-        if to_container.startswith("sortable-"):
-            fid_part = to_container[len("sortable-"):]
-            target_folder_id = None if fid_part == "root" else fid_part
-        else:
-            print(f"ERROR: Unknown container ID format: {to_container}")
+        valid, target_folder_id = self.parse_container_id(data['to_container_id'])
+        if not valid or target_folder_id not in self._lists:
+            print(f"ERROR: Unknown container ID format: {data['to_container_id']}")
             return
 
-        print(f"DEBUG: Parsed Target Folder ID: {target_folder_id} (type: {type(target_folder_id)})")
-
-        # 1. Update WB
-        wb = await Whiteboard.get(wb_id)
-        if not wb: 
-            print(f"ERROR: Whiteboard not found in DB: {wb_id}")
+        entry = self.remove_entry(wb_id, keep_row=True)
+        if entry is None:
             return
-        
-        print(f"DEBUG: Moving Whiteboard '{wb.name}' (ID: {wb.id}) from Folder '{wb.folder_id}' to Folder '{target_folder_id}' at index {new_index}")
+        # Within the rendered rows, which is where a drop can land
+        targets = self.entries[target_folder_id]
+        new_index = max(0, min(data['new_index'], self._shown[target_folder_id], len(targets)))
+        entry.folder_id = target_folder_id
+        self.insert_entry(target_folder_id, entry, new_index)
 
-        # Update folder_id
-        wb.folder_id = target_folder_id
-        await wb.save() # Save immediately to test basic update
-        print(f"DEBUG: Saved WB {wb.id} with new folder_id: {wb.folder_id}")
-
-        # 2. Reorder logic
-        # We need to re-fetch items in the target folder to get the current list
-        target_folder_id_val = target_folder_id 
-        
-        items_in_target = await Whiteboard.find(Whiteboard.folder_id == target_folder_id_val).sort(+Whiteboard.order).to_list()
-        print(f"DEBUG: Items in target folder BEFORE reorder (count: {len(items_in_target)}): {[w.name for w in items_in_target]}")
-        
-        # Filter out the moved wb if it was already in this folder (reorder case)
-        # We need to filter by ID string comparison to be safe
-        items_in_target = [w for w in items_in_target if str(w.id) != str(wb.id)]
-        
-        # Insert at new position
-        if new_index < 0: new_index = 0
-        if new_index > len(items_in_target): new_index = len(items_in_target)
-        
-        items_in_target.insert(new_index, wb)
-        print(f"DEBUG: Items in target folder AFTER insert (count: {len(items_in_target)}): {[w.name for w in items_in_target]}")
-        
-        # Save all with new order
-        for idx, w in enumerate(items_in_target):
-            w.order = idx
-            w.folder_id = target_folder_id_val
-            await w.save()
-            # print(f"DEBUG: Updated order for {w.name} to {idx}")
-            
-        print("DEBUG: All items saved with new order.")
+        # A rank key between the new neighbours: only the moved board is written
+        before = targets[new_index - 1].order if new_index > 0 else None
+        after = targets[new_index + 1].order if new_index + 1 < len(targets) else None
+        try:
+            order = rank.key_between(before, after)
+        except ValueError:
+            order = None  # Neighbours share a key (e.g. boards created with the default key)
+        if order is not None and not rank.needs_rebalance(order) \
+                and not await BoardService.has_numeric_orders(target_folder_id):
+            entry.order = order
+            await BoardService.move_whiteboard(entry.id, target_folder_id, order)
+        else:
+            # No room left between the neighbours, or integer orders not migrated yet (which
+            # Mongo sorts before any key): re-space the whole list in its new order
+            await BoardService.move_whiteboard(entry.id, target_folder_id, entry.order)
+            keys = await BoardService.rebalance_whiteboards(target_folder_id, [w.id for w in targets])
+            for w in targets:
+                w.order = keys[w.id]
         ui.notify('Order updated')
-        
-        # Refresh to sync UI state and ensure IDs are clean
-        await self.refresh() 
 
     # Button Actions
     async def create_whiteboard(self):
-        new_wb = Whiteboard(name="New Whiteboard", order=9999) # Put at end
+        new_wb = Whiteboard(name="New Whiteboard", order=await BoardService.next_whiteboard_order(None)) # Put at end
         await new_wb.save()
-        await self.refresh()
+        self.insert_entry(None, WhiteboardEntry(id=new_wb.id, name=new_wb.name, order=new_wb.order))
         ui.navigate.to(f'/?id={new_wb.id}')
 
     async def create_folder(self):
-        new_folder = Folder(name="New Folder", order=len(self.folders))
+        last = max((f.order for f in self.folders.values()), default=None)
+        new_folder = Folder(name="New Folder", order=rank.key_between(last, None))
         await new_folder.save()
-        await self.refresh()
+        self.folders[new_folder.id] = new_folder
+        with self._folder_column:
+            self._render_folder(new_folder)
 
-    async def delete_wb(self, wb: Whiteboard):
-        await wb.delete()
-        ui.notify(f'Whiteboard "{wb.name}" deleted')
-        await self.refresh()
+    def delete_wb(self, wb: WhiteboardEntry):
+        with ui.dialog() as dialog, ui.card():
+            ui.label(f'Delete "{wb.name}" and all its cards?')
+            subtree = ui.checkbox('Also delete its sub-boards')
+            with ui.row().classes('w-full justify-end'):
+                ui.button('Cancel', on_click=dialog.close).props('flat')
+                async def confirm():
+                    dialog.close()
+                    await self._delete_wb(wb, subtree.value)
+                ui.button('Delete', on_click=confirm).props('color=red')
+        dialog.open()
+
+    async def _delete_wb(self, wb: WhiteboardEntry, include_subtree: bool):
+        client = ui.context.client
+
+        async def on_done(job):
+            with client:
+                if job["state"] == "done":
+                    ui.notify(f'Finished removing the cards of "{wb.name}" ({job["nodes"]} cards)')
+                else:
+                    ui.notify(f'Removing the cards of "{wb.name}" failed: {job["error"]}', type='negative')
+
+        status = await CascadeService.delete_whiteboard(wb.id, include_subtree=include_subtree, on_done=on_done)
+        for board_id in status["whiteboard_ids"]:
+            self.remove_entry(board_id)
+        boards = len(status["whiteboard_ids"])
+        message = f'Whiteboard "{wb.name}"' + (f' and {boards - 1} sub-board(s)' if boards > 1 else '') + ' deleted'
+        if status["state"] == "running":
+            message += ', cards are being removed in the background'
+        ui.notify(message)
 
     async def delete_folder(self, folder: Folder):
-        # Move children to root instead of deleting? Or delete?
-        # User said "remove whiteboard tree...". Usually delete folder deletes content or warns.
-        # Let's move children to root to be safe.
-        children = await Whiteboard.find(Whiteboard.folder_id == folder.id).to_list()
-        for child in children:
-            child.folder_id = None
-            await child.save()
-        
-        await folder.delete()
+        # Children are moved to the root list rather than deleted
+        await CascadeService.delete_folder(folder.id)
+        self.folders.pop(folder.id, None)
+        self._remove_folder_row(folder.id)
+        if None in self._lists:
+            self._reconcile_list(None, await self._fetch_entries(None))
         ui.notify(f'Folder "{folder.name}" deleted')
-        await self.refresh()
     
     async def rename_folder_dialog(self, folder: Folder):
         with ui.dialog() as dialog, ui.card():
@@ -246,35 +434,48 @@ class WhiteboardList:
                     folder.name = name_input.value
                     await folder.save()
                     dialog.close()
-                    # Small delay to allow dialog to cleanup before refreshing parent
-                    # This prevents the "Cannot read properties of undefined (reading 'props')" error
-                    # which happens if the input component is unmounted too quickly during parent refresh
-                    await asyncio.sleep(0.1)
-                    await self.refresh()
+                    parts = self._folder_rows.get(folder.id)
+                    if parts is not None:
+                        parts['label'].set_text(folder.name)
                 ui.button('Save', on_click=save)
         dialog.open()
 
     # Data Export/Import Handlers
-    async def export_data(self):
-        from app.services.data_service import DataService
-        try:
-            zip_path = await DataService.export_all_data()
-            ui.download(zip_path, filename=os.path.basename(zip_path))
-            ui.notify('Backup ready for download', type='positive')
-        except Exception as e:
-            ui.notify(f"Export failed: {str(e)}", type='negative')
+    async def export_data(self, incremental: bool = False):
+        # The archive is streamed by /api/backup/export while it is written, nothing is staged on disk
+        ui.download.from_url('/api/backup/export' + ('?incremental=true' if incremental else ''))
+        ui.notify('Backup download started', type='positive')
 
-    async def import_data(self, e):
+    async def import_data(self, files, status=None, progress_bar=None):
         from app.services.data_service import DataService
+
+        def on_progress(stage, done, total):
+            if status is not None:
+                status.set_text(f'Restoring {stage}: {done}' + (f' / {total}' if total else ''))
+            if progress_bar is not None and total:
+                progress_bar.set_value(min(done / total, 1.0))
+
+        # Spool the uploads to disk; archives are then read entry by entry, never fully in memory.
+        # Several files = a full backup plus its incremental backups.
+        zip_paths = []
         try:
-            # e.content is a file-like object
-            await DataService.import_all_data(e.content)
+            for file in files:
+                fd, zip_path = tempfile.mkstemp(suffix='.zip')
+                os.close(fd)
+                zip_paths.append(zip_path)
+                await file.save(zip_path)
+            await DataService.import_all_data(zip_paths, progress=on_progress)
+            await SearchService.rebuild()
+            TagFacetService.invalidate()
             ui.notify('Data restored successfully', type='positive')
             await self.refresh()
             # If current whiteboard was deleted, navigate to root
             ui.navigate.to('/')
         except Exception as ex:
             ui.notify(f"Import failed: {str(ex)}", type='negative')
+        finally:
+            for zip_path in zip_paths:
+                os.remove(zip_path)
 
     def render_data_actions(self):
         ui.separator().classes('my-2')
@@ -283,6 +484,7 @@ class WhiteboardList:
         
         with ui.row().classes('w-full px-2 gap-2'):
             ui.button('Export Data', on_click=self.export_data, icon='cloud_download').props('flat dense size=sm w-full align=left').classes('text-slate-700')
+            ui.button('Incremental Backup', on_click=lambda: self.export_data(incremental=True), icon='update').props('flat dense size=sm w-full align=left').classes('text-slate-700')
             
             ui.button('Import Data', on_click=self.open_import_dialog, icon='cloud_upload').props('flat dense size=sm w-full align=left').classes('text-slate-700')
 
@@ -290,10 +492,13 @@ class WhiteboardList:
         with ui.dialog() as dialog, ui.card():
             ui.label('Import Data Backup').classes('text-lg font-bold')
             ui.label('Warning: This will REPLACE all current data!').classes('text-red font-bold')
-            ui.upload(on_upload=lambda e: self.import_data_wrap(e, dialog), auto_upload=True, max_files=1).classes('w-full')
+            ui.label('Select a full backup, optionally with the incremental backups taken after it.').classes('text-xs text-slate-500')
+            ui.upload(on_multi_upload=lambda e: self.import_data_wrap(e, dialog, status, progress_bar), auto_upload=True, multiple=True).classes('w-full')
+            status = ui.label('').classes('text-xs text-slate-500')
+            progress_bar = ui.linear_progress(value=0, show_value=False).classes('w-full')
             ui.button('Cancel', on_click=dialog.close).props('flat')
         dialog.open()
 
-    async def import_data_wrap(self, e, dialog):
-        await self.import_data(e)
+    async def import_data_wrap(self, e, dialog, status=None, progress_bar=None):
+        await self.import_data(e.files, status, progress_bar)
         dialog.close()
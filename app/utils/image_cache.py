@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+import base64
+import os
+import threading
+
+MIME_TYPES = {
+    '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.gif': 'image/gif',
+    '.webp': 'image/webp', '.svg': 'image/svg+xml',
+}
+
+def mime_type(path: str) -> str:
+    return MIME_TYPES.get(os.path.splitext(path)[1].lower(), 'image/png')
+
+# (path, mtime_ns, size): a changed file gets a new key, the stale entry just ages out
+CacheKey = Tuple[str, int, int]
+
+
+class ImagePayloadCache:
+    """
+    LRU cache of base64 data URIs for images embedded in exports.
+
+    Entries are keyed by path plus mtime and size, so an image referenced by many cards
+    (or exported again unchanged) is read and encoded once. Total size is bounded by
+    `max_bytes` (encoded length). prefetch() reads upcoming images on a small thread pool
+    while the export is busy with the cards in front of them.
+    """
+    MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "128")) * 1024 * 1024
+    WORKERS = int(os.getenv("IMAGE_READ_WORKERS", "4"))
+
+    def __init__(self, max_bytes: Optional[int] = None, workers: Optional[int] = None):
+        self.max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        self.workers = self.WORKERS if workers is None else workers
+        self._entries: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self._size = 0
+        self._loading: Dict[CacheKey, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {"hits": 0, "reads": 0}
+
+    @staticmethod
+    def _key(path: str) -> CacheKey:
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def data_uri(self, path: str) -> str:
+        """data: URI of the image (raises OSError if it cannot be read)"""
+        key = self._key(path)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return payload
+            future = self._loading.get(key)
+        if future is not None:
+            return future.result()
+        return self._load(key)
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """Start reading images in the background (missing files are skipped)"""
+        for path in paths:
+            try:
+                key = self._key(path)
+            except OSError:
+                continue
+            with self._lock:
+                if key in self._entries or key in self._loading:
+                    continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image-cache")
+                self._loading[key] = self._executor.submit(self._load, key)
+
+    def _load(self, key: CacheKey) -> str:
+        path = key[0]
+        try:
+            with open(path, 'rb') as f:
+                encoded = base64.b64encode(f.read()).decode('ascii')
+            payload = f"data:{mime_type(path)};base64,{encoded}"
+            self._store(key, payload)
+            return payload
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def _store(self, key: CacheKey, payload: str) -> None:
+        with self._lock:
+            self.stats["reads"] += 1
+            if key in self._entries:
+                return
+            # Larger than the whole cache: serve it, don't keep it
+            if len(payload) > self.max_bytes:
+                return
+            self._entries[key] = payload
+            self._size += len(payload)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_default_cache: Optional[ImagePayloadCache] = None
+_default_lock = threading.Lock()  # First exports may start concurrently in the threadpool
+
+def get_image_cache() -> ImagePayloadCache:
+    """Process-wide cache shared by all exports"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ImagePayloadCache()
+    return _default_cache
+
+def shutdown() -> None:
+    if _default_cache is not None:
+        _default_cache.shutdown()
@@ -0,0 +1,93 @@
+from typing import Any, Iterator, Optional, TextIO, Tuple
+import json
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+class JSONStreamError(ValueError):
+    pass
+
+def iter_object_arrays(fp: TextIO, chunk_size: int = 1024 * 1024) -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally parse a JSON document shaped like {"key": [item, ...], "other": "scalar", ...}.
+
+    Yields (key, item) for every element of every top-level array; other top-level values are
+    parsed and skipped. Only the element currently being decoded (plus one read chunk) is held
+    in memory, so arbitrarily large arrays of small objects can be read with bounded memory.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws() -> Optional[str]:
+        """Advance to the next significant character and return it (None at EOF)"""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return None
+
+    def expect(chars: str) -> str:
+        nonlocal pos
+        ch = skip_ws()
+        if ch is None or ch not in chars:
+            raise JSONStreamError(f"Expected one of {chars!r}, got {ch!r}")
+        pos += 1
+        return ch
+
+    def value() -> Any:
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+                # A number cut at the chunk boundary decodes "successfully" but may continue
+                is_number = isinstance(result, (int, float)) and not isinstance(result, bool)
+                complete = end < len(buf) and not (is_number and buf[end] in _NUMBER_CHARS)
+                if complete or eof:
+                    pos = end
+                    return result
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if not fill():
+                result, pos = decoder.raw_decode(buf, pos)
+                return result
+
+    expect('{')
+    if skip_ws() == '}':
+        return
+    while True:
+        key = value()
+        if not isinstance(key, str):
+            raise JSONStreamError("Object keys must be strings")
+        expect(':')
+        if skip_ws() == '[':
+            pos += 1
+            if skip_ws() == ']':
+                pos += 1
+            else:
+                while True:
+                    yield key, value()
+                    if expect(',]') == ']':
+                        break
+        else:
+            value()
+        if expect(',}') == '}':
+            return
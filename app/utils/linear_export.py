@@ -1,14 +1,68 @@
-import markdown
-from typing import List, Dict, Set, Optional
+from typing import BinaryIO, Iterator, List, Dict, Set, Optional, TextIO
 from collections import defaultdict
+import heapq
+import io
+import os
 import re
+import shutil
+import zipfile
+
+from app.utils.image_cache import ImagePayloadCache, get_image_cache
+from app.utils.markdown_render import MarkdownRenderer, get_renderer
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable buffer the zip export writes into and drains between chunks"""
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
 
 class NarrativeExporter:
     """
     Exports whiteboard content as a linear document based on narrative flow.
     Uses topological sort on connections, with spatial fallbacks.
     """
-    def __init__(self, nodes: List[Dict], edges: List[Dict]):
+    ORDER_NARRATIVE = 'narrative'
+    ORDER_TOPOLOGICAL = 'topological'
+    IMAGES_INLINE = 'inline'
+    IMAGES_FILES = 'files'
+    RENDER_WINDOW = 1000  # Cards whose markdown is rendered (in parallel) ahead of streaming them
+    IMAGE_PREFETCH = 8    # Images read in the background ahead of the card being rendered
+    IMAGE_DIR = 'images'  # Folder next to the HTML in zip exports
+
+    def __init__(self, nodes: List[Dict], edges: List[Dict], order: str = ORDER_NARRATIVE,
+                 renderer: Optional[MarkdownRenderer] = None, images: str = IMAGES_INLINE,
+                 image_cache: Optional[ImagePayloadCache] = None):
+        """
+        order: 'narrative' (default) - depth-first along groups and connections, spatial fallback
+               'topological' - every card after all cards connecting to it (Kahn), ties broken spatially
+        renderer: markdown renderer (defaults to the shared, disk-cached one)
+        images: 'inline' (default) - embedded as base64 data URIs, the HTML is self-contained
+                'files' - referenced as images/<name>, see iter_zip()
+        image_cache: encoded image cache for inline images (defaults to the shared one)
+        """
+        if order not in (self.ORDER_NARRATIVE, self.ORDER_TOPOLOGICAL):
+            raise ValueError(f"Unknown order mode: {order}")
+        if images not in (self.IMAGES_INLINE, self.IMAGES_FILES):
+            raise ValueError(f"Unknown image mode: {images}")
+        self.order = order
+        self.renderer = renderer
+        self.images = images
+        self.image_cache = image_cache
+        # Image files referenced by the document in 'files' mode: archive name -> path on disk
+        self.assets: Dict[str, str] = {}
+        self._markdown_html: Dict[str, str] = {}
+
         # Index nodes by ID for O(1) lookup
         self.nodes = {n['id']: n for n in nodes}
         self.edges = edges
@@ -32,113 +86,264 @@ class NarrativeExporter:
 
         # Index edge data for label lookup
         self.edge_map = {(e['fromNode'], e['toNode']): e for e in edges}
+
+    def _spatial_key(self, node_id: str):
+        node = self.nodes[node_id]
+        return (node['y'], node['x'])
+
+    def _sorted_lists(self, lists: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Each list sorted once by position (stable, so ties keep insertion order)"""
+        return {key: sorted(ids, key=self._spatial_key) for key, ids in lists.items()}
         
+    def _parent_cycle_members(self) -> Set[str]:
+        """Ids of nodes whose parent_id chain loops back to themselves (corrupt hierarchy)"""
+        cyclic, done = set(), set()
+        for start in self.nodes:
+            trail, node_id = [], start
+            while node_id in self.nodes and node_id not in done and node_id not in trail:
+                trail.append(node_id)
+                node_id = self.nodes[node_id].get('parent_id')
+            if node_id in trail:
+                cyclic.update(trail[trail.index(node_id):])
+            done.update(trail)
+        return cyclic
+
     def get_order(self) -> List[Dict]:
         """
-        Returns a list of node objects in narrative order.
-        1. Start with orphan nodes (no parent_id).
-        2. Follow parent-child hierarchy and connections via DFS.
+        Returns a list of node objects in the configured order (see __init__).
+        Empty groups are left out.
+        """
+        if self.order == self.ORDER_TOPOLOGICAL:
+            return self._topological_order()
+        return self._narrative_order()
+
+    def _narrative_order(self) -> List[Dict]:
+        """
+        1. Start with orphan nodes (no parent_id), top to bottom, left to right.
+        2. Follow parent-child hierarchy and connections depth-first.
+        Iterative (explicit stack of frames), so arbitrarily long chains of cards work.
         """
         visited = set()
+        waiting = set()  # nodes whose frame is waiting for their parent group to be placed
+        cyclic = self._parent_cycle_members()
         order = []
-        path = set()
+        children = self._sorted_lists(self.children)
+        adjacency = self._sorted_lists(self.adj)
         
         # Sort candidates (orphans first, then spatial)
         candidates = list(self.nodes.values())
         candidates.sort(key=lambda n: (0 if n.get('parent_id') is None else 1, n['y'], n['x']))
         
         def visit(node_id):
-            if node_id in visited:
-                return
-            if node_id in path: # Cycle detection
-                return
-            
+            """One DFS frame: yields the ids to descend into, resumed when that subtree is done"""
             node = self.nodes[node_id]
 
             # 0. Contextual Group Placement: If referenced node is in a group, ensure group is visited first
+            # (a node inside a parent_id cycle waits only once, the cycle would never resolve)
             parent_id = node.get('parent_id')
-            if parent_id and parent_id in self.nodes and parent_id not in visited:
-                visit(parent_id)
+            if parent_id and parent_id in self.nodes and parent_id not in visited \
+                    and not (node_id in waiting and node_id in cyclic):
+                waiting.add(node_id)
+                yield parent_id
+                waiting.discard(node_id)
                 # After visiting parent, this node should have been visited as a child.
                 # If so, return. If not (weird graph state), proceed.
                 if node_id in visited:
                     return
 
             # Filter Empty Groups
-            if node.get('type') == 'group':
-                children = self.children.get(node_id, [])
-                if not children:
-                    visited.add(node_id) # Mark visited so we don't process again
-                    return
+            if node.get('type') == 'group' and not children.get(node_id):
+                visited.add(node_id) # Mark visited so we don't process again
+                return
 
-            path.add(node_id)
             visited.add(node_id)
             order.append(node)
             
-            # 1. Visit children first (if group)
-            child_ids = self.children.get(node_id, [])
-            children = [self.nodes[cid] for cid in child_ids if cid in self.nodes]
-            children.sort(key=lambda n: (n['y'], n['x']))
-            for child in children:
-                visit(child['id'])
-                
-            # 2. Visit outgoing connections
-            adj_ids = self.adj.get(node_id, [])
-            neighbors = [self.nodes[nid] for nid in adj_ids if nid in self.nodes]
-            neighbors.sort(key=lambda n: (n['y'], n['x']))
-            for neighbor in neighbors:
-                visit(neighbor['id'])
-                
-            path.remove(node_id)
+            # 1. Visit children first (if group), 2. then outgoing connections
+            yield from children.get(node_id, ())
+            yield from adjacency.get(node_id, ())
+
+        def run(root_id):
+            stack = [visit(root_id)]
+            while stack:
+                next_id = next(stack[-1], None)
+                if next_id is None:
+                    stack.pop()
+                elif next_id not in visited:
+                    stack.append(visit(next_id))
 
         # Iterate and Visit
         for node in candidates:
             if node['id'] not in visited and node.get('parent_id') is None:
-                visit(node['id'])
+                run(node['id'])
                 
         # Safety catch for remaining unvisited nodes (if any logic missed them)
         for node in candidates:
             if node['id'] not in visited:
-                visit(node['id'])
+                run(node['id'])
         
         return order
 
+    def _topological_order(self) -> List[Dict]:
+        """
+        Kahn's algorithm over connections plus group -> child links: a card comes after every
+        card pointing to it. Among the cards that are ready, the top-most (then left-most) goes
+        first. Cycles are broken by releasing the spatially first remaining card.
+        """
+        in_degree = dict(self.in_degree)
+        successors = defaultdict(list)
+        for from_id, to_ids in self.adj.items():
+            successors[from_id].extend(to_ids)
+        for parent_id, child_ids in self.children.items():
+            successors[parent_id].extend(child_ids)
+            for child_id in child_ids:
+                in_degree[child_id] = in_degree.get(child_id, 0) + 1
+
+        spatial = sorted(self.nodes, key=self._spatial_key)
+        rank = {node_id: i for i, node_id in enumerate(spatial)}
+        ready = [rank[node_id] for node_id in spatial if not in_degree.get(node_id)]
+        heapq.heapify(ready)
+
+        emitted = set()
+        order = []
+        cursor = 0  # first position in `spatial` that may still be pending (cycle breaking)
+        while len(emitted) < len(spatial):
+            if not ready:
+                while spatial[cursor] in emitted:
+                    cursor += 1
+                ready.append(cursor)
+            node_id = spatial[heapq.heappop(ready)]
+            if node_id in emitted:
+                continue
+            emitted.add(node_id)
+
+            node = self.nodes[node_id]
+            if not (node.get('type') == 'group' and not self.children.get(node_id)):
+                order.append(node)
+            for next_id in successors.get(node_id, ()):
+                in_degree[next_id] -= 1
+                if in_degree[next_id] == 0 and next_id not in emitted:
+                    heapq.heappush(ready, rank[next_id])
+        return order
+
     def generate_html(self, whiteboard_name: str) -> str:
+        """Whole document as one string (small boards / tests); prefer iter_html() for large ones"""
+        return "".join(self.iter_html(whiteboard_name))
+
+    def write_zip(self, fp: BinaryIO, whiteboard_name: str) -> None:
+        """Write the zip export (see iter_zip) to a binary file-like sink"""
+        for chunk in self.iter_zip(whiteboard_name):
+            fp.write(chunk)
+
+    def iter_zip(self, whiteboard_name: str, html_name: str = 'index.html') -> Iterator[bytes]:
+        """
+        Yields a zip archive in chunks: the HTML document, then every image it references
+        under images/ (use images='files', otherwise the images are inlined in the HTML).
+        """
+        sink = _ChunkSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+            with zf.open(html_name, 'w', force_zip64=True) as entry:
+                for chunk in self.iter_html(whiteboard_name):
+                    entry.write(chunk.encode('utf-8'))
+                    yield sink.drain()
+
+            for arcname, path in self.assets.items():
+                try:
+                    src = open(path, 'rb')
+                except OSError as e:
+                    print(f"Error adding image {path}: {e}")
+                    continue
+                with src:
+                    info = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+                    # Raster images are already compressed
+                    info.compress_type = zipfile.ZIP_DEFLATED if path.lower().endswith('.svg') else zipfile.ZIP_STORED
+                    with zf.open(info, 'w') as entry:
+                        shutil.copyfileobj(src, entry, 1024 * 1024)
+                yield sink.drain()
+        yield sink.drain()
+
+    def write_html(self, fp: TextIO, whiteboard_name: str) -> None:
+        """Write the document chunk by chunk to a text file-like sink"""
+        for chunk in self.iter_html(whiteboard_name):
+            fp.write(chunk)
+
+    def iter_html(self, whiteboard_name: str) -> Iterator[str]:
+        """
+        Yields the document in chunks: head and table of contents, one chunk per card, tag index.
+        Only one rendered card (e.g. one embedded image) is held in memory at a time, so the
+        output can go straight to a file or a streaming HTTP response.
+        """
         ordered_nodes = self.get_order()
-        
-        # 1. Table of Contents
-        toc_html = "<div class='toc'><h2>Table of Contents</h2><ul>"
+
+        # One pass over the (lightweight) order collects the table of contents and the tag index
+        toc_links = []
+        tag_map = defaultdict(list)
         for node in ordered_nodes:
             title = self._get_title(node)
             if title:
-                toc_html += f"<li><a href='#{node['id']}'>{title}</a></li>"
-        toc_html += "</ul></div>"
-        
-        # 2. Content Body & Tag Collection
-        body_html = ""
-        tag_map = defaultdict(list)
+                toc_links.append(f"<li><a href='#{node['id']}'>{title}</a></li>")
+            for tag in node.get('tags', []):
+                tag_map[tag].append(f"<a href='#{node['id']}'>{title}</a>")
+
+        # 1. Head & Table of Contents
+        yield self._html_head(whiteboard_name)
+        yield f"""
+    <h1>{whiteboard_name}</h1>
+    <div class='toc'><h2>Table of Contents</h2><ul>{"".join(toc_links)}</ul></div>
+    <main>
+"""
+        del toc_links
+
+        # 2. Content Body (markdown of the next window of cards rendered in one batch)
+        renderer = self.renderer or get_renderer()
+        prefetch = self._image_prefetcher(ordered_nodes)
         rendered_full = set() # Track nodes rendered with full content
-        
-        for node in ordered_nodes:
-            body_html += self._render_node(node, rendered_full)
-            
-            # Collect tags
-            tags = node.get('tags', [])
-            title = self._get_title(node)
-            for tag in tags:
-                tag_map[tag].append({'id': node['id'], 'title': title})
-            
+        for start in range(0, len(ordered_nodes), self.RENDER_WINDOW):
+            window = ordered_nodes[start:start + self.RENDER_WINDOW]
+            self._markdown_html = renderer.render_many(
+                node.get('text') or '' for node in window if node.get('type') == 'text'
+            )
+            for node in window:
+                if node.get('type') == 'file':
+                    prefetch()
+                yield self._render_node(node, rendered_full)
+        self._markdown_html = {}
+        yield """
+    </main>
+"""
+
         # 3. Tag Index
-        tag_index_html = ""
         if tag_map:
-            tag_index_html = "<div class='tag-index'><h2>Tag Index</h2><div class='tag-list'>"
+            yield "<div class='tag-index'><h2>Tag Index</h2><div class='tag-list'>"
             for tag in sorted(tag_map.keys()):
-                refs = tag_map[tag]
-                links = [f"<a href='#{ref['id']}'>{ref['title']}</a>" for ref in refs]
-                tag_index_html += f"<div class='tag-item'><strong>#{tag}</strong>: {', '.join(links)}</div>"
-            tag_index_html += "</div></div>"
-            
-        # Full HTML Template
+                yield f"<div class='tag-item'><strong>#{tag}</strong>: {', '.join(tag_map[tag])}</div>"
+            yield "</div></div>"
+        yield """
+</body>
+</html>
+"""
+
+    def _image_prefetcher(self, ordered_nodes: List[Dict]):
+        """
+        Returns a callable to invoke before rendering each image card: it keeps the next
+        IMAGE_PREFETCH inline images loading in the background.
+        """
+        if self.images != self.IMAGES_INLINE:
+            return lambda: None
+        cache = self.image_cache or get_image_cache()
+        paths = [self._image_path(n) for n in ordered_nodes if n.get('type') == 'file' and n.get('file')]
+        position = {"rendered": 0, "requested": 0}
+
+        def prefetch():
+            end = min(position["rendered"] + self.IMAGE_PREFETCH, len(paths))
+            if end > position["requested"]:
+                cache.prefetch(paths[position["requested"]:end])
+                position["requested"] = end
+            position["rendered"] += 1
+        return prefetch
+
+    @staticmethod
+    def _html_head(whiteboard_name: str) -> str:
         return f"""
 <!DOCTYPE html>
 <html>
@@ -209,28 +414,23 @@ class NarrativeExporter:
         }}
     </style>
 </head>
-<body>
-    <h1>{whiteboard_name}</h1>
-    {toc_html}
-    <main>
-        {body_html}
-    </main>
-    {tag_index_html}
-</body>
-</html>
-"""
+<body>"""
 
     def _get_title(self, node):
         node_type = node.get('type')
         if node_type == 'text':
-            # Extract first line or use explicit title if available
+            # Stored title is maintained on save; fall back to parsing older documents
+            if node.get('title'):
+                return node['title']
             text = node.get('text') or ''
             lines = text.strip().split('\n')
             if lines and lines[0]:
                 return re.sub(r'^#+\s*', '', lines[0]).strip()
             return "Untitled Note"
         elif node_type == 'file':
-            # Use filename as title if possible
+            # Original upload name, else the filename
+            if node.get('title'):
+                return node['title']
             path = node.get('file', '')
             if path:
                 return path.split('/')[-1].split('_', 1)[-1] # Remove uuid prefix if present
@@ -259,11 +459,10 @@ class NarrativeExporter:
         
         if node_type == 'text':
             content = node.get('text') or ''
-            # Convert Markdown to HTML
-            content_html = markdown.markdown(
-                content, 
-                extensions=['fenced_code', 'tables', 'nl2br']
-            )
+            # Convert Markdown to HTML (normally pre-rendered for the current window)
+            content_html = self._markdown_html.get(content)
+            if content_html is None:
+                content_html = (self.renderer or get_renderer()).render(content)
         elif node_type == 'file':
             content_html = self._render_image(node)
         elif node_type == 'group':
@@ -325,36 +524,34 @@ class NarrativeExporter:
         </div>
         """
 
+    @staticmethod
+    def _image_path(node) -> str:
+        """OS path of an uploaded file card (web path /static/uploads/... lives under app/)"""
+        # Assuming run.py is in project root
+        rel_path = (node.get('file') or '').lstrip('/')
+        return os.path.join(os.getcwd(), 'app', rel_path)
+
     def _render_image(self, node):
-        """Embed image as base64 to ensure offline portability"""
-        import base64
-        import os
-        
-        file_path = node.get('file', '')
-        if not file_path:
+        """Embed image as base64 to ensure offline portability, or reference it as a file in the zip"""
+        if not node.get('file'):
             return "<p><em>[Missing file path]</em></p>"
-            
-        # Convert web path (/static/uploads/...) to OS path
-        # Assuming run.py is in project root
-        project_root = os.getcwd() 
-        # file_path is likely "/static/uploads/filename"
-        # remove leading slash
-        rel_path = file_path.lstrip('/')
-        abs_path = os.path.join(project_root, 'app', rel_path)
-        
+        abs_path = self._image_path(node)
+
+        if self.images == self.IMAGES_FILES:
+            if not os.path.isfile(abs_path):
+                return f"<p><em>[Image not found: {self._get_title(node)}]</em></p>"
+            arcname = f"{self.IMAGE_DIR}/{os.path.basename(abs_path)}"
+            suffix = 1
+            while self.assets.get(arcname, abs_path) != abs_path:
+                base, ext = os.path.splitext(os.path.basename(abs_path))
+                arcname = f"{self.IMAGE_DIR}/{base}-{suffix}{ext}"
+                suffix += 1
+            self.assets[arcname] = abs_path
+            return f'<img src="{arcname}" alt="{self._get_title(node)}">'
+
         try:
-            with open(abs_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-                
-            # Determine mime type
-            ext = os.path.splitext(abs_path)[1].lower()
-            mime_type = "image/png" # default
-            if ext in ['.jpg', '.jpeg']: mime_type = "image/jpeg"
-            elif ext == '.gif': mime_type = "image/gif"
-            elif ext == '.webp': mime_type = "image/webp"
-            elif ext == '.svg': mime_type = "image/svg+xml"
-            
-            return f'<img src="data:{mime_type};base64,{encoded_string}" alt="{self._get_title(node)}">'
+            data_uri = (self.image_cache or get_image_cache()).data_uri(abs_path)
+            return f'<img src="{data_uri}" alt="{self._get_title(node)}">'
         except Exception as e:
             print(f"Error embedding image {abs_path}: {e}")
             return f"<p><em>[Image not found: {self._get_title(node)}]</em></p>"
@@ -0,0 +1,191 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import os
+import threading
+
+import markdown
+
+EXTENSIONS = ['fenced_code', 'tables', 'nl2br']
+# Part of every cache key: bump when the extensions or their settings change
+RENDER_VERSION = "1:" + ",".join(EXTENSIONS)
+
+# One converter per thread (Markdown instances are not thread-safe, and exports render from
+# Starlette's threadpool), reset between documents instead of rebuilt with its extensions
+_local = threading.local()
+
+def render(text: str) -> str:
+    """Markdown -> HTML with the export settings, reusing this thread's Markdown instance"""
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = _local.converter = markdown.Markdown(extensions=EXTENSIONS)
+    return converter.reset().convert(text)
+
+def _render_batch(texts: List[str]) -> List[str]:
+    """Process pool task: one round trip per batch instead of per card"""
+    return [render(text) for text in texts]
+
+def content_key(text: str) -> str:
+    return hashlib.sha256(f"{RENDER_VERSION}\0{text}".encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """
+    Size-bounded on-disk cache of rendered markdown, keyed by content hash.
+
+    One file per entry (<dir>/<key[:2]>/<key>.html). Hits refresh the file's mtime, and when
+    the total size exceeds `max_bytes` the least recently used entries are evicted down to
+    90% of it. Safe to share between threads (exports stream from Starlette's threadpool).
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # Scanned on first write
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.html')
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            os.utime(path)
+            return html
+        except OSError:
+            return None
+
+    def put(self, key: str, html: str) -> None:
+        path = self._path(key)
+        data = html.encode('utf-8')
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Markdown cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, _, size in self._entries())
+            else:
+                self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """(mtime, path, size) of every cached file"""
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.html'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, entry.path, stat.st_size
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total = total
+
+
+class MarkdownRenderer:
+    """
+    Renders card markdown for exports: cached results first, the rest converted in a process
+    pool (or inline for small batches, where starting workers costs more than it saves).
+    """
+    CACHE_DIR = os.getenv("MARKDOWN_CACHE_DIR", os.path.join(os.getcwd(), 'data', 'markdown_cache'))
+    CACHE_MAX_BYTES = int(os.getenv("MARKDOWN_CACHE_MAX_MB", "256")) * 1024 * 1024
+    WORKERS = int(os.getenv("MARKDOWN_WORKERS", "0")) or os.cpu_count() or 1
+    POOL_THRESHOLD = 64   # Fewer misses than this are rendered inline
+    TASK_SIZE = 32        # Cards per pool task
+
+    def __init__(self, cache: Optional[RenderCache] = None, workers: Optional[int] = None):
+        self.cache = cache
+        self.workers = self.WORKERS if workers is None else workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.stats = {"hits": 0, "rendered": 0}
+
+    def render(self, text: str) -> str:
+        return self.render_many([text])[text]
+
+    def render_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        """HTML for each distinct text (text -> html)"""
+        results: Dict[str, str] = {}
+        keys: Dict[str, str] = {}
+        for text in texts:
+            if text in results or text in keys:
+                continue
+            key = content_key(text)
+            html = self.cache.get(key) if self.cache else None
+            if html is None:
+                keys[text] = key
+            else:
+                results[text] = html
+                self.stats["hits"] += 1
+
+        misses = list(keys)
+        if not misses:
+            return results
+        if self.workers > 1 and len(misses) >= self.POOL_THRESHOLD:
+            batches = [misses[i:i + self.TASK_SIZE] for i in range(0, len(misses), self.TASK_SIZE)]
+            rendered = [html for batch in self._get_pool().map(_render_batch, batches) for html in batch]
+        else:
+            rendered = _render_batch(misses)
+
+        for text, html in zip(misses, rendered):
+            results[text] = html
+            if self.cache:
+                self.cache.put(keys[text], html)
+        self.stats["rendered"] += len(misses)
+        return results
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+_default_renderer: Optional[MarkdownRenderer] = None
+_default_lock = threading.Lock()  # First exports may start concurrently in the threadpool
+
+def get_renderer() -> MarkdownRenderer:
+    """Process-wide renderer with the on-disk cache (workers are started on first large export)"""
+    global _default_renderer
+    if _default_renderer is None:
+        with _default_lock:
+            if _default_renderer is None:
+                _default_renderer = MarkdownRenderer(
+                    RenderCache(MarkdownRenderer.CACHE_DIR, MarkdownRenderer.CACHE_MAX_BYTES)
+                )
+    return _default_renderer
+
+def shutdown() -> None:
+    if _default_renderer is not None:
+        _default_renderer.shutdown()
@@ -0,0 +1,96 @@
+"""
+Lexicographic rank keys (fractional indexing) for user-ordered lists.
+
+A key is a non-empty string of base-62 digits read as a fraction in [0, 1): "V" is
+about 0.5, "0V" about 0.008. Plain string comparison orders keys the same way as their
+values (digits are in ASCII order, and keys never end in "0"), so Mongo can sort by
+them. Between any two keys there is always another one, which lets a move write only
+the moved item. Appending or prepending steps a digit (about one extra digit per 60
+items); repeated inserts at the same inner spot add a digit every few moves, and
+spread() re-issues short, evenly spaced keys for a whole list when keys get too long.
+"""
+from typing import List, Optional
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+MAX_LENGTH = 24  # Keys longer than this trigger a rebalance of their list
+
+_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+
+def is_valid(key: str) -> bool:
+    return isinstance(key, str) and bool(key) and key[-1] != DIGITS[0] and all(c in _VALUES for c in key)
+
+def _midpoint(low: str, high: Optional[str]) -> str:
+    """Key strictly between `low` ("" = 0) and `high` (None = 1)"""
+    if high is not None:
+        # Shared leading digits (low padded with zeros) stay as they are
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else DIGITS[0]) == high[n]:
+            n += 1
+        if n:
+            return high[:n] + _midpoint(low[n:], high[n:])
+    digit_low = _VALUES[low[0]] if low else 0
+    digit_high = _VALUES[high[0]] if high is not None else BASE
+    if digit_high - digit_low > 1:
+        return DIGITS[(digit_low + digit_high + 1) // 2]
+    # Adjacent first digits
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[digit_low] + _midpoint(low[1:], None)
+
+def key_between(before: Optional[str], after: Optional[str]) -> str:
+    """
+    A key sorting after `before` and before `after` (None = start / end of the list).
+    Raises ValueError if the bounds are invalid or not in order.
+    """
+    for key in (before, after):
+        if key is not None and not is_valid(key):
+            raise ValueError(f"Invalid rank key: {key!r}")
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Rank keys out of order: {before!r} >= {after!r}")
+    if after is None and before is not None:
+        # Appending: step the first digit up while it can, keys stay short for growing lists
+        if before[0] != DIGITS[-1]:
+            return DIGITS[_VALUES[before[0]] + 1]
+        return before[0] + key_between(before[1:] or None, None)
+    if before is None and after is not None:
+        # Prepending: step the first digit down (a lone "0" is not a valid key)
+        if _VALUES[after[0]] > 1:
+            return DIGITS[_VALUES[after[0]] - 1]
+        if after[0] == DIGITS[0]:
+            return after[0] + key_between(None, after[1:])
+    return _midpoint(before or "", after)
+
+def _encode(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip(DIGITS[0])
+
+def spread(count: int) -> List[str]:
+    """`count` evenly spaced ascending keys, as short as possible (rebalancing, migrations)"""
+    if count <= 0:
+        return []
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width / (count + 1)
+    return [_encode(int(step * (i + 1)), width) for i in range(count)]
+
+def from_int(order: int) -> str:
+    """Key for a legacy integer position (keeps the relative order of non-negative ints < 62^4)"""
+    return _encode(min(max(int(order), 0) + 1, BASE ** 4 - 1), 4)
+
+def coerce(value):
+    """
+    Model validator: integer orders stored before rank keys read as equivalent keys.
+    Only in Python: Mongo sorts numbers before strings, so lists still holding integers are
+    rebalanced before a key is written into them (BoardService.has_numeric_orders).
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return from_int(value)
+    return value
+
+def needs_rebalance(key: str) -> bool:
+    return len(key) > MAX_LENGTH
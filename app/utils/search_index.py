@@ -0,0 +1,192 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from collections import Counter
+import bisect
+import heapq
+import math
+import re
+
+_TOKEN = re.compile(r'\w+')
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+def _deletes(term: str) -> Set[str]:
+    """All variants of a term with one character removed"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Damerau-Levenshtein distance <= 1 (one insertion, deletion, substitution or swap)"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """
+    In-memory inverted index with BM25 ranking, prefix and fuzzy matching.
+
+    Documents are dicts of fields (text, or a list of values such as tags); each field
+    has a weight, so a word in a title or tag counts more than one in the body.
+    add()/remove() maintain everything incrementally:
+    - term -> {doc id -> weighted term frequency} (postings)
+    - the sorted vocabulary, for prefix expansion of the word being typed
+    - one-deletion variants -> terms, for fuzzy matching (one typo, words of MIN_FUZZY+ chars)
+
+    All query words must match (exactly, by prefix for the last word, or fuzzily).
+    """
+    FIELD_WEIGHTS = {"title": 3.0, "tags": 3.0, "text": 1.0}
+    PREFIX_WEIGHT = 0.7   # Score factor of a prefix expansion vs. the exact word
+    FUZZY_WEIGHT = 0.4    # ... and of a one-typo match
+    MIN_PREFIX = 2
+    MIN_FUZZY = 4
+    MAX_EXPANSIONS = 64   # Vocabulary terms a prefix may expand to
+    K1, B = 1.2, 0.75     # BM25 parameters
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._total_len = 0.0
+        self._vocab: List[str] = []
+        self._variants: Dict[str, Set[str]] = {}
+        self.meta: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    # Maintenance
+    def add(self, doc_id: str, fields: Dict[str, Union[str, Iterable[str], None]],
+            meta: Optional[Dict[str, Any]] = None) -> None:
+        """Index a document, replacing any previous version of it"""
+        self.remove(doc_id)
+        weights: Counter = Counter()
+        for field, value in fields.items():
+            weight = self.FIELD_WEIGHTS.get(field, 1.0)
+            values = [value] if isinstance(value, str) or value is None else value
+            for text in values:
+                for term in tokenize(text):
+                    weights[term] += weight
+
+        self._doc_terms[doc_id] = dict(weights)
+        length = sum(weights.values())
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        self.meta[doc_id] = meta or {}
+        for term, weight in weights.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                self._add_term(term)
+            posting[doc_id] = weight
+
+    def remove(self, doc_id: str) -> bool:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        self._total_len -= self._doc_len.pop(doc_id)
+        self.meta.pop(doc_id, None)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[term]
+                self._drop_term(term)
+        return True
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _add_term(self, term: str) -> None:
+        bisect.insort(self._vocab, term)
+        if len(term) >= self.MIN_FUZZY:
+            for variant in _deletes(term):
+                self._variants.setdefault(variant, set()).add(term)
+
+    def _drop_term(self, term: str) -> None:
+        index = bisect.bisect_left(self._vocab, term)
+        if index < len(self._vocab) and self._vocab[index] == term:
+            del self._vocab[index]
+        if len(term) >= self.MIN_FUZZY:
+            for variant in _deletes(term):
+                terms = self._variants.get(variant)
+                if terms is not None:
+                    terms.discard(term)
+                    if not terms:
+                        del self._variants[variant]
+
+    # Queries
+    def expand(self, word: str, prefix: bool = False) -> Dict[str, float]:
+        """Indexed terms a query word matches -> score factor"""
+        matches: Dict[str, float] = {}
+        if prefix and len(word) >= self.MIN_PREFIX:
+            start = bisect.bisect_left(self._vocab, word)
+            for term in self._vocab[start:start + self.MAX_EXPANSIONS]:
+                if not term.startswith(word):
+                    break
+                matches[term] = self.PREFIX_WEIGHT
+        if len(word) >= self.MIN_FUZZY:
+            # Terms sharing a one-deletion variant with the word (or being one)
+            candidates = set(self._variants.get(word, ()))
+            for variant in _deletes(word):
+                candidates.update(self._variants.get(variant, ()))
+                if variant in self._postings:
+                    candidates.add(variant)
+            for term in candidates:
+                if term not in matches and _within_one_edit(word, term):
+                    matches[term] = self.FUZZY_WEIGHT
+        if word in self._postings:
+            matches[word] = 1.0
+        return matches
+
+    def search(self, query: str, offset: int = 0, limit: int = 20,
+               predicate: Optional[Callable[[str], bool]] = None) -> Tuple[int, List[Tuple[str, float]]]:
+        """
+        Ranked matches: (total number of matching documents, [(doc id, score)] of the page).
+        The last word is also matched as a prefix (search as you type).
+        """
+        words = tokenize(query)
+        if not words or not self._doc_terms:
+            return 0, []
+        doc_count = len(self._doc_terms)
+        avg_len = self._total_len / doc_count or 1.0
+
+        scores: Optional[Dict[str, float]] = None
+        for position, word in enumerate(words):
+            word_scores: Dict[str, float] = {}
+            for term, factor in self.expand(word, prefix=position == len(words) - 1).items():
+                posting = self._postings[term]
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    if scores is not None and doc_id not in scores:
+                        continue
+                    norm = tf + self.K1 * (1 - self.B + self.B * self._doc_len[doc_id] / avg_len)
+                    score = factor * idf * tf * (self.K1 + 1) / norm
+                    # A word counts once, with its best matching term
+                    if score > word_scores.get(doc_id, 0.0):
+                        word_scores[doc_id] = score
+            if scores is not None:
+                for doc_id, score in word_scores.items():
+                    word_scores[doc_id] = score + scores[doc_id]
+            scores = word_scores
+            if not scores:
+                return 0, []
+
+        if predicate is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if predicate(doc_id)}
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return len(scores), ranked[offset:offset + limit]
@@ -0,0 +1,186 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+import math
+
+Rect = Tuple[float, float, float, float]  # x, y, width, height
+
+class SpatialGrid:
+    """
+    Uniform-grid spatial index over axis-aligned rectangles (canvas nodes).
+
+    Each item is registered in every cell its rectangle overlaps, so point and
+    rectangle queries only look at a handful of candidates instead of the whole board.
+    Items spanning more than `max_cells_per_item` cells (huge groups) are kept in a
+    small side list that every query checks directly.
+    """
+    def __init__(self, cell_size: float = 512.0, max_cells_per_item: int = 256):
+        self.cell_size = cell_size
+        self.max_cells_per_item = max_cells_per_item
+        self._cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self._rects: Dict[str, Rect] = {}
+        self._item_cells: Dict[str, List[Tuple[int, int]]] = {}
+        self._oversized: Set[str] = set()
+        # Populated cell extent (only ever grows), bounds the nearest() ring search
+        self._extent: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rects
+
+    def get_rect(self, item_id: str) -> Optional[Rect]:
+        return self._rects.get(item_id)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _cell_range(self, x: float, y: float, width: float, height: float) -> Tuple[int, int, int, int]:
+        cx1, cy1 = self._cell(x, y)
+        cx2, cy2 = self._cell(x + width, y + height)
+        return cx1, cy1, cx2, cy2
+
+    # Maintenance
+    def insert(self, item_id: str, x: float, y: float, width: float, height: float) -> None:
+        """Add an item, or move/resize it if it is already indexed"""
+        if item_id in self._rects:
+            self.remove(item_id)
+        width, height = max(width or 0.0, 0.0), max(height or 0.0, 0.0)
+        self._rects[item_id] = (x, y, width, height)
+
+        cx1, cy1, cx2, cy2 = self._cell_range(x, y, width, height)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > self.max_cells_per_item:
+            self._oversized.add(item_id)
+            return
+
+        cells = [(cx, cy) for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)]
+        for cell in cells:
+            self._cells[cell].add(item_id)
+        self._item_cells[item_id] = cells
+
+        if self._extent is None:
+            self._extent = [cx1, cy1, cx2, cy2]
+        else:
+            ext = self._extent
+            ext[0], ext[1] = min(ext[0], cx1), min(ext[1], cy1)
+            ext[2], ext[3] = max(ext[2], cx2), max(ext[3], cy2)
+
+    update = insert
+
+    def remove(self, item_id: str) -> bool:
+        if self._rects.pop(item_id, None) is None:
+            return False
+        self._oversized.discard(item_id)
+        for cell in self._item_cells.pop(item_id, ()):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._cells[cell]
+        return True
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._rects.clear()
+        self._item_cells.clear()
+        self._oversized.clear()
+        self._extent = None
+
+    # Queries
+    def query_point(self, px: float, py: float) -> List[str]:
+        """Ids of items whose rectangle contains the point (edges inclusive)"""
+        result = []
+        for item_id in (*self._cells.get(self._cell(px, py), ()), *self._oversized):
+            x, y, w, h = self._rects[item_id]
+            if x <= px <= x + w and y <= py <= y + h:
+                result.append(item_id)
+        return result
+
+    def query_rect(self, x: float, y: float, width: float, height: float) -> List[str]:
+        """Ids of items whose rectangle intersects the given one (edges inclusive)"""
+        cx1, cy1, cx2, cy2 = self._cell_range(x, y, width, height)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self._rects):
+            candidates = self._rects.keys()
+        else:
+            candidates = set(self._oversized)
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    candidates.update(self._cells.get((cx, cy), ()))
+
+        x2, y2 = x + width, y + height
+        result = []
+        for item_id in candidates:
+            ix, iy, iw, ih = self._rects[item_id]
+            if ix <= x2 and ix + iw >= x and iy <= y2 and iy + ih >= y:
+                result.append(item_id)
+        return result
+
+    def query_containing(self, x: float, y: float, width: float, height: float) -> List[str]:
+        """Ids of items whose rectangle fully contains the given one"""
+        result = []
+        for item_id in self.query_point(x, y):
+            ix, iy, iw, ih = self._rects[item_id]
+            if x + width <= ix + iw and y + height <= iy + ih:
+                result.append(item_id)
+        return result
+
+    def nearest(self, px: float, py: float, predicate: Optional[Callable[[str], bool]] = None,
+                max_distance: Optional[float] = None) -> Optional[str]:
+        """
+        Id of the item closest to the point (distance 0 when inside), optionally filtered.
+        Searches rings of cells outward and stops as soon as no farther ring can beat the best hit.
+        """
+        best_id, best_dist = None, math.inf
+
+        def consider(item_id):
+            nonlocal best_id, best_dist
+            if predicate is not None and not predicate(item_id):
+                return
+            x, y, w, h = self._rects[item_id]
+            dx = max(x - px, 0.0, px - (x + w))
+            dy = max(y - py, 0.0, py - (y + h))
+            dist = math.hypot(dx, dy)
+            if dist < best_dist:
+                best_id, best_dist = item_id, dist
+
+        for item_id in self._oversized:
+            consider(item_id)
+
+        if self._extent is not None:
+            c0x, c0y = self._cell(px, py)
+            ext = self._extent
+            max_ring = max(c0x - ext[0], ext[2] - c0x, c0y - ext[1], ext[3] - c0y, 0)
+            seen: Set[str] = set()
+            for ring in range(max_ring + 1):
+                # Anything in this ring or beyond is at least (ring - 1) cells away
+                if best_dist <= (ring - 1) * self.cell_size:
+                    break
+                if max_distance is not None and (ring - 1) * self.cell_size > max_distance:
+                    break
+                # Sparse board: walking empty cells now costs more than checking every item
+                if (2 * ring + 1) ** 2 > len(self._rects):
+                    for item_id in self._rects:
+                        if item_id not in seen:
+                            consider(item_id)
+                    break
+                for cell in self._ring_cells(c0x, c0y, ring):
+                    for item_id in self._cells.get(cell, ()):
+                        if item_id not in seen:
+                            seen.add(item_id)
+                            consider(item_id)
+
+        if max_distance is not None and best_dist > max_distance:
+            return None
+        return best_id
+
+    @staticmethod
+    def _ring_cells(cx: int, cy: int, ring: int):
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
@@ -0,0 +1,89 @@
+"""
+Benchmark: loading a large board for the canvas.
+
+Compares the full-document path (BoardService.get_nodes -> validated CanvasNode
+documents) with the lean path (BoardService.get_node_views -> projected
+CanvasNodeView, validated or trusted). Reports wall time and the Python heap
+held by the result (tracemalloc), plus the process max RSS at the end.
+
+Requires a running MongoDB (MONGODB_URL). Uses a throwaway database.
+
+    python benchmarks/bench_board_load.py --nodes 50000
+"""
+import argparse
+import asyncio
+import gc
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+
+from app.models.canvas_node import CanvasNode
+from app.models.canvas_edge import CanvasEdge
+from app.services.board_service import BoardService
+
+load_dotenv()
+
+BODY = "Some body text for the card, long enough to look like a real note. " * 8
+
+
+async def init_db():
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("BENCH_DATABASE_NAME", "telescope_bench")]
+    await init_beanie(database=db, document_models=[CanvasNode, CanvasEdge])
+
+
+async def seed(wb_id: str, count: int):
+    batch = []
+    for i in range(count):
+        batch.append(CanvasNode(
+            type="text", text=f"# Card {i}\n{BODY}", whiteboard_id=wb_id,
+            x=random.uniform(0, 100000), y=random.uniform(0, 100000), width=300, height=200,
+            tags=[f"tag-{i % 50}"]
+        ))
+        if len(batch) == 5000:
+            await BoardService.insert_nodes_bulk(batch)
+            batch = []
+    await BoardService.insert_nodes_bulk(batch)
+
+
+async def measure(label, load):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await load()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>22}: {elapsed:7.2f}s  held={current / 2**20:7.1f} MiB  peak={peak / 2**20:7.1f} MiB  n={len(result)}")
+    del result
+
+
+async def run(count: int):
+    await init_db()
+    wb_id = f"bench-{uuid.uuid4()}"
+    await seed(wb_id, count)
+    try:
+        await measure("full documents", lambda: BoardService.get_nodes(wb_id))
+        await measure("projection (validated)", lambda: BoardService.get_node_views(wb_id, trusted=False))
+        await measure("projection (trusted)", lambda: BoardService.get_node_views(wb_id, trusted=True))
+    finally:
+        await CanvasNode.find(CanvasNode.whiteboard_id == wb_id).delete()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"process max RSS: {max_rss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(run(args.nodes))
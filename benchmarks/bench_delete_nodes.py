@@ -0,0 +1,98 @@
+"""
+Benchmark: cascade delete of a large selection.
+
+Compares the legacy per-node loop (find_one + delete + edge find + per-edge delete)
+against the set-based BoardService.delete_nodes_and_edges.
+
+Requires a running MongoDB (MONGODB_URL). Uses a throwaway database so real data is untouched.
+
+    python benchmarks/bench_delete_nodes.py --nodes 10000 --edges 10000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from beanie.operators import Or
+
+from app.models.canvas_node import CanvasNode
+from app.models.canvas_edge import CanvasEdge
+from app.services.board_service import BoardService
+
+load_dotenv()
+
+
+async def init_db():
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("BENCH_DATABASE_NAME", "telescope_bench")]
+    await init_beanie(database=db, document_models=[CanvasNode, CanvasEdge])
+
+
+async def seed(wb_id: str, node_count: int, edge_count: int):
+    nodes = [
+        CanvasNode(
+            type="text", text=f"# Node {i}", whiteboard_id=wb_id,
+            x=random.uniform(0, 50000), y=random.uniform(0, 50000), width=300, height=200
+        )
+        for i in range(node_count)
+    ]
+    await BoardService.insert_nodes_bulk(nodes)
+    ids = [n.id for n in nodes]
+    edges = [
+        CanvasEdge(fromNode=random.choice(ids), toNode=random.choice(ids), whiteboard_id=wb_id)
+        for _ in range(edge_count)
+    ]
+    await BoardService.insert_edges_bulk(edges)
+    return ids
+
+
+async def legacy_delete(node_ids, whiteboard_id):
+    """The pre-bulk implementation, kept here only as a baseline"""
+    deleted_nodes = deleted_edges = 0
+    for node_id in node_ids:
+        node = await CanvasNode.find_one(CanvasNode.id == node_id)
+        if node:
+            await node.delete()
+            deleted_nodes += 1
+        edges = await CanvasEdge.find(
+            CanvasEdge.whiteboard_id == whiteboard_id,
+            Or(CanvasEdge.fromNode == node_id, CanvasEdge.toNode == node_id)
+        ).to_list()
+        for edge in edges:
+            await edge.delete()
+            deleted_edges += 1
+    return {"nodes": deleted_nodes, "edges": deleted_edges}
+
+
+async def run(node_count: int, edge_count: int, skip_legacy: bool):
+    await init_db()
+    runs = [("set-based", BoardService.delete_nodes_and_edges)]
+    if not skip_legacy:
+        runs.insert(0, ("legacy loop", legacy_delete))
+
+    for label, delete_fn in runs:
+        wb_id = f"bench-{uuid.uuid4()}"
+        ids = await seed(wb_id, node_count, edge_count)
+        start = time.perf_counter()
+        result = await delete_fn(ids, wb_id)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>12}: {elapsed:8.3f}s  nodes={result['nodes']} edges={result['edges']}")
+        await CanvasNode.find(CanvasNode.whiteboard_id == wb_id).delete()
+        await CanvasEdge.find(CanvasEdge.whiteboard_id == wb_id).delete()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--edges", type=int, default=10000)
+    parser.add_argument("--skip-legacy", action="store_true", help="legacy loop takes minutes at 10k")
+    args = parser.parse_args()
+    asyncio.run(run(args.nodes, args.edges, args.skip_legacy))
@@ -0,0 +1,66 @@
+"""
+Benchmark: markdown rendering during the linear export.
+
+Compares a fresh markdown.markdown() call per card (the previous behaviour) against
+MarkdownRenderer: process pool on a cold cache, then a warm cache (unchanged cards).
+No database needed; the cache lives in a temporary directory.
+
+    python benchmarks/bench_markdown_export.py --cards 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import markdown
+
+sys.path.append(os.getcwd())
+
+from app.utils.markdown_render import EXTENSIONS, MarkdownRenderer, RenderCache
+
+CARD = """# Card {i}
+
+Some *emphasis*, a [link](https://example.com/{i}) and `inline code`.
+
+- first point
+- second point
+
+| key | value |
+|-----|-------|
+| id  | {i}   |
+
+```python
+print({i})
+```
+"""
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(cards, workers):
+    texts = [CARD.format(i=i) for i in range(cards)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        renderer = MarkdownRenderer(RenderCache(cache_dir, 1024 ** 3), workers=workers)
+        try:
+            fresh = timed(lambda: [markdown.markdown(t, extensions=EXTENSIONS) for t in texts])
+            cold = timed(lambda: renderer.render_many(texts))
+            warm = timed(lambda: renderer.render_many(texts))
+        finally:
+            renderer.shutdown()
+    print(f"{cards} cards, {renderer.workers} workers")
+    print(f"  markdown.markdown per card: {fresh:8.2f} s")
+    print(f"  renderer, cold cache:       {cold:8.2f} s")
+    print(f"  renderer, warm cache:       {warm:8.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=MarkdownRenderer.WORKERS)
+    args = parser.parse_args()
+    run(args.cards, args.workers)
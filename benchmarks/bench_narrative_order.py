@@ -0,0 +1,61 @@
+"""
+Benchmark: linear export ordering on large boards.
+
+Times NarrativeExporter.get_order() in both modes (narrative depth-first and
+topological) on synthetic boards with ~3 edges per card and some nesting.
+Pure Python, no database needed.
+
+    python benchmarks/bench_narrative_order.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from app.utils.linear_export import NarrativeExporter
+
+WORLD = 200000.0
+
+
+def make_board(count: int, edges_per_node: float, seed: int = 42):
+    rng = random.Random(seed)
+    nodes, groups = [], []
+    for i in range(count):
+        is_group = i % 50 == 0
+        node = {
+            'id': f"n{i}", 'type': 'group' if is_group else 'text', 'text': f"# Card {i}",
+            'x': rng.uniform(0, WORLD), 'y': rng.uniform(0, WORLD),
+            'parent_id': rng.choice(groups) if groups and rng.random() < 0.5 else None,
+        }
+        if is_group:
+            groups.append(node['id'])
+        nodes.append(node)
+    edges = [
+        {'id': f"e{i}", 'fromNode': f"n{rng.randrange(count)}", 'toNode': f"n{rng.randrange(count)}"}
+        for i in range(int(count * edges_per_node))
+    ]
+    return nodes, edges
+
+
+def run(sizes, edges_per_node):
+    print(f"{'nodes':>8} {'edges':>8} {'narrative ms':>13} {'topological ms':>15}")
+    for size in sizes:
+        nodes, edges = make_board(size, edges_per_node)
+        timings = []
+        for mode in (NarrativeExporter.ORDER_NARRATIVE, NarrativeExporter.ORDER_TOPOLOGICAL):
+            start = time.perf_counter()
+            order = NarrativeExporter(nodes, edges, order=mode).get_order()
+            timings.append((time.perf_counter() - start) * 1e3)
+            assert len(order) <= size
+        print(f"{size:>8} {len(edges):>8} {timings[0]:>13.1f} {timings[1]:>15.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--edges-per-node", type=float, default=3.0)
+    args = parser.parse_args()
+    run(args.sizes, args.edges_per_node)
@@ -0,0 +1,78 @@
+"""
+Benchmark: "which group contains this point" lookups.
+
+Compares the linear scan CanvasHandlers.handle_upload used to do against the
+SpatialGrid kept in BoardState. Pure Python, no database needed.
+
+    python benchmarks/bench_spatial_index.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.getcwd())
+
+from app.ui.board_state import BoardState
+
+WORLD = 200000.0
+
+
+def make_nodes(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(count):
+        is_group = i % 20 == 0
+        w, h = (rng.uniform(800, 3000), rng.uniform(600, 2000)) if is_group else (300.0, 200.0)
+        nodes.append(SimpleNamespace(
+            id=f"n{i}", type="group" if is_group else "text", parent_id=None,
+            x=rng.uniform(0, WORLD), y=rng.uniform(0, WORLD), width=w, height=h
+        ))
+    return nodes
+
+
+def linear_group_at(nodes, x, y):
+    for node in nodes:
+        if node.type == 'group' and node.x <= x <= node.x + node.width and node.y <= y <= node.y + node.height:
+            return node
+    return None
+
+
+def bench(label, fn, points):
+    start = time.perf_counter()
+    for x, y in points:
+        fn(x, y)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def run(sizes, queries):
+    rng = random.Random(1)
+    points = [(rng.uniform(0, WORLD), rng.uniform(0, WORLD)) for _ in range(queries)]
+    print(f"{'nodes':>8} {'build ms':>9} {'linear us':>10} {'grid us':>8} {'nearest us':>11} {'move us':>8}")
+    for size in sizes:
+        nodes = make_nodes(size)
+        start = time.perf_counter()
+        board = BoardState(nodes)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        linear_us = bench("linear", lambda x, y: linear_group_at(nodes, x, y), points)
+        grid_us = bench("grid", board.group_at, points)
+        nearest_us = bench("nearest", board.nearest_group, points)
+
+        movers = nodes[:len(points)]
+        start = time.perf_counter()
+        for node, (x, y) in zip(movers, points):
+            board.move_node(node, x, y)
+        move_us = (time.perf_counter() - start) / len(movers) * 1e6
+
+        print(f"{size:>8} {build_ms:>9.1f} {linear_us:>10.1f} {grid_us:>8.2f} {nearest_us:>11.2f} {move_us:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.sizes, args.queries)
@@ -0,0 +1,61 @@
+"""
+Migration: backfill the stored `title` / `preview` fields of canvas nodes.
+
+Documents saved before these fields existed have neither; they still render (the
+getters fall back to parsing the text) but pay the parsing cost on every load.
+Only nodes missing the fields are touched, so the script is safe to re-run.
+
+    python migrations/backfill_card_titles.py [--batch-size 1000] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from app.database import init_db
+from app.models.canvas_node import CanvasNode, CanvasNodeView
+
+load_dotenv()
+
+async def backfill(batch_size: int, dry_run: bool) -> int:
+    await init_db()
+    collection = CanvasNode.get_pymongo_collection()
+    query = {"title": {"$exists": False}}
+
+    total = await collection.count_documents(query)
+    print(f"{total} nodes without stored title/preview")
+    if dry_run or not total:
+        return 0
+
+    updated = 0
+    batch = []
+    async for doc in collection.find(query, CanvasNodeView.mongo_projection()):
+        view = CanvasNodeView.from_trusted(doc)
+        view.refresh_derived()
+        batch.append(UpdateOne(
+            {"_id": view.id},
+            {"$set": {"title": view.title, "preview": view.preview}}
+        ))
+        if len(batch) >= batch_size:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+            print(f"  {updated}/{total}")
+    if batch:
+        result = await collection.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+
+    print(f"Backfilled {updated} nodes")
+    return updated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the nodes that need a backfill")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.dry_run))
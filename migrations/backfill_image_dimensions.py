@@ -0,0 +1,73 @@
+"""
+Migration: backfill `image_width` / `image_height` of image file cards and, optionally,
+pre-generate their thumbnails (otherwise they are generated on first request).
+
+Needs Pillow. Only file cards without stored dimensions are touched, so the script is
+safe to re-run; cards whose file is missing or not a readable image are left as they are.
+
+    python migrations/backfill_image_dimensions.py [--batch-size 500] [--thumbnails] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from app.database import init_db
+from app.models.canvas_node import CanvasNode
+from app.services.thumbnail_service import ThumbnailService
+
+load_dotenv()
+
+UPLOAD_PREFIX = "/static/uploads/"
+
+async def backfill(batch_size: int, thumbnails: bool, dry_run: bool) -> int:
+    if not ThumbnailService.available():
+        print("Pillow is not installed (pip install pillow)")
+        return 0
+    await init_db()
+    collection = CanvasNode.get_pymongo_collection()
+    query = {"type": "file", "image_width": {"$exists": False}, "file": {"$regex": f"^{UPLOAD_PREFIX}"}}
+
+    total = await collection.count_documents(query)
+    print(f"{total} file cards without stored image dimensions")
+    if dry_run or not total:
+        return 0
+
+    updated = 0
+    batch = []
+    async for doc in collection.find(query, {"file": 1}):
+        file_name = doc["file"][len(UPLOAD_PREFIX):]
+        path = ThumbnailService.upload_path(file_name)
+        dimensions = await asyncio.to_thread(ThumbnailService.image_size, path) if path else None
+        if not dimensions:
+            continue
+        if thumbnails:
+            await asyncio.to_thread(ThumbnailService.generate, file_name)
+        batch.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"image_width": dimensions[0], "image_height": dimensions[1]}}
+        ))
+        if len(batch) >= batch_size:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+            print(f"  {updated}/{total}")
+    if batch:
+        result = await collection.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+
+    print(f"Backfilled {updated} file cards")
+    return updated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--thumbnails", action="store_true", help="Also generate missing thumbnails")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the cards that need a backfill")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.thumbnails, args.dry_run))
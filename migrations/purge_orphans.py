@@ -0,0 +1,34 @@
+"""
+Migration: delete nodes and edges whose whiteboard no longer exists.
+
+Boards deleted before cascade deletes (CascadeService) left their cards and connections
+behind; so can a background cascade interrupted by a restart. Safe to re-run.
+
+    python migrations/purge_orphans.py [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+
+from app.database import init_db
+from app.services.cascade_service import CascadeService
+
+load_dotenv()
+
+async def purge(dry_run: bool) -> dict:
+    await init_db()
+    status = await CascadeService.purge_orphans(dry_run=dry_run)
+    verb = "Found" if dry_run else "Deleted"
+    print(f"{verb} {status['nodes']} nodes and {status['edges']} edges of {status['boards']} missing boards")
+    return status
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the orphaned documents")
+    args = parser.parse_args()
+    asyncio.run(purge(args.dry_run))
@@ -0,0 +1,79 @@
+"""
+Migration: replace integer `order` values of folders and whiteboards with rank keys
+(app.utils.rank), keeping the current sidebar order.
+
+Each list (the folders, and the whiteboards of each folder / the root) that still holds
+an integer order gets short, evenly spaced keys: integers first in numeric order, then
+any keys already assigned, ties broken by creation time. Lists without integer orders
+are left alone, so the script is safe to re-run (e.g. after restoring an older backup).
+Until this has run, the application reads leftover integers as equivalent keys and
+rebalances a whiteboard list that still holds any before writing a key into it.
+
+    python migrations/rank_order_keys.py [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from app.database import init_db
+from app.models.folder import Folder
+from app.models.whiteboard import Whiteboard
+from app.utils import rank
+
+load_dotenv()
+
+def _sort_key(doc: Dict[str, Any]):
+    order = doc.get("order")
+    is_number = isinstance(order, (int, float)) and not isinstance(order, bool)
+    # Same as Mongo's sort over mixed types: numbers before strings
+    position = (0, order, "") if is_number else (1, 0, str(order or ""))
+    return position, doc.get("created_at") or datetime.min, doc["_id"]
+
+def plan(docs: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """Updates re-keying one list, or none if it has no integer orders left"""
+    if not any(isinstance(doc.get("order"), (int, float)) for doc in docs):
+        return []
+    docs = sorted(docs, key=_sort_key)
+    now = datetime.now()  # So incremental backups taken afterwards include the new keys
+    return [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"order": key, "updated_at": now}})
+        for doc, key in zip(docs, rank.spread(len(docs)))
+    ]
+
+async def migrate(dry_run: bool) -> int:
+    await init_db()
+    fields = {"order": 1, "created_at": 1, "folder_id": 1}
+
+    folders = await Folder.get_pymongo_collection().find({}, fields).to_list(None)
+    lists = {"folders": (Folder.get_pymongo_collection(), folders)}
+    boards: Dict[Any, List[Dict[str, Any]]] = {}
+    async for doc in Whiteboard.get_pymongo_collection().find({}, fields):
+        boards.setdefault(doc.get("folder_id"), []).append(doc)
+    for folder_id, docs in boards.items():
+        lists[f"whiteboards in {folder_id or 'root'}"] = (Whiteboard.get_pymongo_collection(), docs)
+
+    updated = 0
+    for name, (collection, docs) in lists.items():
+        updates = plan(docs)
+        if not updates:
+            continue
+        print(f"{name}: {len(updates)} documents")
+        if not dry_run:
+            result = await collection.bulk_write(updates, ordered=False)
+            updated += result.modified_count
+    print(f"Re-keyed {updated} documents" if not dry_run else "Dry run, nothing written")
+    return updated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only list what would be re-keyed")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.dry_run))
@@ -0,0 +1,45 @@
+"""
+Migration: rename StoredFile.ref_count to upload_count.
+
+The field counts uploads that resolved to a stored file. Deleting cards never decreased
+it, so it was never a live reference count; the new name says what it holds. Documents
+without ref_count are left alone, so the script is safe to re-run (e.g. after restoring
+an older backup).
+
+    python migrations/rename_upload_count.py [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+
+from app.database import init_db
+from app.models.stored_file import StoredFile
+
+load_dotenv()
+
+async def migrate(dry_run: bool) -> int:
+    await init_db()
+    collection = StoredFile.get_pymongo_collection()
+    query = {"ref_count": {"$exists": True}}
+    if dry_run:
+        count = await collection.count_documents(query)
+        print(f"Found {count} stored files to rename ref_count on")
+        return count
+    result = await collection.update_many(query, {
+        "$rename": {"ref_count": "upload_count"},
+        "$set": {"updated_at": datetime.now()},  # So incremental backups pick the rename up
+    })
+    print(f"Renamed ref_count on {result.modified_count} stored files")
+    return result.modified_count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the documents to rename")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.dry_run))
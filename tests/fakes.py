@@ -0,0 +1,116 @@
+"""In-memory stand-ins for the async pymongo collections the services use"""
+from types import SimpleNamespace
+
+class FakeCursor:
+    def __init__(self, docs, projection=None, on_iter=None):
+        self._docs = docs
+        self._projection = projection
+        self._on_iter = on_iter  # Called before each document (to interleave concurrent edits)
+
+    def sort(self, key, direction=1):
+        self._docs = sorted(self._docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._docs:
+            if self._on_iter:
+                self._on_iter()
+            yield self._project(doc)
+
+    def _project(self, doc):
+        if not self._projection:
+            return dict(doc)
+        # Like Mongo: only the listed fields, plus _id unless excluded
+        keys = [key for key, include in self._projection.items() if include]
+        if self._projection.get("_id", 1) and "_id" not in keys:
+            keys.append("_id")
+        return {key: doc[key] for key in keys if key in doc}
+
+class FakeCollection:
+    """
+    Just enough of an async Mongo collection for the services under test.
+
+    Queries support equality, $in, $ne and $gte. `calls` counts every query or write,
+    `queries` / `updates` record the filters of find() / update_many(). Collections
+    created with the same `database` dict can be renamed over each other (restores).
+    """
+    def __init__(self, docs, name="live", database=None, on_iter=None):
+        self.docs = docs
+        self.name = name
+        self.database = database if database is not None else {}
+        self.database[name] = self
+        self.on_iter = on_iter
+        self.fail_after = None  # insert_many raises once the collection would exceed this
+        self.calls = 0
+        self.queries = []
+        self.updates = []
+
+    @staticmethod
+    def _matches(doc, query):
+        for key, cond in (query or {}).items():
+            value = doc.get(key)
+            if isinstance(cond, dict):
+                if "$in" in cond and value not in cond["$in"]:
+                    return False
+                if "$ne" in cond and value == cond["$ne"]:
+                    return False
+                if "$gte" in cond and not value >= cond["$gte"]:
+                    return False
+            elif value != cond:
+                return False
+        return True
+
+    def _select(self, query):
+        self.calls += 1
+        return [d for d in self.docs if self._matches(d, query)]
+
+    def find(self, query=None, projection=None, **kwargs):
+        self.queries.append(query)
+        return FakeCursor(self._select(query), projection, self.on_iter)
+
+    async def distinct(self, key, query=None):
+        return list(dict.fromkeys(d.get(key) for d in self._select(query)))
+
+    async def count_documents(self, query):
+        return len(self._select(query))
+
+    async def insert_many(self, docs, ordered=True):
+        if self.fail_after is not None and len(self.docs) + len(docs) > self.fail_after:
+            raise RuntimeError("insert failed")
+        self.docs.extend(docs)
+
+    async def bulk_write(self, requests, ordered=True):
+        for op in requests:  # ReplaceOne upserts
+            self.docs[:] = [d for d in self.docs if d["_id"] != op._filter["_id"]]
+            self.docs.append(op._doc)
+
+    async def update_many(self, query, update):
+        self.updates.append(query)
+        matched = self._select(query)
+        for doc in matched:
+            doc.update(update["$set"])
+        return SimpleNamespace(modified_count=len(matched))
+
+    async def delete_many(self, query):
+        doomed = self._select(query)
+        self.docs[:] = [d for d in self.docs if not any(d is gone for gone in doomed)]
+        return SimpleNamespace(deleted_count=len(doomed))
+
+    async def delete_one(self, query):
+        return await self.delete_many(query)
+
+    async def drop(self):
+        self.docs.clear()
+
+    async def index_information(self):
+        return {"_id_": {"key": [("_id", 1)]}}
+
+    async def create_indexes(self, indexes):
+        pass
+
+    async def rename(self, new_name, dropTarget=False):
+        self.database[new_name].docs[:] = self.docs
+        self.docs = []
@@ -0,0 +1,24 @@
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from app.ui.components.board_search import BoardSearch
+
+def test_starts_from_facet_counts():
+    search = BoardSearch({'a': 2, 'b': 1})
+    assert search.tag_counts == {'a': 2, 'b': 1}
+
+def test_update_node_tags_is_incremental():
+    search = BoardSearch({'a': 2, 'b': 1})
+    search.update_node_tags(['a', 'b'], ['a', 'c'])
+    assert search.tag_counts == {'a': 2, 'c': 1}
+
+    search.update_node_tags(['a'], [])
+    assert search.tag_counts == {'a': 1, 'c': 1}
+
+def test_apply_tag_changes_drops_exhausted_tags():
+    search = BoardSearch({'x': 1})
+    search.apply_tag_changes(removed=['x'], added=['y', 'y'])
+    assert 'x' not in search.tag_counts
+    assert search.tag_counts['y'] == 2
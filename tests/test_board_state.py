@@ -0,0 +1,77 @@
+import sys
+import os
+from types import SimpleNamespace
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from app.ui.board_state import BoardState
+
+def node(id, parent_id=None, type='text', x=0, y=0, width=100, height=100):
+    return SimpleNamespace(id=id, parent_id=parent_id, type=type, x=x, y=y, width=width, height=height)
+
+def edge(id, from_node, to_node):
+    return SimpleNamespace(id=id, fromNode=from_node, toNode=to_node)
+
+def test_indexes_are_maintained_incrementally():
+    board = BoardState(
+        [node('G'), node('A', 'G'), node('B', 'G'), node('C')],
+        [edge('e1', 'A', 'C'), edge('e2', 'B', 'A')]
+    )
+    
+    assert board.get_node('A').id == 'A'
+    assert {n.id for n in board.children_of('G')} == {'A', 'B'}
+    assert {e.id for e in board.edges_of('A')} == {'e1', 'e2'}
+    # Insertion order is preserved for serialization
+    assert [n.id for n in board.nodes] == ['G', 'A', 'B', 'C']
+    
+    board.set_parent(board.get_node('C'), 'G')
+    board.set_parent(board.get_node('A'), None)
+    assert {n.id for n in board.children_of('G')} == {'B', 'C'}
+    assert board.get_node('A').parent_id is None
+
+def test_remove_nodes_cascades_edges():
+    board = BoardState(
+        [node('G'), node('A', 'G'), node('B'), node('C')],
+        [edge('e1', 'A', 'B'), edge('e2', 'B', 'C'), edge('e3', 'C', 'C')]
+    )
+    
+    removed_nodes, removed_edges = board.remove_nodes(['A', 'B'])
+    
+    assert {n.id for n in removed_nodes} == {'A', 'B'}
+    assert {e.id for e in removed_edges} == {'e1', 'e2'}
+    assert [e.id for e in board.edges] == ['e3']
+    assert board.children_of('G') == []
+    assert board.edges_of('A') == []
+    assert not board.has_node('A') and board.has_node('C')
+
+def test_re_adding_replaces_previous_entry():
+    board = BoardState([node('A', 'G1')], [edge('e1', 'A', 'B')])
+    
+    board.add_node(node('A', 'G2'))
+    board.add_edge(edge('e1', 'A', 'C'))
+    
+    assert board.children_of('G1') == []
+    assert [n.id for n in board.children_of('G2')] == ['A']
+    assert board.edges_of('B') == []
+    assert [e.id for e in board.edges_of('C')] == ['e1']
+    assert len(board) == 1
+
+def test_spatial_queries_follow_moves_and_resizes():
+    outer = node('outer', type='group', x=0, y=0, width=1000, height=1000)
+    inner = node('inner', type='group', x=100, y=100, width=200, height=200)
+    card = node('card', x=150, y=150, width=50, height=50)
+    board = BoardState([outer, inner, card])
+    
+    assert board.group_at(150, 150).id == 'inner'
+    assert board.group_at(500, 500).id == 'outer'
+    assert board.group_at(5000, 5000) is None
+    assert {n.id for n in board.nodes_at(160, 160)} == {'outer', 'inner', 'card'}
+    
+    board.move_node(inner, 3000, 3000)
+    assert board.group_at(150, 150).id == 'outer'
+    assert board.group_at(3100, 3100).id == 'inner'
+    
+    board.resize_node(outer, 10, 10)
+    assert board.group_at(500, 500) is None
+    assert {n.id for n in board.nodes_in_rect(140, 140, 20, 20)} == {'card'}
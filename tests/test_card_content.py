@@ -0,0 +1,49 @@
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from app.models.canvas_node import CanvasNodeView
+
+def view(**fields):
+    defaults = dict(id='n1', type='text', x=0, y=0, width=300, height=200)
+    defaults.update(fields)
+    return CanvasNodeView(**defaults)
+
+def test_derived_fields_match_parsing():
+    node = view(text="## My heading\n# Sub\nSome *bold* and `code`")
+    node.refresh_derived()
+    assert node.title == "My heading"
+    assert node.preview == "Sub\nSome bold and code"
+    assert node.get_title() == "My heading"
+    assert node.get_preview() == "Sub\nSome bold and code"
+
+def test_stored_values_are_preferred():
+    node = view(text="# Original\nbody", title="Stored", preview="stored preview")
+    assert node.get_title() == "Stored"
+    assert node.get_preview() == "stored preview"
+
+def test_display_title_is_truncated():
+    node = view(text="x" * 80)
+    node.refresh_derived()
+    assert len(node.title) == 80
+    assert node.get_title() == "x" * 50
+
+def test_non_text_nodes():
+    group = view(type='group', text=None)
+    group.refresh_derived()
+    assert group.title is None
+    assert group.preview == ""
+    assert group.get_title() == "Untitled Group"
+
+def test_changes_include_derived_fields():
+    node = view(text="# Title\nbody")
+    node.refresh_derived()
+    changes = node.changes()
+    assert changes["title"] == "Title"
+    assert changes["preview"] == "body"
+
+def test_beanie_projection_covers_every_field():
+    projection = CanvasNodeView.Settings.projection
+    assert projection["id"] == "$_id"
+    assert set(projection) == set(CanvasNodeView.model_fields)
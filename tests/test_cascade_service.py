@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+from contextlib import ExitStack
+from unittest.mock import patch
+
+sys.path.append(os.getcwd())
+
+from app.models.canvas_edge import CanvasEdge
+from app.models.canvas_node import CanvasNode
+from app.models.folder import Folder
+from app.models.whiteboard import Whiteboard
+from app.services.cascade_service import CascadeService
+from tests.fakes import FakeCollection
+
+def fake_db():
+    data = {
+        "boards": [
+            {"_id": "root", "folder_id": "f1", "parent_id": None},
+            {"_id": "child", "folder_id": None, "parent_id": "root"},
+            {"_id": "linked", "folder_id": None, "parent_id": None},
+            {"_id": "grandchild", "folder_id": None, "parent_id": "child"},
+            {"_id": "other", "folder_id": "f1", "parent_id": None},
+        ],
+        "nodes": [
+            {"_id": "n1", "whiteboard_id": "root", "sub_whiteboard_id": "linked"},
+            {"_id": "n2", "whiteboard_id": "child", "sub_whiteboard_id": None},
+            {"_id": "n3", "whiteboard_id": "grandchild", "sub_whiteboard_id": "root"},  # Cycle
+            {"_id": "n4", "whiteboard_id": "other", "sub_whiteboard_id": "root"},
+            {"_id": "n5", "whiteboard_id": "gone", "sub_whiteboard_id": None},
+        ],
+        "edges": [
+            {"_id": "e1", "whiteboard_id": "root"},
+            {"_id": "e2", "whiteboard_id": "other"},
+            {"_id": "e3", "whiteboard_id": "gone"},
+        ],
+        "folders": [{"_id": "f1"}],
+    }
+    collections = {name: FakeCollection(docs) for name, docs in data.items()}
+    stack = ExitStack()
+    for model, name in ((Whiteboard, "boards"), (CanvasNode, "nodes"), (CanvasEdge, "edges"), (Folder, "folders")):
+        stack.enter_context(patch.object(model, "get_pymongo_collection", lambda c=collections[name]: c))
+    stack.enter_context(patch("app.services.cascade_service.SearchService.remove_boards"))
+    return stack, data, collections
+
+def ids(docs):
+    return sorted(d["_id"] for d in docs)
+
+def test_subtree_follows_parent_and_card_links_without_looping():
+    stack, _, _ = fake_db()
+    with stack:
+        subtree = asyncio.run(CascadeService.collect_subtree("root"))
+    assert subtree[0] == "root"
+    assert sorted(subtree) == ["child", "grandchild", "linked", "root"]
+
+def test_delete_board_removes_content_and_unlinks_it():
+    stack, data, _ = fake_db()
+    with stack:
+        status = asyncio.run(CascadeService.delete_whiteboard("root"))
+    assert status["state"] == "done"
+    assert (status["boards"], status["nodes"], status["edges"]) == (1, 1, 1)
+    assert ids(data["boards"]) == ["child", "grandchild", "linked", "other"]
+    # The sub-board survives as a top-level board, links to the deleted board are cleared
+    assert next(b for b in data["boards"] if b["_id"] == "child")["parent_id"] is None
+    assert next(n for n in data["nodes"] if n["_id"] == "n4")["sub_whiteboard_id"] is None
+    # Stamped, so incremental backups carry the cleared links
+    assert "updated_at" in next(b for b in data["boards"] if b["_id"] == "child")
+    assert "updated_at" in next(n for n in data["nodes"] if n["_id"] == "n4")
+
+def test_delete_subtree_uses_a_bounded_number_of_queries():
+    stack, data, collections = fake_db()
+    with stack:
+        status = asyncio.run(CascadeService.delete_whiteboard("root", include_subtree=True))
+    assert status["boards"] == 4 and status["nodes"] == 3
+    assert ids(data["boards"]) == ["other"]
+    assert ids(data["nodes"]) == ["n4", "n5"]
+    # Subtree: 2 queries per level (3 levels), a count, then a fixed set of writes
+    assert sum(c.calls for c in collections.values()) == 6 + 1 + 5
+
+def test_large_cascades_run_in_the_background():
+    stack, data, _ = fake_db()
+    finished = []
+
+    async def on_done(status):
+        finished.append(status)
+
+    async def run():
+        status = await CascadeService.delete_whiteboard("root", include_subtree=True, background=True, on_done=on_done)
+        # Boards are gone immediately, the content follows
+        assert status["state"] == "running"
+        assert ids(data["boards"]) == ["other"]
+        while CascadeService._tasks:
+            await asyncio.sleep(0)
+        return CascadeService.job(status["id"])
+
+    with stack:
+        job = asyncio.run(run())
+    assert job["state"] == "done" and job["nodes"] == 3 and job["edges"] == 1
+    assert finished == [job]
+
+    # Finished jobs are dropped after JOB_RETENTION
+    with patch.object(CascadeService, "JOB_RETENTION", 0):
+        assert CascadeService.job(job["id"]) is None
+
+def test_delete_folder_moves_or_deletes_its_boards():
+    stack, data, _ = fake_db()
+    with stack:
+        status = asyncio.run(CascadeService.delete_folder("f1"))
+    assert status["moved"] == 2 and not data["folders"]
+    assert all(b["folder_id"] is None for b in data["boards"])
+    assert all("updated_at" in b for b in data["boards"] if b["_id"] in ("root", "other"))
+
+    stack, data, _ = fake_db()
+    with stack:
+        status = asyncio.run(CascadeService.delete_folder("f1", delete_whiteboards=True))
+    assert status["boards"] == 2
+    assert ids(data["boards"]) == ["child", "grandchild", "linked"]
+
+def test_purge_orphans():
+    stack, data, _ = fake_db()
+    with stack:
+        dry = asyncio.run(CascadeService.purge_orphans(dry_run=True))
+        assert len(data["nodes"]) == 5
+        status = asyncio.run(CascadeService.purge_orphans())
+    assert dry == status == {"boards": 1, "nodes": 1, "edges": 1}
+    assert "n5" not in ids(data["nodes"]) and "e3" not in ids(data["edges"])
@@ -0,0 +1,258 @@
+import sys
+import os
+import io
+import json
+import asyncio
+import zipfile
+from contextlib import ExitStack
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from app.services.data_service import DataService, BACKUP_COLLECTIONS
+from tests.fakes import FakeCollection
+
+def fake_document(model, data):
+    """Stand-in for model validation: "id" -> "_id", timestamps parsed back"""
+    if isinstance(data.get("updated_at"), str):
+        data["updated_at"] = datetime.fromisoformat(data["updated_at"])
+    return {"_id": data.pop("id"), **data}
+
+def fake_database(data, staged=None):
+    """Patch every backed-up model to read from / restore into in-memory documents"""
+    stack = ExitStack()
+    for name, model in BACKUP_COLLECTIONS.items():
+        database = {}
+        collection = FakeCollection(data.setdefault(name, []), name, database)
+        staging = FakeCollection([], name + DataService.STAGING_SUFFIX, database)
+        if staged is not None:
+            staged[name] = staging
+        stack.enter_context(patch.object(model, "get_pymongo_collection", lambda c=collection: c))
+    stack.enter_context(patch.object(
+        DataService, "_staging_collection",
+        staticmethod(lambda model: model.get_pymongo_collection().database[model.get_pymongo_collection().name + DataService.STAGING_SUFFIX])
+    ))
+    # Model validation/encoding needs an initialised Beanie; keep documents as they are
+    stack.enter_context(patch.object(DataService, "_to_document", staticmethod(fake_document)))
+    return stack
+
+@pytest.fixture(autouse=True)
+def backup_state_dir(tmp_path):
+    with patch.object(DataService, "BACKUP_STATE_DIR", str(tmp_path / "backup_state")):
+        yield
+
+def sample_data(node_count=5):
+    stamp = datetime(2024, 1, 1, 12, 0)
+    return {
+        "whiteboards": [{"_id": "wb1", "name": "Board", "updated_at": stamp}],
+        "nodes": [
+            {"_id": f"n{i}", "whiteboard_id": "wb1", "type": "text", "text": f"# Card {i}", "updated_at": stamp}
+            for i in range(node_count)
+        ],
+    }
+
+def read_archive(data: bytes):
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    docs = {
+        name: [json.loads(line) for line in zf.read(f"db/{name}.ndjson").decode().splitlines()]
+        for name in BACKUP_COLLECTIONS
+    }
+    return zf, docs
+
+def test_stream_backup_writes_ndjson_and_uploads(tmp_path):
+    uploads = tmp_path / "uploads"
+    (uploads / "sub").mkdir(parents=True)
+    (uploads / "a.png").write_bytes(b"\x89PNG fake")
+    (uploads / "sub" / "notes.txt").write_text("hello")
+
+    async def collect():
+        return b"".join([chunk async for chunk in DataService.stream_backup()])
+
+    with fake_database(sample_data()), \
+         patch.object(DataService, "STATIC_UPLOADS_DIR", str(uploads)), \
+         patch.object(DataService, "EXPORT_BATCH_SIZE", 2):
+        data = asyncio.run(collect())
+
+    zf, docs = read_archive(data)
+    assert [d["id"] for d in docs["nodes"]] == [f"n{i}" for i in range(5)]
+    assert docs["whiteboards"][0]["updated_at"] == "2024-01-01T12:00:00"
+    assert docs["edges"] == []
+    assert zf.read("uploads/a.png") == b"\x89PNG fake"
+    assert zf.read("uploads/sub/notes.txt") == b"hello"
+
+    manifest = json.loads(zf.read("manifest.json"))
+    assert manifest["format"] == "ndjson"
+    assert manifest["collections"]["nodes"] == 5
+    assert manifest["uploads"] == 2
+
+def test_export_all_data_writes_zip_file(tmp_path):
+    with fake_database(sample_data(3)), \
+         patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "missing")):
+        path = asyncio.run(DataService.export_all_data())
+    try:
+        with open(path, "rb") as f:
+            _, docs = read_archive(f.read())
+        assert len(docs["nodes"]) == 3
+    finally:
+        os.remove(path)
+
+def export_archive(data, uploads_dir):
+    async def collect():
+        return b"".join([chunk async for chunk in DataService.stream_backup()])
+    with fake_database(data), patch.object(DataService, "STATIC_UPLOADS_DIR", str(uploads_dir)):
+        return asyncio.run(collect())
+
+def test_restore_round_trip_in_batches(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "img.png").write_bytes(b"png")
+    archive = tmp_path / "backup.zip"
+    archive.write_bytes(export_archive(sample_data(7), tmp_path / "src"))
+
+    live = {"nodes": [{"_id": "old"}]}
+    (tmp_path / "dst").mkdir()
+    (tmp_path / "dst" / "stale.txt").write_text("old")
+    events = []
+    with fake_database(live), patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "dst")):
+        counts = asyncio.run(DataService.import_all_data(
+            str(archive), progress=lambda *args: events.append(args), batch_size=3
+        ))
+
+    assert counts["nodes"] == 7
+    assert [d["_id"] for d in live["nodes"]] == [f"n{i}" for i in range(7)]
+    assert live["whiteboards"][0]["name"] == "Board"
+    assert [e for e in events if e[0] == "nodes"] == [("nodes", 3, 7), ("nodes", 6, 7), ("nodes", 7, 7)]
+    assert sorted(p.name for p in (tmp_path / "dst").iterdir()) == ["img.png"]
+
+def test_failed_restore_leaves_live_data(tmp_path):
+    archive = tmp_path / "backup.zip"
+    archive.write_bytes(export_archive(sample_data(10), tmp_path / "none"))
+
+    live = {"nodes": [{"_id": "keep"}], "whiteboards": [{"_id": "wb"}]}
+    staged = {}
+    with fake_database(live, staged), patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "dst")):
+        staged["nodes"].fail_after = 5
+        try:
+            asyncio.run(DataService.import_all_data(str(archive), batch_size=3))
+            assert False, "import should fail"
+        except RuntimeError:
+            pass
+
+    assert live["nodes"] == [{"_id": "keep"}]
+    assert live["whiteboards"] == [{"_id": "wb"}]
+    assert all(not collection.docs for collection in staged.values())
+
+def test_restore_streams_legacy_database_json(tmp_path):
+    legacy = {
+        "version": "1.0",
+        "timestamp": "2024-01-01T00:00:00",
+        "whiteboards": [{"id": "wb1", "name": "Legacy"}],
+        "folders": [],
+        "nodes": [{"id": f"n{i}", "whiteboard_id": "wb1"} for i in range(4)],
+        "edges": [],
+        "library_cards": [],
+    }
+    archive = tmp_path / "legacy.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("database.json", json.dumps(legacy, indent=2))
+
+    live = {}
+    with fake_database(live), patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "dst")):
+        counts = asyncio.run(DataService.import_all_data(str(archive), batch_size=2))
+
+    assert counts == {"whiteboards": 1, "folders": 0, "nodes": 4, "edges": 0, "library_cards": 0, "stored_files": 0}
+    assert [d["_id"] for d in live["nodes"]] == ["n0", "n1", "n2", "n3"]
+
+def test_incremental_backup_chain(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    for name in ("keep.png", "gone.png"):
+        (uploads / name).write_bytes(name.encode())
+        os.utime(uploads / name, (0, 0))
+
+    data = sample_data(4)
+    async def export(incremental):
+        return b"".join([chunk async for chunk in DataService.stream_backup(incremental)])
+
+    with fake_database(data), patch.object(DataService, "STATIC_UPLOADS_DIR", str(uploads)):
+        full = asyncio.run(export(False))
+        # Changes after the full backup
+        now = datetime.now()
+        data["nodes"][1].update(text="# Edited", updated_at=now)
+        data["nodes"].append({"_id": "n9", "whiteboard_id": "wb1", "text": "# New", "updated_at": now})
+        del data["nodes"][0]
+        (uploads / "gone.png").unlink()
+        (uploads / "new.png").write_bytes(b"new")
+        increment = asyncio.run(export(True))
+
+    zf, docs = read_archive(increment)
+    manifest = json.loads(zf.read("manifest.json"))
+    assert manifest["kind"] == "incremental"
+    assert manifest["base_id"] == json.loads(zipfile.ZipFile(io.BytesIO(full)).read("manifest.json"))["backup_id"]
+    assert sorted(d["id"] for d in docs["nodes"]) == ["n1", "n9"]
+    assert docs["whiteboards"] == []
+    assert zf.read("deleted/nodes.ids").decode().split() == ["n0"]
+    assert zf.read("deleted/uploads.ids").decode().split() == ["gone.png"]
+    assert sorted(n for n in zf.namelist() if n.startswith("uploads/")) == ["uploads/new.png"]
+
+    (tmp_path / "full.zip").write_bytes(full)
+    (tmp_path / "inc.zip").write_bytes(increment)
+    live = {}
+    restored = tmp_path / "restored"
+    with fake_database(live), patch.object(DataService, "STATIC_UPLOADS_DIR", str(restored)):
+        counts = asyncio.run(DataService.import_all_data([str(tmp_path / "inc.zip"), str(tmp_path / "full.zip")]))
+
+    assert counts["nodes"] == 4
+    nodes = {d["_id"]: d for d in live["nodes"]}
+    assert sorted(nodes) == ["n1", "n2", "n3", "n9"]
+    assert nodes["n1"]["text"] == "# Edited"
+    assert sorted(p.name for p in restored.iterdir()) == ["keep.png", "new.png"]
+
+def test_incremental_restore_rejects_broken_chain(tmp_path):
+    async def export(incremental):
+        sink = io.BytesIO()
+        await DataService.write_backup(sink, incremental)
+        return sink.getvalue()
+
+    with fake_database(sample_data(2)), patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "none")):
+        asyncio.run(export(False))
+        paths = []
+        for i in range(2):
+            paths.append(tmp_path / f"inc{i}.zip")
+            paths[-1].write_bytes(asyncio.run(export(True)))
+
+    with fake_database({}):
+        with pytest.raises(ValueError):
+            asyncio.run(DataService.import_all_data([str(p) for p in paths]))
+
+def test_restore_resets_the_incremental_base(tmp_path):
+    async def export(incremental):
+        sink = io.BytesIO()
+        await DataService.write_backup(sink, incremental)
+        return sink.getvalue()
+
+    # An older backup, restored after a newer one became the incremental base
+    old = sample_data(3)
+    old["nodes"] = [dict(n, _id=f"old{i}", updated_at=datetime(2020, 1, 1)) for i, n in enumerate(old["nodes"])]
+    with fake_database(old), patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "none")):
+        (tmp_path / "old.zip").write_bytes(asyncio.run(export(False)))
+
+    live = sample_data(2)
+    with fake_database(live), patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "none")):
+        asyncio.run(export(False))
+        asyncio.run(DataService.import_all_data(str(tmp_path / "old.zip")))
+        assert DataService.load_backup_state() is None
+        # Falls back to a full backup, which holds the restored documents despite their old updated_at
+        (tmp_path / "next.zip").write_bytes(asyncio.run(export(True)))
+        new = datetime.now()
+        live["nodes"].append({"_id": "n9", "whiteboard_id": "wb1", "text": "# New", "updated_at": new})
+        (tmp_path / "inc.zip").write_bytes(asyncio.run(export(True)))
+
+    assert json.loads(zipfile.ZipFile(tmp_path / "next.zip").read("manifest.json"))["kind"] == "full"
+    restored = {}
+    with fake_database(restored), patch.object(DataService, "STATIC_UPLOADS_DIR", str(tmp_path / "dst")):
+        asyncio.run(DataService.import_all_data([str(tmp_path / "next.zip"), str(tmp_path / "inc.zip")]))
+    assert sorted(d["_id"] for d in restored["nodes"]) == ["n9", "old0", "old1", "old2"]
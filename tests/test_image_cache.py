@@ -0,0 +1,108 @@
+import io
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.append(os.getcwd())
+
+from app.utils import image_cache
+from app.utils.image_cache import ImagePayloadCache, get_image_cache
+from app.utils.linear_export import NarrativeExporter
+from app.utils.markdown_render import MarkdownRenderer
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+def write_upload(root, name, data=PNG):
+    folder = root / "app" / "static" / "uploads"
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / name).write_bytes(data)
+    return str(folder / name)
+
+def test_repeated_image_is_read_once(tmp_path):
+    path = write_upload(tmp_path, "a.png")
+    cache = ImagePayloadCache(max_bytes=1024 * 1024, workers=2)
+    first = cache.data_uri(path)
+    assert first.startswith("data:image/png;base64,")
+    assert cache.data_uri(path) == first
+    assert cache.stats == {"hits": 1, "reads": 1}
+
+    # A changed file is a new key
+    os.utime(path, ns=(1, 1))
+    cache.data_uri(path)
+    assert cache.stats["reads"] == 2
+
+def test_lru_eviction_and_prefetch(tmp_path):
+    paths = [write_upload(tmp_path, f"{i}.png") for i in range(3)]
+    payload_len = len(ImagePayloadCache().data_uri(paths[0]))
+    cache = ImagePayloadCache(max_bytes=payload_len * 2, workers=2)
+    try:
+        cache.prefetch(paths[:2] + [str(tmp_path / "missing.png")])
+        cache.data_uri(paths[0])
+        cache.data_uri(paths[1])
+        assert cache.stats["reads"] == 2
+
+        cache.data_uri(paths[0])  # 0 is now more recent than 1
+        cache.data_uri(paths[2])  # evicts 1
+        assert cache.stats["reads"] == 3
+        cache.data_uri(paths[0])
+        assert cache.stats["reads"] == 3
+        cache.data_uri(paths[1])
+        assert cache.stats["reads"] == 4
+    finally:
+        cache.shutdown()
+
+def make_exporter(images, cache=None):
+    nodes = [
+        {'id': 'T', 'type': 'text', 'text': '# Intro', 'x': 0, 'y': 0},
+        {'id': 'I1', 'type': 'file', 'file': '/static/uploads/u1_photo.png', 'x': 0, 'y': 10},
+        {'id': 'I2', 'type': 'file', 'file': '/static/uploads/u1_photo.png', 'x': 0, 'y': 20},
+        {'id': 'M', 'type': 'file', 'file': '/static/uploads/gone.png', 'x': 0, 'y': 30},
+    ]
+    return NarrativeExporter(nodes, [], renderer=MarkdownRenderer(workers=1), images=images, image_cache=cache)
+
+def test_inline_export_uses_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_upload(tmp_path, "u1_photo.png")
+    cache = ImagePayloadCache(workers=2)
+    try:
+        html = make_exporter(NarrativeExporter.IMAGES_INLINE, cache).generate_html("Board")
+    finally:
+        cache.shutdown()
+    assert html.count("data:image/png;base64,") == 2
+    assert cache.stats["reads"] == 1
+    assert "[Image not found: gone.png]" in html
+
+def test_zip_export_keeps_images_as_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_upload(tmp_path, "u1_photo.png")
+    exporter = make_exporter(NarrativeExporter.IMAGES_FILES)
+    buffer = io.BytesIO()
+    exporter.write_zip(buffer, "Board")
+
+    with zipfile.ZipFile(buffer) as zf:
+        assert sorted(zf.namelist()) == ["images/u1_photo.png", "index.html"]
+        html = zf.read("index.html").decode("utf-8")
+        assert zf.read("images/u1_photo.png") == PNG
+    assert "base64" not in html
+    assert html.count('src="images/u1_photo.png"') == 2
+    assert "[Image not found: gone.png]" in html
+
+def test_concurrent_first_calls_share_one_cache():
+    barrier = threading.Barrier(8)
+
+    def slow_cache():
+        time.sleep(0.05)  # Widen the window between the check and the assignment
+        return ImagePayloadCache()
+
+    def first_call(_):
+        barrier.wait()
+        return get_image_cache()
+
+    with patch.object(image_cache, "_default_cache", None), \
+            patch.object(image_cache, "ImagePayloadCache", slow_cache), ThreadPoolExecutor(8) as pool:
+        caches = list(pool.map(first_call, range(8)))
+    assert all(c is caches[0] for c in caches)
@@ -0,0 +1,28 @@
+import sys
+import os
+import io
+import json
+
+sys.path.append(os.getcwd())
+
+from app.utils.json_stream import iter_object_arrays
+
+DATA = {
+    "version": "1.0",
+    "nodes": [{"id": i, "text": 'tricky ",]} text', "score": 1234.5e-3} for i in range(20)],
+    "empty": [],
+    "numbers": [1, 22, 333, -4.5e10, True, None],
+    "meta": {"nested": [1, 2]},
+    "edges": [{"id": "e1"}],
+}
+
+def expected():
+    return [(k, item) for k, v in DATA.items() if isinstance(v, list) for item in v]
+
+def test_matches_json_load_for_any_chunk_size():
+    for text in (json.dumps(DATA), json.dumps(DATA, indent=2)):
+        for chunk_size in (1, 2, 5, 13, 1024):
+            assert list(iter_object_arrays(io.StringIO(text), chunk_size)) == expected()
+
+def test_empty_object():
+    assert list(iter_object_arrays(io.StringIO(" {} "))) == []
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, patch
+
+sys.path.append(os.getcwd())
+
+from app.models.canvas_node import CanvasNode, CanvasNodeView
+from app.models.card_library import LibraryCard
+from app.services.library_service import LibraryService
+from tests.fakes import FakeCollection
+
+def view(node_id, text="", tags=(), library_card_id=None):
+    return CanvasNodeView(id=node_id, type="text", x=0, y=0, width=100, height=100,
+                          text=text, tags=list(tags), library_card_id=library_card_id)
+
+def test_resolve_merges_all_cards_in_one_query():
+    cards = FakeCollection([
+        {"_id": "l1", "content": "# Fresh\nbody", "tags": ["x"]},
+        {"_id": "l2", "content": "Same", "tags": []},
+    ])
+    nodes = [view("a", "# Stale", library_card_id="l1"), view("b", "Same", library_card_id="l2"),
+             view("c", "Plain"), view("d", "Kept", library_card_id="deleted")]
+    with patch.object(LibraryCard, "get_pymongo_collection", return_value=cards):
+        merged = asyncio.run(LibraryService.resolve(nodes))
+
+    assert merged == 1
+    assert len(cards.queries) == 1
+    assert nodes[0].text == "# Fresh\nbody" and nodes[0].tags == ["x"] and nodes[0].title == "Fresh"
+    assert nodes[2].text == "Plain" and nodes[3].text == "Kept"
+
+def test_resolve_without_projections_makes_no_query():
+    cards = FakeCollection([])
+    with patch.object(LibraryCard, "get_pymongo_collection", return_value=cards):
+        assert asyncio.run(LibraryService.resolve([view("a", "Plain")])) == 0
+    assert cards.queries == []
+
+def test_update_card_fans_out_to_projections_and_open_sessions():
+    nodes = FakeCollection([
+        {"_id": "a", "type": "text", "whiteboard_id": "wb1", "library_card_id": "l1", "tags": ["old"]},
+        {"_id": "b", "type": "text", "whiteboard_id": "wb2", "library_card_id": "l1", "tags": ["old"]},
+        {"_id": "c", "type": "text", "whiteboard_id": "wb1", "library_card_id": None, "tags": []},
+    ])
+    card = LibraryCard.model_construct(id="l1", title="", content="Old", tags=["old"])
+    received = []
+
+    async def listener(card_id, fields):
+        received.append((card_id, fields["text"]))
+
+    LibraryService.subscribe("wb1", listener)
+    try:
+        with patch.object(CanvasNode, "get_pymongo_collection", return_value=nodes), \
+             patch.object(LibraryCard, "save", AsyncMock()), \
+             patch("app.services.library_service.SearchService.index_nodes") as index_nodes, \
+             patch("app.services.library_service.TagFacetService.update_node_tags") as update_tags:
+            count = asyncio.run(LibraryService.update_card(card, content="# New\ntext", tags=["new"]))
+    finally:
+        LibraryService.unsubscribe("wb1", listener)
+
+    assert count == 2
+    assert nodes.updates == [{"library_card_id": "l1"}]
+    assert [d.get("text") for d in nodes.docs] == ["# New\ntext", "# New\ntext", None]
+    assert nodes.docs[0]["title"] == "New" and nodes.docs[0]["tags"] == ["new"]
+    assert received == [("l1", "# New\ntext")]
+    assert update_tags.call_count == 2
+    assert {n.id for n in index_nodes.call_args[0][0]} == {"a", "b"}
+    assert "wb1" not in LibraryService._listeners
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import markdown
+
+sys.path.append(os.getcwd())
+
+from app.utils import markdown_render
+from app.utils.markdown_render import EXTENSIONS, MarkdownRenderer, RenderCache, content_key, get_renderer, render
+
+def test_reused_converter_matches_fresh_markdown():
+    texts = ["# Title\nline\nnext", "```\ncode\n```", "| a | b |\n|---|---|\n| 1 | 2 |", "[^1]: not a footnote"]
+    for text in texts + texts:
+        assert render(text) == markdown.markdown(text, extensions=EXTENSIONS)
+
+def test_cache_hits_skip_rendering(tmp_path):
+    cache = RenderCache(str(tmp_path), 1024 * 1024)
+    renderer = MarkdownRenderer(cache, workers=1)
+    first = renderer.render_many(["# A", "# B", "# A"])
+    assert first == {"# A": render("# A"), "# B": render("# B")}
+    assert renderer.stats == {"hits": 0, "rendered": 2}
+
+    # A new renderer (next export / restart) finds both on disk
+    again = MarkdownRenderer(RenderCache(str(tmp_path), 1024 * 1024), workers=1)
+    assert again.render_many(["# B", "# A"]) == first
+    assert again.stats == {"hits": 2, "rendered": 0}
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path), 3500)
+    for i in range(3):
+        cache.put(content_key(str(i)), "x" * 1000)
+        path = cache._path(content_key(str(i)))
+        os.utime(path, (i, i))
+    # Entry 0 is oldest, but a hit makes it the most recently used
+    assert cache.get(content_key("0")) == "x" * 1000
+
+    cache.put(content_key("3"), "x" * 1000)
+    assert cache.get(content_key("1")) is None
+    assert cache.get(content_key("2")) is not None
+    assert cache.get(content_key("0")) is not None
+    assert cache.get(content_key("3")) is not None
+
+def test_process_pool_output_matches_inline(tmp_path):
+    texts = [f"## Card {i}\n* item {i}\n\n`code`" for i in range(MarkdownRenderer.POOL_THRESHOLD * 2)]
+    renderer = MarkdownRenderer(workers=2)
+    try:
+        results = renderer.render_many(texts)
+        assert renderer._pool is not None
+    finally:
+        renderer.shutdown()
+    assert results == {text: render(text) for text in texts}
+
+def test_concurrent_renders_do_not_share_state():
+    texts = [f"# Title {i}\n\n| a | b |\n|---|---|\n| {i} | x |\n\n```\ncode {i}\n```" for i in range(8)]
+    expected = {text: markdown.markdown(text, extensions=EXTENSIONS) for text in texts}
+    barrier = threading.Barrier(len(texts))
+
+    def worker(text):
+        barrier.wait()
+        return all(render(text) == expected[text] for _ in range(200))
+
+    with ThreadPoolExecutor(len(texts)) as pool:
+        assert all(pool.map(worker, texts))
+
+def test_concurrent_first_calls_share_one_renderer():
+    barrier = threading.Barrier(8)
+
+    def first_call(_):
+        barrier.wait()
+        return get_renderer()
+
+    def slow_cache(directory, max_bytes):
+        time.sleep(0.05)  # Widen the window between the check and the assignment
+        return RenderCache(directory, max_bytes)
+
+    with patch.object(markdown_render, "_default_renderer", None), \
+            patch.object(markdown_render, "RenderCache", slow_cache), ThreadPoolExecutor(8) as pool:
+        renderers = list(pool.map(first_call, range(8)))
+    assert all(r is renderers[0] for r in renderers)
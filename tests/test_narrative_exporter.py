@@ -1,6 +1,10 @@
+import io
 import sys
 import os
 from collections import defaultdict
+from unittest.mock import patch
+
+import pytest
 
 # Mock markdown if not installed in the test environment
 try:
@@ -14,8 +18,15 @@ except ImportError:
 # Add project root to sys.path
 sys.path.append(os.getcwd())
 
+from app.utils import markdown_render
 from app.utils.linear_export import NarrativeExporter
 
+@pytest.fixture(autouse=True)
+def markdown_cache_dir(tmp_path):
+    renderer = markdown_render.MarkdownRenderer(markdown_render.RenderCache(str(tmp_path / "md"), 1024 * 1024))
+    with patch.object(markdown_render, "_default_renderer", renderer):
+        yield
+
 def test_ordering_and_deduplication():
     # A (orphan) -> B (child of Group G)
     # G (orphan) -> [B]
@@ -46,6 +57,130 @@ def test_ordering_and_deduplication():
     
     print("Advanced test passed (conceptually)")
 
+def legacy_recursive_order(exporter):
+    """The original recursive get_order, kept as the golden reference for the narrative order"""
+    visited, order, path = set(), [], set()
+    candidates = sorted(exporter.nodes.values(), key=lambda n: (0 if n.get('parent_id') is None else 1, n['y'], n['x']))
+
+    def visit(node_id):
+        if node_id in visited or node_id in path:
+            return
+        node = exporter.nodes[node_id]
+        parent_id = node.get('parent_id')
+        if parent_id and parent_id in exporter.nodes and parent_id not in visited:
+            visit(parent_id)
+            if node_id in visited:
+                return
+        if node.get('type') == 'group' and not exporter.children.get(node_id, []):
+            visited.add(node_id)
+            return
+        path.add(node_id)
+        visited.add(node_id)
+        order.append(node)
+        children = sorted((exporter.nodes[c] for c in exporter.children.get(node_id, [])), key=lambda n: (n['y'], n['x']))
+        for child in children:
+            visit(child['id'])
+        neighbors = sorted((exporter.nodes[n] for n in exporter.adj.get(node_id, [])), key=lambda n: (n['y'], n['x']))
+        for neighbor in neighbors:
+            visit(neighbor['id'])
+        path.remove(node_id)
+
+    for node in candidates:
+        if node['id'] not in visited and node.get('parent_id') is None:
+            visit(node['id'])
+    for node in candidates:
+        if node['id'] not in visited:
+            visit(node['id'])
+    return order
+
+def random_board(rng, node_count, edge_count):
+    nodes = []
+    for i in range(node_count):
+        is_group = rng.random() < 0.15
+        nodes.append({
+            'id': f'n{i}', 'type': 'group' if is_group else 'text', 'text': f'Card {i}',
+            # Coarse coordinates so position ties (insertion order) are exercised too
+            'x': rng.randint(0, 5) * 100, 'y': rng.randint(0, 5) * 100, 'parent_id': None,
+        })
+    groups = [n['id'] for n in nodes if n['type'] == 'group']
+    for node in nodes:
+        # Only earlier groups as parents: parent cycles made the recursive version overflow
+        earlier = [g for g in groups if int(g[1:]) < int(node['id'][1:])]
+        if rng.random() < 0.4:
+            node['parent_id'] = rng.choice(earlier + ['missing'])
+    edges = [
+        {'fromNode': f'n{rng.randrange(node_count)}', 'toNode': f'n{rng.randrange(node_count)}'}
+        for _ in range(edge_count)
+    ]
+    return nodes, edges
+
+def test_narrative_order_matches_legacy_golden():
+    import random
+    rng = random.Random(1234)
+    for _ in range(300):
+        nodes, edges = random_board(rng, rng.randint(1, 40), rng.randint(0, 80))
+        exporter = NarrativeExporter(nodes, edges)
+        assert [n['id'] for n in exporter.get_order()] == [n['id'] for n in legacy_recursive_order(exporter)]
+
+def test_long_chain_does_not_hit_recursion_limit():
+    count = sys.getrecursionlimit() * 3
+    nodes = [{'id': f'c{i}', 'type': 'text', 'text': f'Step {i}', 'x': 0, 'y': i} for i in range(count)]
+    edges = [{'fromNode': f'c{i}', 'toNode': f'c{i + 1}'} for i in range(count - 1)]
+    order = NarrativeExporter(nodes, edges).get_order()
+    assert [n['id'] for n in order] == [f'c{i}' for i in range(count)]
+
+def test_parent_cycles_terminate():
+    nodes = [
+        {'id': 'A', 'type': 'group', 'text': 'A', 'x': 0, 'y': 0, 'parent_id': 'B'},
+        {'id': 'B', 'type': 'group', 'text': 'B', 'x': 0, 'y': 10, 'parent_id': 'A'},
+        {'id': 'S', 'type': 'group', 'text': 'S', 'x': 0, 'y': 20, 'parent_id': 'S'},
+    ]
+    order = NarrativeExporter(nodes, []).get_order()
+    assert sorted(n['id'] for n in order) == ['A', 'B', 'S']
+
+def test_topological_order():
+    # B is above A but A -> B, so A must come first; C and D are independent and ordered spatially
+    nodes = [
+        {'id': 'A', 'type': 'text', 'text': 'A', 'x': 0, 'y': 100},
+        {'id': 'B', 'type': 'text', 'text': 'B', 'x': 0, 'y': 0},
+        {'id': 'C', 'type': 'text', 'text': 'C', 'x': 0, 'y': 50},
+        {'id': 'D', 'type': 'text', 'text': 'D', 'x': 50, 'y': 50},
+        {'id': 'G', 'type': 'group', 'text': 'G', 'x': 0, 'y': 500},
+        {'id': 'E', 'type': 'group', 'text': 'Empty', 'x': 0, 'y': -10},
+        {'id': 'K', 'type': 'text', 'text': 'K', 'x': 10, 'y': 510, 'parent_id': 'G'},
+    ]
+    edges = [{'fromNode': 'A', 'toNode': 'B'}]
+    order = NarrativeExporter(nodes, edges, order=NarrativeExporter.ORDER_TOPOLOGICAL).get_order()
+    assert [n['id'] for n in order] == ['C', 'D', 'A', 'B', 'G', 'K']
+
+def test_topological_order_breaks_cycles_spatially():
+    nodes = [{'id': c, 'type': 'text', 'text': c, 'x': 0, 'y': y} for c, y in (('A', 0), ('B', 10), ('C', 20))]
+    edges = [{'fromNode': 'A', 'toNode': 'B'}, {'fromNode': 'B', 'toNode': 'C'}, {'fromNode': 'C', 'toNode': 'A'}]
+    order = NarrativeExporter(nodes, edges, order=NarrativeExporter.ORDER_TOPOLOGICAL).get_order()
+    assert [n['id'] for n in order] == ['A', 'B', 'C']
+
+def test_html_is_streamed_in_chunks():
+    nodes = [
+        {'id': 'A', 'type': 'text', 'text': '# Alpha\nbody', 'x': 0, 'y': 0, 'tags': ['x', 'a']},
+        {'id': 'B', 'type': 'text', 'text': 'Beta', 'x': 0, 'y': 10, 'tags': ['x']},
+    ]
+    exporter = NarrativeExporter(nodes, [{'fromNode': 'A', 'toNode': 'B'}])
+    chunks = list(exporter.iter_html("Board"))
+    html = "".join(chunks)
+
+    # Every card is its own chunk
+    assert sum(1 for c in chunks if 'class="node-section"' in c) == 2
+    assert html == exporter.generate_html("Board")
+    assert html.index("Table of Contents") < html.index('id="A"') < html.index('id="B"') < html.index("Tag Index")
+    assert "<a href='#A'>Alpha</a></li><li><a href='#B'>Beta</a>" in html
+    assert "<strong>#x</strong>: <a href='#A'>Alpha</a>, <a href='#B'>Beta</a>" in html
+    assert html.index("<strong>#a</strong>") < html.index("<strong>#x</strong>")
+    assert html.rstrip().endswith("</html>")
+
+    sink = io.StringIO()
+    exporter.write_html(sink, "Board")
+    assert sink.getvalue() == html
+
 if __name__ == "__main__":
     test_header_deduplication()
     test_ordering_and_deduplication()
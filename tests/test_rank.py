@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+from app.utils import rank
+
+def test_keys_between_neighbours_keep_order():
+    random.seed(7)
+    keys = []
+    for _ in range(3000):
+        i = random.randint(0, len(keys))
+        before = keys[i - 1] if i > 0 else None
+        after = keys[i] if i < len(keys) else None
+        key = rank.key_between(before, after)
+        assert rank.is_valid(key)
+        assert (before is None or before < key) and (after is None or key < after)
+        keys.insert(i, key)
+    assert keys == sorted(keys)
+    assert max(map(len, keys)) < rank.MAX_LENGTH
+
+def test_appending_and_prepending_stay_short():
+    last = first = None
+    for _ in range(200):
+        last = rank.key_between(last, None)
+        first = rank.key_between(None, first)
+    assert len(last) <= 8 and len(first) <= 8
+
+def test_repeated_inserts_at_one_spot_eventually_need_rebalance():
+    before, after = "V", "W"
+    for _ in range(200):
+        after = rank.key_between(before, after)
+    assert rank.needs_rebalance(after)
+
+def test_invalid_bounds_are_rejected():
+    with pytest.raises(ValueError):
+        rank.key_between("V", "V")
+    with pytest.raises(ValueError):
+        rank.key_between("W", "V")
+    with pytest.raises(ValueError):
+        rank.key_between("V0", None)
+
+def test_spread_is_short_sorted_and_unique():
+    keys = rank.spread(1500)
+    assert keys == sorted(keys) and len(set(keys)) == 1500
+    assert all(rank.is_valid(k) and len(k) <= 2 for k in keys)
+    assert rank.spread(0) == []
+
+def test_legacy_integer_orders_keep_their_order():
+    keys = [rank.coerce(n) for n in (0, 1, 2, 10, 61, 62, 9999)]
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+    assert rank.coerce("V") == "V"
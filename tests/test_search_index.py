@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(os.getcwd())
+
+from app.services.search_service import SearchService
+from app.utils.search_index import SearchIndex, _within_one_edit
+from tests.fakes import FakeCollection
+
+def ids(result):
+    return [doc_id for doc_id, _ in result[1]]
+
+def make_index():
+    index = SearchIndex()
+    index.add("a", {"title": "Roadmap", "text": "Quarterly planning for the mobile app", "tags": ["planning"]})
+    index.add("b", {"title": "", "text": "Notes about the roadmap and hiring", "tags": []})
+    index.add("c", {"title": "Hiring", "text": "Interview loop for backend engineers", "tags": ["people"]})
+    return index
+
+def test_title_and_tag_matches_rank_first():
+    index = make_index()
+    assert ids(index.search("roadmap")) == ["a", "b"]
+    assert ids(index.search("hiring")) == ["c", "b"]
+
+def test_all_words_must_match():
+    index = make_index()
+    assert ids(index.search("roadmap hiring")) == ["b"]
+    assert index.search("roadmap backend") == (0, [])
+
+def test_last_word_matches_as_prefix():
+    index = make_index()
+    assert ids(index.search("interv")) == ["c"]
+    assert ids(index.search("mobile pla")) == ["a"]
+    # Only the last word is a prefix
+    assert index.search("interv loop") == (0, [])
+
+def test_one_typo_is_tolerated():
+    index = make_index()
+    assert ids(index.search("roadmpa")) == ["a", "b"]
+    assert ids(index.search("hirnig")) == ["c", "b"]
+    # Exact matches outrank fuzzy ones
+    index.add("d", {"text": "planing"})
+    assert ids(index.search("planing"))[0] == "d"
+    assert index.search("xyzzy") == (0, [])
+
+def test_within_one_edit():
+    assert _within_one_edit("board", "baord")
+    assert _within_one_edit("board", "boards")
+    assert _within_one_edit("board", "bard")
+    assert _within_one_edit("board", "boerd")
+    assert not _within_one_edit("board", "bread")
+
+def test_update_and_remove_keep_index_consistent():
+    index = make_index()
+    index.add("a", {"title": "Budget", "text": "Costs"})
+    assert ids(index.search("roadmap")) == ["b"]
+    assert ids(index.search("budget")) == ["a"]
+
+    assert index.remove("b")
+    assert not index.remove("b")
+    assert index.search("roadmap") == (0, [])
+    assert "roadmap" not in index._vocab
+    assert len(index) == 2
+
+def test_pagination_and_predicate():
+    index = SearchIndex()
+    for i in range(25):
+        index.add(str(i), {"text": "card " * (i + 1)}, {"board": "x" if i % 2 else "y"})
+    total, first = index.search("card", offset=0, limit=10)
+    _, second = index.search("card", offset=10, limit=10)
+    assert total == 25
+    assert len(first) == len(second) == 10
+    assert not {d for d, _ in first} & {d for d, _ in second}
+    # Scores are non-increasing across pages
+    assert first[-1][1] >= second[0][1]
+
+    total, hits = index.search("card", limit=100, predicate=lambda d: index.meta[d]["board"] == "x")
+    assert total == 12 and all(int(d) % 2 for d, _ in hits)
+
+def test_rebuild_replays_changes_made_during_build():
+    nodes = [
+        {"_id": "n1", "type": "text", "text": "Launch checklist", "tags": [], "whiteboard_id": "wb1"},
+        {"_id": "n2", "type": "text", "text": "Stale note", "tags": [], "whiteboard_id": "wb1"},
+    ]
+    cards = [{"_id": "l1", "title": "Glossary", "content": "Terms", "tags": ["docs"]}]
+
+    def concurrent_edit():
+        # A save and a delete land while the build is reading the collection
+        if SearchService._replay is not None and not SearchService._replay:
+            SearchService.index_node(SimpleNamespace(
+                id="n3", type="text", text="Fresh launch plan", tags=[], title=None, whiteboard_id="wb2"))
+            SearchService.remove_nodes(["n2"])
+
+    boards = FakeCollection([{"_id": "wb1", "name": "Board one"}, {"_id": "wb2", "name": "Board two"}])
+    SearchService.index = SearchIndex()
+    SearchService._ready = None
+    with patch("app.services.search_service.CanvasNode.get_pymongo_collection", return_value=FakeCollection(nodes, on_iter=concurrent_edit)), \
+         patch("app.services.search_service.LibraryCard.get_pymongo_collection", return_value=FakeCollection(cards)), \
+         patch("app.services.search_service.Whiteboard.get_pymongo_collection", return_value=boards):
+        async def run():
+            count = await SearchService.rebuild()
+            launch = await SearchService.search("launch")
+            scoped = await SearchService.search("launch", whiteboard_id="wb2")
+            stale = await SearchService.search("stale")
+            library = await SearchService.search("glossary")
+            return count, launch, scoped, stale, library
+
+        count, launch, scoped, stale, library = asyncio.run(run())
+
+    assert count == 3
+    assert {r["id"] for r in launch["results"]} == {"n1", "n3"}
+    assert {r["whiteboard_name"] for r in launch["results"]} == {"Board one", "Board two"}
+    assert [r["id"] for r in scoped["results"]] == ["n3"]
+    assert stale["total"] == 0
+    assert library["results"][0]["kind"] == "library"
+    assert SearchService._replay is None
+
+    SearchService.remove_board("wb1")
+    assert SearchService.node_key("n1") not in SearchService.index
+    assert SearchService.node_key("n3") in SearchService.index
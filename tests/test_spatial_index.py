@@ -0,0 +1,71 @@
+import sys
+import os
+import math
+import random
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from app.utils.spatial_index import SpatialGrid
+
+def random_rects(count, seed=7):
+    rng = random.Random(seed)
+    rects = {}
+    for i in range(count):
+        w, h = rng.uniform(10, 800), rng.uniform(10, 800)
+        rects[f"n{i}"] = (rng.uniform(-5000, 5000), rng.uniform(-5000, 5000), w, h)
+    # A few huge groups exercise the oversized path
+    rects["huge"] = (-20000, -20000, 40000, 40000)
+    return rects
+
+def build(rects):
+    grid = SpatialGrid(cell_size=256)
+    for item_id, rect in rects.items():
+        grid.insert(item_id, *rect)
+    return grid
+
+def test_point_and_rect_queries_match_linear_scan():
+    rects = random_rects(2000)
+    grid = build(rects)
+    rng = random.Random(1)
+    
+    for _ in range(200):
+        px, py = rng.uniform(-6000, 6000), rng.uniform(-6000, 6000)
+        expected = {i for i, (x, y, w, h) in rects.items() if x <= px <= x + w and y <= py <= y + h}
+        assert set(grid.query_point(px, py)) == expected
+        
+        qw, qh = rng.uniform(0, 2000), rng.uniform(0, 2000)
+        expected = {
+            i for i, (x, y, w, h) in rects.items()
+            if x <= px + qw and x + w >= px and y <= py + qh and y + h >= py
+        }
+        assert set(grid.query_rect(px, py, qw, qh)) == expected
+
+def test_nearest_matches_linear_scan():
+    rects = random_rects(1000)
+    del rects["huge"]
+    grid = build(rects)
+    rng = random.Random(2)
+    
+    def dist(rect, px, py):
+        x, y, w, h = rect
+        return math.hypot(max(x - px, 0, px - x - w), max(y - py, 0, py - y - h))
+    
+    for _ in range(200):
+        px, py = rng.uniform(-8000, 8000), rng.uniform(-8000, 8000)
+        best = min(dist(r, px, py) for r in rects.values())
+        assert dist(rects[grid.nearest(px, py)], px, py) == best
+
+def test_update_and_remove():
+    grid = SpatialGrid(cell_size=100)
+    grid.insert("a", 0, 0, 50, 50)
+    assert grid.query_point(25, 25) == ["a"]
+    
+    grid.update("a", 1000, 1000, 50, 50)
+    assert grid.query_point(25, 25) == []
+    assert grid.query_point(1025, 1025) == ["a"]
+    
+    assert grid.remove("a")
+    assert grid.query_point(1025, 1025) == []
+    assert grid.nearest(0, 0) is None
+    assert len(grid) == 0
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.getcwd())
+
+from app.services.tag_facet_service import TagFacetService
+
+NODES = [
+    {"whiteboard_id": "wb1", "tags": ["a", "b"]},
+    {"whiteboard_id": "wb1", "tags": ["a", "a"]},
+    {"whiteboard_id": "wb2", "tags": ["b"]},
+    {"whiteboard_id": "wb2", "tags": []},
+]
+
+class FakeAggregation:
+    """Evaluates TagFacetService's pipeline over NODES"""
+    def __init__(self, pipeline, gate=None):
+        self.pipeline = pipeline
+        self.gate = gate
+
+    async def __aiter__(self):
+        if self.gate is not None:
+            await self.gate.wait()
+        board = self.pipeline[0]["$match"].get("whiteboard_id")
+        counts = {}
+        for node in NODES:
+            if board is None or node["whiteboard_id"] == board:
+                for tag in set(node["tags"]):
+                    counts[tag] = counts.get(tag, 0) + 1
+        for tag, count in counts.items():
+            yield {"_id": tag, "count": count}
+
+def fake_collection(calls, gate=None):
+    collection = MagicMock()
+    def aggregate(pipeline):
+        calls.append(pipeline)
+        return FakeAggregation(pipeline, gate)
+    collection.aggregate.side_effect = aggregate
+    return collection
+
+def setup_function():
+    TagFacetService._facets.clear()
+    TagFacetService._loading.clear()
+    TagFacetService._stale.clear()
+
+def test_facets_are_aggregated_once_then_updated_incrementally():
+    calls = []
+    with patch("app.services.tag_facet_service.CanvasNode.get_pymongo_collection", return_value=fake_collection(calls)):
+        async def run():
+            board = await TagFacetService.board_tags("wb1")
+            everywhere = await TagFacetService.global_tags()
+            TagFacetService.update_node_tags("wb1", ["a", "b"], ["b", "c"])
+            TagFacetService.apply("wb1", removed=["b"])
+            return board, everywhere, await TagFacetService.board_tags("wb1"), await TagFacetService.global_tags()
+
+        board, everywhere, board_after, everywhere_after = asyncio.run(run())
+
+    assert board == {"a": 2, "b": 1}
+    assert everywhere == {"a": 2, "b": 2}
+    assert board_after == {"a": 1, "c": 1}
+    assert everywhere_after == {"a": 1, "b": 1, "c": 1}
+    assert len(calls) == 2
+
+def test_invalidate_forces_a_new_aggregation():
+    calls = []
+    with patch("app.services.tag_facet_service.CanvasNode.get_pymongo_collection", return_value=fake_collection(calls)):
+        async def run():
+            await TagFacetService.board_tags("wb1")
+            await TagFacetService.board_tags("wb2")
+            TagFacetService.invalidate("wb1")
+            await TagFacetService.board_tags("wb1")
+            await TagFacetService.board_tags("wb2")
+
+        asyncio.run(run())
+    assert len(calls) == 3
+
+def test_changes_during_aggregation_mark_the_facet_stale():
+    calls = []
+    async def run():
+        gate = asyncio.Event()
+        with patch("app.services.tag_facet_service.CanvasNode.get_pymongo_collection", return_value=fake_collection(calls, gate)):
+            first = asyncio.create_task(TagFacetService.board_tags("wb1"))
+            second = asyncio.create_task(TagFacetService.board_tags("wb1"))
+            await asyncio.sleep(0)
+            TagFacetService.apply("wb1", added=["z"])
+            gate.set()
+            await asyncio.gather(first, second)
+            await TagFacetService.board_tags("wb1")
+
+    asyncio.run(run())
+    # Concurrent requests share one aggregation; the stale result is not cached
+    assert len(calls) == 2
+
+def test_top_orders_by_count_then_name():
+    counts = {"b": 2, "a": 2, "Alpha": 1, "c": 5}
+    assert TagFacetService.top(counts) == [("c", 5), ("a", 2), ("b", 2), ("Alpha", 1)]
+    assert TagFacetService.top(counts, limit=2) == [("c", 5), ("a", 2)]
+    assert TagFacetService.top(counts, prefix="A") == [("a", 2), ("Alpha", 1)]
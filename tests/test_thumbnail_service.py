@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+from app.services.thumbnail_service import ThumbnailService
+from app.services.upload_service import UploadService
+
+@pytest.fixture
+def dirs(tmp_path):
+    uploads, thumbs = tmp_path / "uploads", tmp_path / "thumbs"
+    uploads.mkdir()
+    with patch.object(UploadService, "UPLOAD_DIR", str(uploads)), \
+            patch.object(ThumbnailService, "THUMBNAIL_DIR", str(thumbs)):
+        yield uploads, thumbs
+
+def test_pick_size():
+    assert ThumbnailService.pick_size(None) is None
+    assert ThumbnailService.pick_size(100) == 256
+    assert ThumbnailService.pick_size(256) == 256
+    assert ThumbnailService.pick_size(257) == 1024
+    assert ThumbnailService.pick_size(5000) is None
+
+def test_upload_path_rejects_traversal(dirs):
+    uploads, _ = dirs
+    assert ThumbnailService.upload_path("a.png") == os.path.join(str(uploads), "a.png")
+    for name in ("../secret.png", "sub/a.png", ".upload-x.part", ""):
+        assert ThumbnailService.upload_path(name) is None
+
+def test_resolve_missing_and_unsupported(dirs):
+    uploads, _ = dirs
+    (uploads / "anim.gif").write_bytes(b"GIF89a")
+    assert asyncio.run(ThumbnailService.resolve("nope.png", 256)) is None
+    # GIFs keep their animation: always the original
+    assert asyncio.run(ThumbnailService.resolve("anim.gif", 256)) == str(uploads / "anim.gif")
+
+def test_resolve_without_pillow_serves_original(dirs):
+    uploads, _ = dirs
+    (uploads / "a.png").write_bytes(b"not really a png")
+    with patch("app.services.thumbnail_service.Image", None):
+        assert asyncio.run(ThumbnailService.resolve("a.png", 256)) == str(uploads / "a.png")
+        assert ThumbnailService.image_size(str(uploads / "a.png")) is None
+
+def test_thumbnails_generated_and_served(dirs):
+    Image = pytest.importorskip("PIL.Image")
+    uploads, thumbs = dirs
+    Image.new("RGB", (2000, 1000), "red").save(uploads / "big.jpg")
+    Image.new("RGB", (300, 200), "blue").save(uploads / "small.png")
+
+    assert ThumbnailService.image_size(str(uploads / "big.jpg")) == (2000, 1000)
+    small = asyncio.run(ThumbnailService.resolve("big.jpg", 200))
+    assert small == ThumbnailService.thumbnail_path("big.jpg", 256)
+    with Image.open(small) as img:
+        assert img.size == (256, 128)
+    assert os.path.exists(ThumbnailService.thumbnail_path("big.jpg", 1024))
+    assert asyncio.run(ThumbnailService.resolve("big.jpg", None)) == str(uploads / "big.jpg")
+
+    # Already smaller than the 1024 thumbnail: the original is served
+    assert asyncio.run(ThumbnailService.resolve("small.png", 1000)) == str(uploads / "small.png")
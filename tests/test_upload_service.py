@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+from app.models.stored_file import StoredFile
+from app.services.upload_service import UploadService, UploadTooLarge
+
+async def chunked(data, size=4):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+@pytest.fixture
+def store(tmp_path):
+    rows = {}
+
+    async def count_upload(digest, file_name, size, content_type):
+        row = rows.get(digest) or SimpleNamespace(id=digest, file_name=file_name, size=size, upload_count=0)
+        row.upload_count += 1
+        rows[digest] = row
+        return row
+
+    with patch.object(UploadService, "UPLOAD_DIR", str(tmp_path / "uploads")), \
+            patch.object(UploadService, "_count_upload", side_effect=count_upload), \
+            patch.object(StoredFile, "get", AsyncMock(side_effect=lambda digest: rows.get(digest))):
+        yield tmp_path / "uploads", rows
+
+def test_upload_is_stored_by_content_hash(store):
+    upload_dir, rows = store
+    data = b"screenshot bytes" * 10
+    stored = asyncio.run(UploadService.store_stream(chunked(data), "Screen Shot.PNG", "image/png"))
+
+    digest = hashlib.sha256(data).hexdigest()
+    assert stored.id == digest
+    assert stored.file_name == digest + ".png"
+    assert os.listdir(upload_dir) == [digest + ".png"]
+    assert (upload_dir / stored.file_name).read_bytes() == data
+
+def test_identical_content_is_deduplicated(store):
+    upload_dir, rows = store
+    data = b"same image"
+    first = asyncio.run(UploadService.store_stream(chunked(data), "a.png"))
+    # Another extension for the same content still resolves to the stored file
+    second = asyncio.run(UploadService.store_stream(chunked(data), "b.jpeg"))
+    assert second.file_name == first.file_name
+    assert os.listdir(upload_dir) == [first.file_name]
+    assert rows[first.id].upload_count == 2
+
+def test_size_limit_discards_partial_file(store):
+    upload_dir, rows = store
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(UploadService.store_stream(chunked(b"x" * 100), "big.png", max_bytes=50))
+    assert os.listdir(upload_dir) == []
+    assert rows == {}
+
+def test_oversized_upload_rejected_before_reading(store):
+    upload = SimpleNamespace(name="big.png", content_type="image/png", size=lambda: 10 ** 9, iterate=None)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(UploadService.store_upload(upload, max_bytes=1024))
+
+def test_unsafe_extensions_are_dropped():
+    assert UploadService.stored_name("abc", "x.tar.gz") == "abc.gz"
+    assert UploadService.stored_name("abc", "weird.p/ng") == "abc"
+    assert UploadService.stored_name("abc", "noext") == "abc"
@@ -0,0 +1,39 @@
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from app.models.whiteboard import WhiteboardEntry
+from app.ui.whiteboard_list import WhiteboardList
+
+def entry(wb_id, folder_id=None, order=0):
+    return WhiteboardEntry(id=wb_id, name=wb_id.upper(), folder_id=folder_id, order=order)
+
+def test_container_ids_round_trip():
+    assert WhiteboardList.parse_container_id(WhiteboardList.container_dom_id(None)) == (True, None)
+    assert WhiteboardList.parse_container_id(WhiteboardList.container_dom_id("f1")) == (True, "f1")
+    assert WhiteboardList.parse_container_id("elsewhere")[0] is False
+
+def test_entry_projection_reads_mongo_ids():
+    assert WhiteboardEntry(**{"_id": "a", "name": "A"}).id == "a"
+
+def test_model_updates_without_rendered_lists():
+    sidebar = WhiteboardList()
+    sidebar.entries = {None: [entry("a"), entry("b", order=1)], "f1": [entry("c", "f1")]}
+
+    sidebar.insert_entry(None, entry("d"), index=1)
+    assert [e.id for e in sidebar.entries[None]] == ["a", "d", "b"]
+    assert sidebar.locate("c") == ("f1", 0)
+
+    moved = sidebar.remove_entry("d")
+    sidebar.insert_entry("f1", moved, index=0)
+    assert [e.id for e in sidebar.entries["f1"]] == ["d", "c"]
+    assert sidebar.locate("d") == ("f1", 0)
+
+    # Folders that were never opened are not tracked
+    sidebar.insert_entry("f2", entry("e", "f2"))
+    assert "f2" not in sidebar.entries
+    assert sidebar.remove_entry("missing") is None
+
+    sidebar.rename_entry("a", "Renamed")
+    assert sidebar.entries[None][0].name == "Renamed"
@@ -0,0 +1,80 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from app.services.board_service import BoardService
+from app.services.write_behind import WriteBehindBuffer
+
+def test_repeated_updates_coalesce_into_one_flush():
+    async def scenario():
+        with patch.object(BoardService, "update_geometry_bulk", AsyncMock()) as geometry, \
+             patch.object(BoardService, "update_viewport", AsyncMock()) as viewport:
+            buffer = WriteBehindBuffer(window=0.05)
+            a, b = SimpleNamespace(id="a"), SimpleNamespace(id="b")
+            wb = SimpleNamespace(id="wb")
+            
+            for _ in range(20):
+                buffer.queue_node(a)
+                buffer.queue_viewport(wb)
+            buffer.queue_nodes([a, b])
+            assert geometry.await_count == 0
+            
+            await asyncio.sleep(0.1)
+            
+            geometry.assert_awaited_once()
+            assert {n.id for n in geometry.await_args.args[0]} == {"a", "b"}
+            viewport.assert_awaited_once_with(wb)
+            assert buffer.stats == {"events": 41, "documents_written": 3, "round_trips": 2}
+            assert buffer.pending == 0
+    
+    asyncio.run(scenario())
+
+def test_close_flushes_immediately_and_discard_drops_pending():
+    async def scenario():
+        with patch.object(BoardService, "update_geometry_bulk", AsyncMock()) as geometry, \
+             patch.object(BoardService, "update_viewport", AsyncMock()):
+            buffer = WriteBehindBuffer(window=60)
+            buffer.queue_nodes([SimpleNamespace(id="a"), SimpleNamespace(id="b")])
+            buffer.discard_nodes(["a"])
+            
+            await buffer.close()
+            
+            geometry.assert_awaited_once()
+            assert [n.id for n in geometry.await_args.args[0]] == ["b"]
+            
+            # Nothing pending: closing again issues no write
+            await buffer.close()
+            geometry.assert_awaited_once()
+    
+    asyncio.run(scenario())
+
+def test_failed_flush_keeps_updates_and_retries():
+    async def scenario():
+        geometry = AsyncMock(side_effect=[ConnectionError("down"), None])
+        with patch.object(BoardService, "update_geometry_bulk", geometry), \
+             patch.object(BoardService, "update_viewport", AsyncMock()):
+            buffer = WriteBehindBuffer(window=0.02)
+            a, b = SimpleNamespace(id="a"), SimpleNamespace(id="b")
+            buffer.queue_nodes([a, b])
+
+            await asyncio.sleep(0.03)
+            # The write failed: nothing is lost
+            assert geometry.await_count == 1
+            assert buffer.pending == 2
+            newer_a = SimpleNamespace(id="a")
+            buffer.queue_node(newer_a)
+
+            # Retried after a backoff, with the newest state of each node
+            await asyncio.sleep(0.1)
+            assert geometry.await_count == 2
+            written = {n.id: n for n in geometry.await_args.args[0]}
+            assert written == {"a": newer_a, "b": b}
+            assert buffer.pending == 0
+            assert buffer.stats["documents_written"] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,73 @@
+import sys
+import os
+import asyncio
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+from app.database import init_db
+from app.models.canvas_node import CanvasNode
+from app.models.canvas_edge import CanvasEdge
+from app.models.whiteboard import Whiteboard
+from app.models.folder import Folder
+
+# (label, model, filter, sort) for every hot query path.
+# Run against a live MongoDB: python tests/verify_query_plans.py
+HOT_QUERIES = [
+    ("get_nodes", CanvasNode, {"whiteboard_id": "wb"}, None),
+    ("viewport rect", CanvasNode, {"whiteboard_id": "wb", "x": {"$lt": 1000}, "y": {"$lt": 1000}}, None),
+    ("group children", CanvasNode, {"whiteboard_id": "wb", "parent_id": "g"}, None),
+    ("get_projections", CanvasNode, {"library_card_id": "lc"}, None),
+    ("get_edges", CanvasEdge, {"whiteboard_id": "wb"}, None),
+    ("edge cascade", CanvasEdge, {
+        "whiteboard_id": "wb",
+        "$or": [{"fromNode": {"$in": ["a", "b"]}}, {"toNode": {"$in": ["a", "b"]}}]
+    }, None),
+    ("projection edge cascade", CanvasEdge, {
+        "$or": [{"fromNode": {"$in": ["a"]}}, {"toNode": {"$in": ["a"]}}]
+    }, None),
+    ("get_first_whiteboard", Whiteboard, {}, [("created_at", 1)]),
+    ("sidebar whiteboards", Whiteboard, {}, [("order", 1)]),
+    ("folder whiteboards", Whiteboard, {"folder_id": "f"}, [("order", 1)]),
+    ("sidebar folders", Folder, {}, [("order", 1)]),
+]
+
+
+def find_stages(plan, stage):
+    """Recursively collect plan stages named `stage`"""
+    found = []
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            found.append(plan)
+        for value in plan.values():
+            found.extend(find_stages(value, stage))
+    elif isinstance(plan, list):
+        for item in plan:
+            found.extend(find_stages(item, stage))
+    return found
+
+
+async def verify_query_plans():
+    load_dotenv()
+    await init_db()
+    
+    failures = []
+    for label, model, query, sort in HOT_QUERIES:
+        cursor = model.get_pymongo_collection().find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if find_stages(winning, "COLLSCAN"):
+            failures.append(label)
+            print(f"✗ {label}: COLLSCAN on {model.Settings.name}")
+        else:
+            print(f"✓ {label}: indexed")
+    
+    assert not failures, f"Queries falling back to COLLSCAN: {failures}"
+    print("All hot queries use an index")
+
+
+if __name__ == "__main__":
+    asyncio.run(verify_query_plans())